@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Concurrent asset pipeline for the Journal converter.
+
+Photos, drawings, audio and video referenced by entries are materialised into
+md/assets on a thread pool. Each asset is reflinked or hardlinked when the
+filesystem allows it and copied only when it doesn't; assets whose content is
+already present in the destination are skipped. When a conversion fails the
+original is placed instead and recorded in ``AssetPipeline.fallbacks``, so
+links written before the failure was known can be repointed.
+"""
+import hashlib
+import os
+import shutil
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List
+
+# How assets reach the destination: "auto" tries reflink, then hardlink, then copy.
+LINK_MODES = ("auto", "reflink", "hardlink", "copy")
+
+# Linux ioctl for copy-on-write clones (btrfs, xfs, ...).
+FICLONE = 0x40049409
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+Converter = Callable[[Path, Path], Path]
+
+
+def format_bytes(size: int) -> str:
+    """Human readable byte count (e.g. 1.5 MB)."""
+    value = float(size)
+    for unit in ("B", "KB", "MB", "GB"):
+        if value < 1024 or unit == "GB":
+            return f"{value:.0f} {unit}" if unit == "B" else f"{value:.1f} {unit}"
+        value /= 1024
+    return f"{value:.1f} GB"
+
+
+def file_digest(path: Path) -> str:
+    """SHA-256 of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with path.open("rb") as fh:
+        for chunk in iter(lambda: fh.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _reflink(src_path: Path, dest_path: Path) -> None:
+    import fcntl  # Not available on Windows
+
+    with src_path.open("rb") as src, dest_path.open("wb") as dest:
+        try:
+            fcntl.ioctl(dest.fileno(), FICLONE, src.fileno())
+        except OSError:
+            dest.close()
+            dest_path.unlink()
+            raise
+    shutil.copystat(src_path, dest_path)
+
+
+def try_link(src_path: Path, dest_path: Path, link_mode: str = "auto") -> bool:
+    """Reflink or hardlink ``src_path`` to ``dest_path`` as ``link_mode`` allows."""
+    if link_mode in ("auto", "reflink"):
+        try:
+            _reflink(src_path, dest_path)
+            return True
+        except (ImportError, OSError):
+            pass
+    if link_mode in ("auto", "hardlink"):
+        try:
+            os.link(src_path, dest_path)
+            return True
+        except OSError:
+            pass
+    return False
+
+
+def link_or_copy(src_path: Path, dest_path: Path, link_mode: str = "auto") -> bool:
+    """Place ``src_path`` at ``dest_path``; returns True if it was linked, not copied."""
+    if try_link(src_path, dest_path, link_mode):
+        return True
+    shutil.copy2(src_path, dest_path)
+    return False
+
+
+@dataclass
+class AssetStats:
+    copied_files: int = 0
+    copied_bytes: int = 0
+    linked_files: int = 0
+    linked_bytes: int = 0
+    skipped_files: int = 0
+    skipped_bytes: int = 0
+    converted_files: int = 0
+    converted_bytes: int = 0
+    failed_files: int = 0
+
+    def summary(self) -> str:
+        return (
+            f"Assets: {self.copied_files} copied ({format_bytes(self.copied_bytes)}), "
+            f"{self.linked_files} linked ({format_bytes(self.linked_bytes)}), "
+            f"{self.skipped_files} already present ({format_bytes(self.skipped_bytes)}), "
+            f"{self.converted_files} converted ({format_bytes(self.converted_bytes)}), "
+            f"{self.failed_files} failed"
+        )
+
+
+class AssetPipeline:
+    """Materialise assets into ``dest_dir``, optionally on a thread pool.
+
+    ``submit`` returns the destination path straight away so the Markdown
+    link can be written while the copy/convert runs in the background.
+    ``jobs=0`` does the work inline in the calling thread, and ``submit``
+    then returns the original's path if the conversion failed.
+    """
+
+    def __init__(
+        self,
+        dest_dir: Path,
+        jobs: int = 0,
+        link_mode: str = "auto",
+        converter: Converter | None = None,
+    ) -> None:
+        if link_mode not in LINK_MODES:
+            raise ValueError(f"Unknown link mode: {link_mode}")
+        self.dest_dir = dest_dir
+        self.link_mode = link_mode
+        self.converter = converter
+        self.stats = AssetStats()
+        self._executor = ThreadPoolExecutor(max_workers=jobs) if jobs > 0 else None
+        self._lock = threading.Lock()
+        self._jobs: Dict[Path, Future] = {}
+        # Destination name -> name of the original placed instead, for failed conversions
+        self.fallbacks: Dict[str, str] = {}
+        # Content index for dedup: size -> [[digest, src_path, dest_path], ...]
+        self._by_size: Dict[int, List[list]] = {}
+
+    def __enter__(self) -> "AssetPipeline":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def dest_for(self, src_path: Path) -> Path:
+        if self.converter and src_path.suffix.lower() == ".heic":
+            return self.dest_dir / (src_path.stem + ".jpeg")
+        return self.dest_dir / src_path.name
+
+    def submit(self, src_path: Path) -> Path:
+        """Schedule ``src_path`` for materialisation and return its destination."""
+        dest_path = self.dest_for(src_path)
+        with self._lock:
+            future = self._jobs.get(dest_path)
+            if future is not None:
+                done = future.done() and future.exception() is None
+                return future.result() if done else dest_path
+            self.dest_dir.mkdir(parents=True, exist_ok=True)
+            if self._executor is None:
+                future = Future()
+                self._jobs[dest_path] = future
+            else:
+                future = self._executor.submit(self._process, src_path, dest_path)
+                self._jobs[dest_path] = future
+                return dest_path
+        try:
+            future.set_result(self._process(src_path, dest_path))
+        except BaseException as exc:
+            future.set_exception(exc)
+            return dest_path
+        return future.result()
+
+    def wait(self) -> AssetStats:
+        """Block until every submitted asset is done and return the stats."""
+        with self._lock:
+            futures = list(self._jobs.items())
+        for dest_path, future in futures:
+            exc = future.exception()
+            if exc is not None:
+                print(f"Failed to write asset {dest_path.name}: {exc}")
+        return self.stats
+
+    def close(self) -> None:
+        self.wait()
+        if self._executor is not None:
+            self._executor.shutdown()
+
+    def _process(self, src_path: Path, dest_path: Path) -> Path:
+        """Place one asset; returns the path written, the original's if conversion failed."""
+        try:
+            if dest_path.name != src_path.name:
+                self._convert(src_path, dest_path)
+            else:
+                self._materialise(src_path, dest_path)
+            return dest_path
+        except Exception as exc:
+            with self._lock:
+                self.stats.failed_files += 1
+            if dest_path.name == src_path.name:
+                raise
+            print(f"Failed to convert {src_path.name}, keeping the original: {exc}")
+        # Place the original so the entry can link it instead of the missing output
+        fallback_path = self.dest_dir / src_path.name
+        self._materialise(src_path, fallback_path)
+        with self._lock:
+            self.fallbacks[dest_path.name] = fallback_path.name
+        return fallback_path
+
+    def _convert(self, src_path: Path, dest_path: Path) -> None:
+        # Converters may tell whether an existing output still matches their settings
+        is_current = getattr(self.converter, "is_current", None)
+        if dest_path.exists() and (is_current is None or is_current(src_path, dest_path)):
+            self._count("skipped", dest_path.stat().st_size)
+            return
+        self.converter(src_path, self.dest_dir)
+        self._count("converted", dest_path.stat().st_size)
+
+    def _materialise(self, src_path: Path, dest_path: Path) -> None:
+        src_stat = src_path.stat()
+        size = src_stat.st_size
+        if self._is_current(src_path, src_stat, dest_path):
+            self._count("skipped", size)
+            self._remember(src_path, dest_path, size)
+            return
+
+        # Same content already written under another name: link to it.
+        existing = self._find_duplicate(src_path, size)
+        if existing is not None and try_link(existing, dest_path, self.link_mode):
+            self._count("linked", size)
+        elif try_link(src_path, dest_path, self.link_mode):
+            self._count("linked", size)
+        else:
+            shutil.copy2(src_path, dest_path)
+            self._count("copied", size)
+        self._remember(src_path, dest_path, size)
+
+    def _is_current(self, src_path: Path, src_stat: os.stat_result, dest_path: Path) -> bool:
+        try:
+            dest_stat = dest_path.stat()
+        except FileNotFoundError:
+            return False
+        if dest_stat.st_size == src_stat.st_size and (
+            os.path.samestat(src_stat, dest_stat)
+            or int(dest_stat.st_mtime) == int(src_stat.st_mtime)
+            or file_digest(src_path) == file_digest(dest_path)
+        ):
+            return True
+        # Stale or partially written by an earlier run
+        dest_path.unlink()
+        return False
+
+    def _find_duplicate(self, src_path: Path, size: int) -> Path | None:
+        with self._lock:
+            candidates = list(self._by_size.get(size, ()))
+        if not candidates:
+            return None
+        digest = file_digest(src_path)
+        for entry in candidates:
+            if entry[0] is None:
+                entry[0] = file_digest(entry[1])
+            if entry[0] == digest:
+                return entry[2]
+        return None
+
+    def _remember(self, src_path: Path, dest_path: Path, size: int) -> None:
+        # Digests are computed lazily, only once two assets share a size.
+        with self._lock:
+            self._by_size.setdefault(size, []).append([None, src_path, dest_path])
+
+    def _count(self, kind: str, size: int) -> None:
+        with self._lock:
+            setattr(self.stats, f"{kind}_files", getattr(self.stats, f"{kind}_files") + 1)
+            setattr(self.stats, f"{kind}_bytes", getattr(self.stats, f"{kind}_bytes") + size)
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for the Journal converter.
+
+The parser benchmark feeds the bundled Entries/*.html samples, repeated
+``--scale`` times, through SimpleHTMLToMarkdown. It also replays the recorded
+tag/data events straight into the handlers, which isolates the converter's
+own cost from HTMLParser tokenising:
+
+    python3 bench_converter.py parser --scale 200 --repeat 5
+
+The index benchmark compares reading index.html whole with the streaming
+entry reader on a synthetic index:
+
+    python3 bench_converter.py index --count 50000
+
+The conversion benchmark runs the converter end to end on a synthetic export
+(see synthetic_export.py), serially and with a thread pool, and reports
+entries/s, peak RSS and asset bytes/s for each:
+
+    python3 bench_converter.py convert --entries 2000 --jobs 8
+"""
+import argparse
+import os
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Callable, List
+
+from asset_pipeline import LINK_MODES, format_bytes
+from convert_html_to_markdown import SimpleHTMLToMarkdown, find_entry_links, iter_entry_links
+from synthetic_export import ExportGenerator
+
+ROOT = Path(__file__).resolve().parent
+
+
+def load_sample_bodies(entries_dir: Path) -> List[str]:
+    """Return the <body> payload of every sample entry."""
+    bodies = []
+    for path in sorted(entries_dir.glob("*.html")):
+        content = path.read_text(encoding="utf-8", errors="ignore")
+        body_match = re.search(r"<body[^>]*>(.*)</body>", content, flags=re.IGNORECASE | re.DOTALL)
+        bodies.append(body_match.group(1) if body_match else content)
+    if not bodies:
+        raise SystemExit(f"No sample entries found in {entries_dir}")
+    return bodies
+
+
+class EventRecorder(HTMLParser):
+    """Record the handler calls HTMLParser makes for a document."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.events: List[tuple] = []
+
+    def handle_starttag(self, tag: str, attrs: List[tuple]) -> None:
+        self.events.append(("handle_starttag", tag, attrs))
+
+    def handle_endtag(self, tag: str) -> None:
+        self.events.append(("handle_endtag", tag))
+
+    def handle_data(self, data: str) -> None:
+        self.events.append(("handle_data", data))
+
+
+def time_runs(func: Callable[[], object], repeat: int) -> List[float]:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def report(name: str, timings: List[float], size_bytes: int, units: int, unit_name: str) -> None:
+    best = min(timings)
+    print(
+        f"{name}: best {best * 1000:.1f} ms, median {statistics.median(timings) * 1000:.1f} ms, "
+        f"{size_bytes / best / 1e6:.1f} MB/s, {units / best:,.0f} {unit_name}/s"
+    )
+
+
+def bench_parser(args: argparse.Namespace) -> None:
+    payload = "".join(load_sample_bodies(args.entries)) * args.scale
+    start_tags = payload.count("<") - payload.count("</")
+
+    def run() -> None:
+        parser = SimpleHTMLToMarkdown()
+        parser.feed(payload)
+        parser.close()
+        parser.markdown()
+
+    recorder = EventRecorder()
+    recorder.feed(payload)
+    recorder.close()
+    events = recorder.events
+
+    def replay() -> None:
+        parser = SimpleHTMLToMarkdown()
+        handlers = {name: getattr(parser, name) for name in ("handle_starttag", "handle_endtag", "handle_data")}
+        for name, *event_args in events:
+            handlers[name](*event_args)
+
+    size = len(payload.encode())
+    print(f"Parser input: {len(payload) / 1e6:.1f} MB, ~{start_tags:,} start tags (scale {args.scale})")
+    report("feed + markdown", time_runs(run, args.repeat), size, start_tags, "tags")
+    report("handlers only  ", time_runs(replay, args.repeat), size, start_tags, "tags")
+
+
+def write_synthetic_index(path: Path, count: int) -> None:
+    """Write an index.html in the Journal export layout with ``count`` entries."""
+    with path.open("w", encoding="utf-8") as fh:
+        fh.write("<!DOCTYPE html>\n<html>\n<head>\n    <title>Journal Entries</title>\n</head>\n<body>\n    <ul>\n")
+        for i in range(count):
+            day = f"{2000 + i // 366:04d}-{i % 12 + 1:02d}-{i % 28 + 1:02d}"
+            fh.write(
+                f'        <li><a href="Entries/{day}_Entry_{i}_Tom&amp;Jerry.html">'
+                f"Entry {i} - Tom &amp; Jerry</a></li>\n"
+            )
+        fh.write("    </ul>\n</body>\n</html>\n")
+
+
+def bench_index(args: argparse.Namespace) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        index_path = Path(tmp) / "index.html"
+        write_synthetic_index(index_path, args.count)
+        size = index_path.stat().st_size
+
+        def read_whole() -> None:
+            find_entry_links(index_path.read_text(encoding="utf-8"))
+
+        def stream() -> None:
+            for _ in iter_entry_links(index_path):
+                pass
+
+        def first_entry() -> None:
+            next(iter_entry_links(index_path))
+
+        print(f"Synthetic index: {args.count:,} entries, {size / 1e6:.1f} MB")
+        report("read + find_entry_links", time_runs(read_whole, args.repeat), size, args.count, "entries")
+        report("iter_entry_links       ", time_runs(stream, args.repeat), size, args.count, "entries")
+        first = min(time_runs(first_entry, args.repeat))
+        print(f"iter_entry_links first entry after {first * 1000:.2f} ms")
+
+
+def run_converter(args: List[str]) -> tuple[float, int]:
+    """Run the converter in a child process; returns (seconds, peak RSS in bytes)."""
+    # stderr goes to a file, not a pipe: nothing reads a pipe while we block in
+    # wait4, so a child filling it (~64 KB) would never exit
+    with tempfile.TemporaryFile() as err:
+        start = time.perf_counter()
+        proc = subprocess.Popen(
+            [sys.executable, str(ROOT / "convert_html_to_markdown.py"), *args],
+            stdout=subprocess.DEVNULL,
+            stderr=err,
+        )
+        # wait4 gives this child's own rusage rather than the max over all children
+        _, status, usage = os.wait4(proc.pid, 0)
+        elapsed = time.perf_counter() - start
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        err.seek(0)
+        stderr = err.read().decode(errors="replace")
+    if proc.returncode:
+        raise SystemExit(f"Converter failed ({proc.returncode}):\n{stderr}")
+    # ru_maxrss is in KB on Linux and in bytes on macOS
+    peak_rss = usage.ru_maxrss if sys.platform == "darwin" else usage.ru_maxrss * 1024
+    return elapsed, peak_rss
+
+
+def bench_convert(args: argparse.Namespace) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        export_dir = args.input or Path(tmp) / "export"
+        if args.input is None:
+            stats = ExportGenerator(export_dir, args.seed, args.asset_scale).generate(args.entries)
+            print(
+                f"Synthetic export: {stats.entries:,} entries, {stats.assets:,} assets "
+                f"({format_bytes(stats.asset_bytes)})"
+            )
+        entries = sum(1 for _ in iter_entry_links(export_dir / "index.html"))
+
+        modes = [("serial", 0), ("parallel", args.jobs)]
+        extra = ["--link-mode", args.link_mode] + (["--stream"] if args.stream else [])
+        for name, jobs in modes:
+            timings, peaks, asset_bytes = [], [], 0
+            for _ in range(args.repeat):
+                # Fresh output each run so every asset is written again
+                out_dir = Path(tmp) / "out"
+                shutil.rmtree(out_dir, ignore_errors=True)
+                elapsed, peak_rss = run_converter(["-i", str(export_dir), "-o", str(out_dir), "-j", str(jobs), *extra])
+                timings.append(elapsed)
+                peaks.append(peak_rss)
+                asset_bytes = sum(p.stat().st_size for p in (out_dir / "assets").glob("*"))
+            best = min(timings)
+            print(
+                f"{name:8} (-j {jobs}): best {best:.2f} s, median {statistics.median(timings):.2f} s, "
+                f"{entries / best:,.0f} entries/s, {format_bytes(int(asset_bytes / best))}/s assets, "
+                f"peak RSS {format_bytes(max(peaks))}"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmarks for convert_html_to_markdown.py")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    parser_bench = sub.add_parser("parser", help="Time SimpleHTMLToMarkdown over the sample entries")
+    parser_bench.add_argument("--entries", type=Path, default=ROOT / "Entries", help="Directory of sample entries")
+    parser_bench.add_argument("--scale", type=int, default=200, help="Times to repeat the samples (default: 200)")
+    parser_bench.add_argument("--repeat", type=int, default=5, help="Timed runs (default: 5)")
+    parser_bench.set_defaults(func=bench_parser)
+
+    index_bench = sub.add_parser("index", help="Time entry discovery on a synthetic index.html")
+    index_bench.add_argument("--count", type=int, default=50000, help="Entries in the index (default: 50000)")
+    index_bench.add_argument("--repeat", type=int, default=5, help="Timed runs (default: 5)")
+    index_bench.set_defaults(func=bench_index)
+
+    convert_bench = sub.add_parser("convert", help="Time full conversions of a synthetic export")
+    convert_bench.add_argument("--entries", type=int, default=1000, help="Entries to generate (default: 1000)")
+    convert_bench.add_argument("--seed", type=int, default=0, help="Random seed for the export (default: 0)")
+    convert_bench.add_argument(
+        "--asset-scale", type=float, default=1.0, help="Multiplier for media file sizes (default: 1.0)"
+    )
+    convert_bench.add_argument(
+        "--input", type=Path, default=None, help="Benchmark an existing export instead of generating one"
+    )
+    convert_bench.add_argument(
+        "--jobs", type=int, default=os.cpu_count() or 4, help="Worker threads for the parallel run (default: CPU count)"
+    )
+    convert_bench.add_argument(
+        "--link-mode",
+        choices=LINK_MODES,
+        default="copy",
+        help="Link mode passed to the converter; copy measures real asset I/O (default: copy)",
+    )
+    convert_bench.add_argument("--stream", action="store_true", help="Benchmark the --stream conversion path")
+    convert_bench.add_argument("--repeat", type=int, default=3, help="Timed runs per mode (default: 3)")
+    convert_bench.set_defaults(func=bench_convert)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,12 +5,20 @@ Outputs go to the md/ directory alongside index.html.
 """
 import argparse
 import html
+import io
+import os
 import re
-import shutil
-import subprocess
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
 from html.parser import HTMLParser
 from pathlib import Path
-from typing import Iterable, List
+from typing import Callable, Iterable, Iterator, List, TextIO
+
+from asset_pipeline import LINK_MODES, AssetPipeline
+from heic_convert import BACKENDS, DEFAULT_QUALITY, HeicConverter
+from media_previews import DEFAULT_AUDIO_SECONDS, DEFAULT_PREVIEW_SIZE, MediaPreviewer
+from search_index import DATE_PATTERN, INDEX_FILENAME, SearchIndex
 
 ROOT = Path(__file__).resolve().parent
 
@@ -22,27 +30,83 @@ OUTPUT_ASSETS = OUTPUT_DIR / "assets"
 # Global flag for HEIC conversion (set via command line)
 CONVERT_HEIC_TO_JPEG = False
 
+# UI asset files to skip (not actual content)
+UI_ASSETS_TO_SKIP = {"audioPlayButton.heic", "audioWave.heic"}
+
+# Output layouts: one file per entry, or entries consolidated per month/year
+GROUP_MODES = ("entry", "month", "year")
+
+# Buffer size for consolidated group documents
+GROUP_BUFFER_SIZE = 1024 * 1024
+
+# Start tags handle_starttag acts on (after <br>); everything else is ignored
+HANDLED_TAGS = frozenset({"div", "img", "a", "audio", "video", "source"})
+
+# Div classes that start a skipped UI overlay (workout routes, audio headers, ...)
+UI_SKIP_CLASSES = frozenset({
+    "audioAssetHeader",
+    "gridItemOverlayText",
+    "gridItemOverlayHeader",
+    "gridItemOverlayFooter",
+    "assetType_audio",
+    "activityType",
+    "activityMetrics",
+    "durationText",
+    "assetType_workoutRoute",
+    "assetType_stateOfMind",
+})
+
+_NO_CLASSES: frozenset[str] = frozenset()
+
+# Div transitions with a priority below this still apply while UI content is skipped
+_SKIP_GATE = 3
+
+# Characters read per parser feed in streaming mode
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Invisible Unicode characters removed from the Markdown output
+INVISIBLE_CHARS = re.compile(r'[\u200b\u200c\u200d\ufeff]')
+
+# HEIC converter configured from the command line (created on first use otherwise)
+HEIC_CONVERTER: HeicConverter | None = None
+
+# Audio/video preview generator (set via --media-previews)
+MEDIA_PREVIEWS: MediaPreviewer | None = None
+
+# <source> tags the parser makes previews for, by media kind
+PREVIEW_SOURCE_PATTERNS = {
+    "audio": r'<audio[^>]*>\s*<source[^>]+src="([^"]+)"',
+    "video": r'<div[^>]+class="[^"]*assetType_video[^"]*"[^>]*>\s*<video[^>]*>\s*<source[^>]+src="([^"]+)"',
+}
+
 
 def convert_heic_to_jpeg(src_path: Path, dest_dir: Path) -> Path:
-    """Convert a HEIC file to JPEG using macOS sips command."""
-    jpeg_name = src_path.stem + ".jpeg"
-    dest_path = dest_dir / jpeg_name
-    if not dest_path.exists():
-        subprocess.run(
-            ["sips", "-s", "format", "jpeg", str(src_path), "--out", str(dest_path)],
-            capture_output=True,
-            check=True,
-        )
-    return dest_path
+    """Convert a HEIC file to JPEG with the configured backend (Pillow or sips)."""
+    global HEIC_CONVERTER
+    if HEIC_CONVERTER is None:
+        HEIC_CONVERTER = HeicConverter()
+    dest_path = dest_dir / (src_path.stem + ".jpeg")
+    if dest_path.exists() and HEIC_CONVERTER.is_current(src_path, dest_path):
+        return dest_path
+    return HEIC_CONVERTER(src_path, dest_dir)
 
 
 class SimpleHTMLToMarkdown(HTMLParser):
-    def __init__(self, image_map: dict | None = None) -> None:
+    def __init__(
+        self,
+        image_map: dict | None = None,
+        asset_resolver: Callable[[str], str | None] | None = None,
+        preview_resolver: Callable[[str, str], str | None] | None = None,
+    ) -> None:
         super().__init__()
         self._parts: List[str] = []
         self._in_page_header = False
         self.heading_added = False
         self._image_map = image_map or {}
+        # Maps asset srcs missing from image_map on demand (streaming mode)
+        self._asset_resolver = asset_resolver
+        # Maps an audio/video src and its kind to a lightweight preview, if any
+        self._preview_resolver = preview_resolver
         self._skip_until_div_close = False
         self._in_link = False
         self._link_url = ""
@@ -55,71 +119,74 @@ class SimpleHTMLToMarkdown(HTMLParser):
         self._in_video_asset = False
         self._video_src = ""
         self._in_drawing_asset = False
+        # Kinds of media emitted so far: photo, drawing, audio, video
+        self.asset_types: set[str] = set()
 
     def handle_starttag(self, tag: str, attrs: List[tuple]) -> None:
         if tag == "br":
             self._add("\n")
             return
 
-        # Skip UI overlay elements from Apple Journal (with depth tracking)
-        if tag == "div" and (self._has_class(attrs, "audioAssetHeader") or 
-                             self._has_class(attrs, "gridItemOverlayText") or
-                             self._has_class(attrs, "gridItemOverlayHeader") or
-                             self._has_class(attrs, "gridItemOverlayFooter") or
-                             self._has_class(attrs, "assetType_audio") or
-                             self._has_class(attrs, "activityType") or
-                             self._has_class(attrs, "activityMetrics") or
-                             self._has_class(attrs, "durationText") or
-                             self._has_class(attrs, "assetType_workoutRoute") or
-                             self._has_class(attrs, "assetType_stateOfMind")):
-            self._skip_ui_content = True
-            self._ui_skip_depth = 1
+        if tag not in HANDLED_TAGS:
             return
 
-        # Track photo assets to include their images
-        if tag == "div" and self._has_class(attrs, "assetType_photo"):
-            self._in_photo_asset = True
-            return
-
-        # Track video assets to extract video source
-        if tag == "div" and self._has_class(attrs, "assetType_video"):
-            self._in_video_asset = True
+        # Parse attributes once: first value per name, and the class names
+        attr_map: dict[str, str | None] = {}
+        classes: frozenset[str] | set[str] = _NO_CLASSES
+        for key, value in attrs:
+            if key == "class":
+                if value:
+                    classes = classes.union(value.split())
+            elif key not in attr_map:
+                attr_map[key] = value
+
+        if tag == "div":
+            matched = self._DIV_CLASSES.intersection(classes)
+            if matched:
+                priority, transition = min(self._DIV_TRANSITIONS[name] for name in matched)
+                # Photo/video tracking and UI skipping apply even inside skipped content
+                if priority < _SKIP_GATE or not self._skip_ui_content:
+                    transition(self)
+                    return
+            if self._skip_ui_content:
+                self._ui_skip_depth += 1
             return
 
         if self._skip_ui_content:
-            if tag == "div":
-                self._ui_skip_depth += 1
             return
 
         if tag == "img":
-            src = self._attr_value(attrs, "src")
+            src = attr_map.get("src") or ""
             if not src:
                 return
+            is_asset_image = "asset_image" in classes
             # Include photos from assetType_photo divs
-            if self._in_photo_asset and self._has_class(attrs, "asset_image"):
-                alt = self._attr_value(attrs, "alt") or "Photo"
-                dest = self._image_map.get(src, src)
+            if self._in_photo_asset and is_asset_image:
+                alt = attr_map.get("alt") or "Photo"
+                dest = self._asset_dest(src)
+                self.asset_types.add("photo")
                 self._ensure_newline()
                 self._add(f"![{alt}]({dest})\n")
                 return
             # Include drawings from assetType_drawing divs
-            if self._in_drawing_asset and self._has_class(attrs, "asset_image"):
-                alt = self._attr_value(attrs, "alt") or "Drawing"
-                dest = self._image_map.get(src, src)
+            if self._in_drawing_asset and is_asset_image:
+                alt = attr_map.get("alt") or "Drawing"
+                dest = self._asset_dest(src)
+                self.asset_types.add("drawing")
                 self._ensure_newline()
                 self._add(f"![{alt}]({dest})\n")
                 return
             # Skip other asset_image class images (UI elements)
-            if self._has_class(attrs, "asset_image"):
+            if is_asset_image:
                 return
-            alt = self._attr_value(attrs, "alt")
+            alt = attr_map.get("alt") or ""
             dest = self._image_map.get(src, src)
             self._ensure_newline()
             self._add(f"![{alt}]({dest})\n")
             return
 
         if tag == "a":
-            href = self._attr_value(attrs, "href")
+            href = attr_map.get("href")
             if href:
                 self._in_link = True
                 self._link_url = html.unescape(href)
@@ -140,19 +207,44 @@ class SimpleHTMLToMarkdown(HTMLParser):
             return
 
         if tag == "source":
-            src = self._attr_value(attrs, "src")
+            src = attr_map.get("src")
             if self._in_audio and src:
                 self._audio_src = src
             elif self._in_video_asset and src:
                 self._video_src = src
             return
 
-        if tag == "div" and self._has_class(attrs, "assetType_drawing"):
-            self._in_drawing_asset = True
-            return
+    # Div state transitions, looked up by class name
+
+    def _enter_ui_skip(self) -> None:
+        # Skip UI overlay elements from Apple Journal (with depth tracking)
+        self._skip_ui_content = True
+        self._ui_skip_depth = 1
+
+    def _enter_photo_asset(self) -> None:
+        # Track photo assets to include their images
+        self._in_photo_asset = True
+
+    def _enter_video_asset(self) -> None:
+        # Track video assets to extract video source
+        self._in_video_asset = True
 
-        if tag == "div" and self._has_class(attrs, "pageHeader"):
-            self._in_page_header = True
+    def _enter_drawing_asset(self) -> None:
+        self._in_drawing_asset = True
+
+    def _enter_page_header(self) -> None:
+        self._in_page_header = True
+
+    # class name -> (priority, transition); the lowest priority wins when a div
+    # carries several of these classes, as in the original if-chain.
+    _DIV_TRANSITIONS = {
+        **dict.fromkeys(UI_SKIP_CLASSES, (0, _enter_ui_skip)),
+        "assetType_photo": (1, _enter_photo_asset),
+        "assetType_video": (2, _enter_video_asset),
+        "assetType_drawing": (3, _enter_drawing_asset),
+        "pageHeader": (4, _enter_page_header),
+    }
+    _DIV_CLASSES = frozenset(_DIV_TRANSITIONS)
 
     def handle_endtag(self, tag: str) -> None:
         # Exit UI skip mode with depth tracking
@@ -176,9 +268,14 @@ class SimpleHTMLToMarkdown(HTMLParser):
 
         if tag == "audio" and self._in_audio:
             if self._audio_src:
-                dest = self._image_map.get(self._audio_src, self._audio_src)
+                dest = self._asset_dest(self._audio_src)
                 filename = Path(self._audio_src).name
-                self._add(f"🎙️ [Audio: {filename}]({dest})")
+                self.asset_types.add("audio")
+                preview = self._preview_dest(self._audio_src, "audio")
+                if preview:
+                    self._add(f"🎙️ [Audio: {filename}]({preview}) ([original]({dest}))")
+                else:
+                    self._add(f"🎙️ [Audio: {filename}]({dest})")
             else:
                 self._add("[Audio Recording]")
             self._ensure_newline()
@@ -188,10 +285,16 @@ class SimpleHTMLToMarkdown(HTMLParser):
 
         if tag == "video":
             if self._in_video_asset and self._video_src:
-                dest = self._image_map.get(self._video_src, self._video_src)
+                dest = self._asset_dest(self._video_src)
                 filename = Path(self._video_src).name
+                self.asset_types.add("video")
                 self._ensure_newline()
-                self._add(f"🎬 [Video: {filename}]({dest})\n")
+                preview = self._preview_dest(self._video_src, "video")
+                if preview:
+                    # Poster frame linking to the original video
+                    self._add(f"🎬 [![Video: {filename}]({preview})]({dest})\n")
+                else:
+                    self._add(f"🎬 [Video: {filename}]({dest})\n")
                 self._video_src = ""
             elif self._skip_ui_content:
                 self._ui_skip_depth -= 1
@@ -242,20 +345,18 @@ class SimpleHTMLToMarkdown(HTMLParser):
         else:
             self._add_text(text.strip())
 
-    def _has_class(self, attrs: List[tuple], name: str) -> bool:
-        for key, value in attrs:
-            if key != "class" or not value:
-                continue
-            classes = value.split()
-            if name in classes:
-                return True
-        return False
+    def _asset_dest(self, src: str) -> str:
+        dest = self._image_map.get(src)
+        if dest is None and self._asset_resolver is not None:
+            dest = self._asset_resolver(src)
+            if dest is not None:
+                self._image_map[src] = dest
+        return dest or src
 
-    def _attr_value(self, attrs: List[tuple], name: str) -> str:
-        for key, value in attrs:
-            if key == name:
-                return value or ""
-        return ""
+    def _preview_dest(self, src: str, kind: str) -> str | None:
+        if self._preview_resolver is None:
+            return None
+        return self._preview_resolver(src, kind)
 
     def _add(self, chunk: str) -> None:
         self._parts.append(chunk)
@@ -276,10 +377,24 @@ class SimpleHTMLToMarkdown(HTMLParser):
         if not self._parts[-1].endswith("\n"):
             self._add("\n")
 
+    def drain(self, final: bool = False) -> str:
+        """Return and release the text emitted so far (streaming mode).
+
+        The last part is kept back unless ``final`` because spacing and newline
+        decisions look at it.
+        """
+        keep = 0 if final else 1
+        if len(self._parts) <= keep:
+            return ""
+        cut = len(self._parts) - keep
+        text = "".join(self._parts[:cut])
+        del self._parts[:cut]
+        return text
+
     def markdown(self) -> str:
         raw = "​".join(self._parts)
         # Remove zero-width spaces and other invisible Unicode characters
-        raw = re.sub(r'[\u200b\u200c\u200d\ufeff]', '', raw)
+        raw = INVISIBLE_CHARS.sub('', raw)
         lines: List[str] = []
         for line in raw.splitlines():
             stripped = line.rstrip()
@@ -293,34 +408,346 @@ class SimpleHTMLToMarkdown(HTMLParser):
         return cleaned + ("\n" if cleaned else "")
 
 
+ENTRY_HREF = re.compile(r'href="([^"]+)"')
+
+# Chars read per step when scanning index.html
+INDEX_CHUNK_SIZE = 256 * 1024
+
+
+def _unique_entries(raw_hrefs: Iterable[str], seen: set[str]) -> Iterator[str]:
+    """Decode hrefs and yield new Entries/ links, preserving order."""
+    for raw in raw_hrefs:
+        href = html.unescape(raw)
+        if href.startswith("Entries/") and href not in seen:
+            seen.add(href)
+            yield href
+
+
 def find_entry_links(index_html: str) -> List[str]:
-    hrefs = re.findall(r'href="([^"]+)"', index_html)
-    entries = []
-    for href in hrefs:
-        decoded = html.unescape(href)
-        if decoded.startswith("Entries/"):
-            entries.append(decoded)
-    # Preserve order, remove duplicates
-    seen = set()
-    unique: List[str] = []
-    for href in entries:
-        if href in seen:
-            continue
-        seen.add(href)
-        unique.append(href)
-    return unique
+    hrefs = (match.group(1) for match in ENTRY_HREF.finditer(index_html))
+    return list(_unique_entries(hrefs, set()))
+
+
+def iter_entry_links(index_path: Path, chunk_size: int = INDEX_CHUNK_SIZE) -> Iterator[str]:
+    """Yield entry links from index.html while it is being read.
+
+    The file is scanned in chunks so the first entries can be converted
+    before a very large index has been read in full.
+    """
+    seen: set[str] = set()
+    marker = 'href="'
+    carry = ""
+    with index_path.open(encoding="utf-8") as fh:
+        for chunk in iter(lambda: fh.read(chunk_size), ""):
+            buffer = carry + chunk
+            end = 0
+            hrefs = []
+            for match in ENTRY_HREF.finditer(buffer):
+                hrefs.append(match.group(1))
+                end = match.end()
+            yield from _unique_entries(hrefs, seen)
+            # Keep a possibly unfinished href="..." for the next chunk
+            tail = buffer[end:]
+            start = tail.rfind(marker)
+            carry = tail[start:] if start >= 0 else tail[-(len(marker) - 1):]
+
+
+def _resolve_local_asset(html_path: Path, src: str) -> Path | None:
+    """Resolve an entry-relative asset src to a file inside INPUT_DIR."""
+    src_path = (html_path.parent / src).resolve()
+    try:
+        src_path.relative_to(INPUT_DIR)
+    except ValueError:
+        return None
+    if not src_path.exists() or not src_path.is_file():
+        return None
+    return src_path
+
+
+class MarkdownStreamWriter:
+    """Write Markdown text to a file line by line, cleaning it as it goes.
+
+    Applies the same clean-up as ``SimpleHTMLToMarkdown.markdown()`` (invisible
+    characters removed, trailing whitespace stripped, runs of blank lines
+    collapsed, leading/trailing blank lines dropped) without holding the
+    document in memory. The entry heading follows ``render_entry``: when the
+    entry has a page header (``page_heading``) a ``# `` first line gets
+    ``heading_suffix`` appended; otherwise ``# fallback_heading`` goes first.
+    """
+
+    def __init__(
+        self,
+        out: TextIO,
+        heading_suffix: str = "",
+        fallback_heading: str = "",
+        heading_level: int = 1,
+        page_heading: bool = False,
+    ) -> None:
+        self._out = out
+        self._heading_suffix = heading_suffix
+        self._fallback_heading = fallback_heading
+        self._page_heading = page_heading
+        self._heading_marker = "#" * heading_level + " "
+        self._pending = ""
+        self._started = False
+        self._blank_pending = False
+        # Heading text of the written entry, known once the first line is out
+        self.heading = fallback_heading
+
+    def write(self, text: str) -> None:
+        text = INVISIBLE_CHARS.sub("", text)
+        if not text:
+            return
+        lines = (self._pending + text).splitlines(keepends=True)
+        tail = lines[-1]
+        # Keep an unterminated last line (or a lone "\r" of a split "\r\n") for later
+        if tail.endswith("\r") or tail.splitlines()[0] == tail:
+            self._pending = lines.pop()
+        else:
+            self._pending = ""
+        for line in lines:
+            self._emit_line(line.splitlines()[0])
+
+    def close(self) -> None:
+        if self._pending:
+            self._emit_line(self._pending.splitlines()[0])
+            self._pending = ""
+        if not self._started:
+            self._out.write(f"{self._heading_marker}{self._fallback_heading}\n")
+            self._started = True
+        else:
+            self._out.write("\n")
+
+    def _emit_line(self, line: str) -> None:
+        line = line.rstrip()
+        if not line:
+            if self._started:
+                self._blank_pending = True
+            return
+        if not self._started:
+            line = line.lstrip()
+            if not self._page_heading:
+                self._out.write(f"{self._heading_marker}{self._fallback_heading}\n\n")
+            elif line.startswith("# "):
+                if self._heading_suffix:
+                    line = f"{line} - {self._heading_suffix}"
+                self.heading = line[2:]
+                line = self._heading_marker + self.heading
+            self._out.write(line)
+            self._started = True
+            return
+        self._out.write("\n\n" if self._blank_pending else "\n")
+        self._blank_pending = False
+        self._out.write(line)
+
+
+@dataclass
+class ConvertedEntry:
+    """What a conversion produced, for indexing and reporting."""
+
+    source: Path
+    output: Path
+    heading: str
+    asset_types: frozenset[str]
+    # Markdown of the entry when it was kept in memory anyway
+    markdown: str | None = None
+
+
+class GroupedOutput:
+    """Consolidated output: entries appended to one document per month or year.
+
+    Each group file gets a title and every entry an HTML anchor named after
+    its source file (e.g. ``2026-01.md#2026-01-15_heading``). Group files are
+    written through large buffers and at most ``max_open`` stay open at once.
+    Files live in the output directory, so ``assets/...`` links still resolve.
+    """
+
+    def __init__(self, output_dir: Path, group_by: str, max_open: int = 32) -> None:
+        if group_by not in GROUP_MODES[1:]:
+            raise ValueError(f"Unknown group mode: {group_by}")
+        self.output_dir = output_dir
+        self.group_by = group_by
+        self.max_open = max_open
+        self.entries = 0
+        self._open: OrderedDict[str, TextIO] = OrderedDict()
+        self._started: set[str] = set()
+
+    def group_key(self, html_path: Path) -> str:
+        date_match = DATE_PATTERN.match(html_path.stem)
+        if not date_match:
+            return "undated"
+        date = date_match.group(1)
+        return date[:7] if self.group_by == "month" else date[:4]
+
+    def path_for(self, key: str) -> Path:
+        return self.output_dir / f"{key}.md"
+
+    def start_entry(self, html_path: Path) -> tuple[TextIO, Path, str]:
+        """Write the entry anchor and return (handle, group path, anchor)."""
+        key = self.group_key(html_path)
+        out = self._handle(key)
+        anchor = re.sub(r"[^\w-]+", "-", html_path.stem).strip("-").lower()
+        out.write(f'\n<a id="{anchor}"></a>\n')
+        self.entries += 1
+        return out, self.path_for(key), anchor
+
+    @property
+    def files(self) -> int:
+        return len(self._started)
+
+    def close(self) -> None:
+        while self._open:
+            self._open.popitem(last=False)[1].close()
+
+    def _handle(self, key: str) -> TextIO:
+        out = self._open.get(key)
+        if out is not None:
+            self._open.move_to_end(key)
+            return out
+        if len(self._open) >= self.max_open:
+            self._open.popitem(last=False)[1].close()
+        path = self.path_for(key)
+        if key in self._started:
+            out = path.open("a", encoding="utf-8", buffering=GROUP_BUFFER_SIZE)
+        else:
+            out = path.open("w", encoding="utf-8", buffering=GROUP_BUFFER_SIZE)
+            out.write(f"# {self._title(key)}\n")
+            self._started.add(key)
+        self._open[key] = out
+        return out
+
+    def _title(self, key: str) -> str:
+        if key == "undated":
+            return "Undated"
+        if self.group_by == "month":
+            return datetime.strptime(key, "%Y-%m").strftime("%B %Y")
+        return key
+
+
+class _TeeWriter:
+    """Minimal text sink that writes to several outputs."""
+
+    def __init__(self, *outputs: TextIO) -> None:
+        self._outputs = outputs
+
+    def write(self, text: str) -> int:
+        for out in self._outputs:
+            out.write(text)
+        return len(text)
+
+
+def _entry_headings(html_path: Path) -> tuple[str, str]:
+    """Return (heading suffix, fallback heading) derived from the entry filename."""
+    # Extract heading suffix from filename (e.g., "2026-01-15_Heading" -> "Heading")
+    filename_stem = html_path.stem
+    heading_suffix = ""
+    if "_" in filename_stem:
+        # Get everything after the first underscore as the suffix
+        heading_suffix = filename_stem.split("_", 1)[1].replace("_", " ")
+    return heading_suffix, filename_stem.replace("_", " ")
+
+
+def _default_assets() -> AssetPipeline:
+    # Library callers without a pipeline get the original inline copy behaviour
+    return AssetPipeline(
+        OUTPUT_ASSETS,
+        link_mode="copy",
+        converter=convert_heic_to_jpeg if CONVERT_HEIC_TO_JPEG else None,
+    )
+
+
+def _asset_resolver(html_path: Path, assets: AssetPipeline) -> Callable[[str], str | None]:
+    """Build a callable mapping an asset src to its Markdown link target."""
+
+    def resolve(src: str) -> str | None:
+        if src.startswith("http://") or src.startswith("https://"):
+            return src
+        src_path = _resolve_local_asset(html_path, src)
+        # Skip missing files and UI asset files
+        if src_path is None or src_path.name in UI_ASSETS_TO_SKIP:
+            return None
+        dest_path = assets.submit(src_path)
+        return f"assets/{dest_path.name}"
+
+    return resolve
+
+
+def _preview_resolver(html_path: Path) -> Callable[[str, str], str | None] | None:
+    """Build a callable mapping an audio/video src to its preview link, if previews are on.
+
+    The link is written before ffmpeg has run; ``relink_failed_previews``
+    points it back at the original if the preview could not be made.
+    """
+    if MEDIA_PREVIEWS is None:
+        return None
+
+    def resolve(src: str, kind: str) -> str | None:
+        src_path = _resolve_local_asset(html_path, src)
+        if src_path is None:
+            return None
+        return f"assets/{MEDIA_PREVIEWS.submit(src_path, kind).name}"
+
+    return resolve
+
+
+def _rewrite_lines(paths: Iterable[Path], substitute: Callable[[str], str]) -> int:
+    """Apply ``substitute`` to every line of the given Markdown files; returns how many changed."""
+    changed = 0
+    for path in paths:
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        modified = False
+        # Line by line, so month/year documents are never held in memory whole
+        with path.open(encoding="utf-8", newline="") as src, tmp_path.open("w", encoding="utf-8", newline="") as out:
+            for line in src:
+                new_line = substitute(line)
+                modified = modified or new_line != line
+                out.write(new_line)
+        if modified:
+            os.replace(tmp_path, path)
+            changed += 1
+        else:
+            tmp_path.unlink()
+    return changed
+
+
+def relink_failed_assets(paths: Iterable[Path], fallbacks: dict[str, str]) -> int:
+    """Repoint links to assets whose conversion failed at the originals placed instead.
+
+    ``fallbacks`` maps link names to original names (``AssetPipeline.fallbacks``).
+    Returns the number of files changed.
+    """
+    if not fallbacks:
+        return 0
+    pattern = re.compile(r"\(assets/(" + "|".join(re.escape(name) for name in sorted(fallbacks)) + r")\)")
+    return _rewrite_lines(paths, lambda line: pattern.sub(lambda m: f"(assets/{fallbacks[m.group(1)]})", line))
+
+
+def relink_failed_previews(paths: Iterable[Path], failed: Iterable[str]) -> int:
+    """Rewrite audio/video entries whose preview could not be made to link only the original.
 
+    The result matches the output without ``--media-previews``. Returns the
+    number of files changed.
+    """
+    names = "|".join(re.escape(name) for name in sorted(failed))
+    if not names:
+        return 0
+    video = re.compile(rf"🎬 \[!\[(Video: [^\]]*)\]\(assets/(?:{names})\)\]\(([^)]*)\)")
+    audio = re.compile(rf"🎙️ \[(Audio: [^\]]*)\]\(assets/(?:{names})\) \(\[original\]\(([^)]*)\)\)")
+    return _rewrite_lines(paths, lambda line: audio.sub(r"🎙️ [\1](\2)", video.sub(r"🎬 [\1](\2)", line)))
 
-def convert_file(html_path: Path, out_path: Path) -> None:
+
+def render_entry(html_path: Path, assets: AssetPipeline | None = None) -> tuple[str, str, frozenset[str]]:
+    """Convert one entry to Markdown in memory.
+
+    Returns (markdown, heading, media types). Assets are handed to ``assets``;
+    without a pipeline they are copied inline.
+    """
     content = html_path.read_text(encoding="utf-8", errors="ignore")
 
     # Only parse inside <body> ... </body> to avoid style/script noise.
     body_match = re.search(r"<body[^>]*>(.*)</body>", content, flags=re.IGNORECASE | re.DOTALL)
     payload = body_match.group(1) if body_match else content
 
-    # UI asset files to skip (not actual content)
-    UI_ASSETS_TO_SKIP = {"audioPlayButton.heic", "audioWave.heic"}
-
     # Find images that are inside assetType_photo divs (actual photos to include)
     photo_pattern = r'<div[^>]+class="[^"]*assetType_photo[^"]*"[^>]*>.*?<img[^>]+src="([^"]+)"[^>]*>'
     photo_srcs = set(html.unescape(m) for m in re.findall(photo_pattern, payload, flags=re.IGNORECASE | re.DOTALL))
@@ -332,71 +759,31 @@ def convert_file(html_path: Path, out_path: Path) -> None:
     # Combine photo and drawing sources
     content_srcs = photo_srcs | drawing_srcs
 
-    image_map: dict[str, str] = {}
-    # Process photo and drawing images (skip workout routes, state of mind, etc.)
-    for src in content_srcs:
-        if src.startswith("http://") or src.startswith("https://"):
-            image_map[src] = src
-            continue
-
-        src_path = (html_path.parent / src).resolve()
-        try:
-            src_path.relative_to(INPUT_DIR)
-        except ValueError:
-            continue
-        if not src_path.exists() or not src_path.is_file():
-            continue
-
-        # Skip UI asset files
-        if src_path.name in UI_ASSETS_TO_SKIP:
-            continue
-
-        OUTPUT_ASSETS.mkdir(parents=True, exist_ok=True)
-        
-        # Convert HEIC to JPEG if flag is set
-        if CONVERT_HEIC_TO_JPEG and src_path.suffix.lower() == ".heic":
-            dest_path = convert_heic_to_jpeg(src_path, OUTPUT_ASSETS)
-        else:
-            dest_path = OUTPUT_ASSETS / src_path.name
-            if not dest_path.exists():
-                shutil.copy2(src_path, dest_path)
-        image_map[src] = f"assets/{dest_path.name}"
-
     # Handle audio files from <source> tags
     audio_srcs = re.findall(r"<source[^>]+src=\"([^\"]+)\"[^>]*>", payload, flags=re.IGNORECASE)
-    for raw_src in audio_srcs:
-        src = html.unescape(raw_src)
-        if src.startswith("http://") or src.startswith("https://"):
-            image_map[src] = src
-            continue
 
-        src_path = (html_path.parent / src).resolve()
-        try:
-            src_path.relative_to(INPUT_DIR)
-        except ValueError:
-            continue
-        if not src_path.exists() or not src_path.is_file():
-            continue
+    # Start audio/video previews now so ffmpeg runs on the pool while the entry is parsed
+    if MEDIA_PREVIEWS is not None:
+        for kind, pattern in PREVIEW_SOURCE_PATTERNS.items():
+            for raw_src in re.findall(pattern, payload, flags=re.IGNORECASE | re.DOTALL):
+                src_path = _resolve_local_asset(html_path, html.unescape(raw_src))
+                if src_path is not None:
+                    MEDIA_PREVIEWS.submit(src_path, kind)
 
-        OUTPUT_ASSETS.mkdir(parents=True, exist_ok=True)
-        dest_path = OUTPUT_ASSETS / src_path.name
-        if not dest_path.exists():
-            shutil.copy2(src_path, dest_path)
-        image_map[src] = f"assets/{dest_path.name}"
+    resolve = _asset_resolver(html_path, assets or _default_assets())
+    image_map: dict[str, str] = {}
+    # Process photo and drawing images (skip workout routes, state of mind, etc.)
+    for src in content_srcs | {html.unescape(raw_src) for raw_src in audio_srcs}:
+        dest = resolve(src)
+        if dest is not None:
+            image_map[src] = dest
 
-    parser = SimpleHTMLToMarkdown(image_map=image_map)
+    parser = SimpleHTMLToMarkdown(image_map=image_map, preview_resolver=_preview_resolver(html_path))
     parser.feed(payload)
     md = parser.markdown()
 
-    # Extract heading suffix from filename (e.g., "2026-01-15_Heading" -> "Heading")
-    filename_stem = html_path.stem
-    heading_suffix = ""
-    if "_" in filename_stem:
-        # Get everything after the first underscore as the suffix
-        heading_suffix = filename_stem.split("_", 1)[1].replace("_", " ")
-
+    heading_suffix, heading = _entry_headings(html_path)
     if not parser.heading_added:
-        heading = filename_stem.replace("_", " ")
         if md:
             md = f"# {heading}\n\n{md}"
         else:
@@ -409,11 +796,168 @@ def convert_file(html_path: Path, out_path: Path) -> None:
             lines[0] = f"{lines[0]} - {heading_suffix}"
             md = "\n".join(lines)
 
+    first_line = md.split("\n", 1)[0]
+    if first_line.startswith("# "):
+        heading = first_line[2:]
+    return md, heading, frozenset(parser.asset_types)
+
+
+def convert_file(html_path: Path, out_path: Path, assets: AssetPipeline | None = None) -> ConvertedEntry:
+    """Convert one entry to a Markdown file."""
+    md, heading, asset_types = render_entry(html_path, assets)
     out_path.write_text(md, encoding="utf-8")
+    return ConvertedEntry(html_path, out_path, heading, asset_types, md)
+
+
+BODY_OPEN = re.compile(r"<body[^>]*>", re.IGNORECASE)
+BODY_CLOSE = re.compile(r"</body>", re.IGNORECASE)
+
+
+def _body_span(html_path: Path, chunk_size: int = STREAM_CHUNK_SIZE) -> tuple[int, int] | None:
+    """Character offsets of what ``render_entry`` parses: after ``<body ...>`` up to the last ``</body>``.
+
+    Scans the file in chunks; None when there is no such span, in which case
+    the whole document is parsed.
+    """
+    start = end = None
+    carry, offset = "", 0
+    with html_path.open(encoding="utf-8", errors="ignore") as src:
+        for chunk in iter(lambda: src.read(chunk_size), ""):
+            data = carry + chunk
+            keep = max(0, len(data) - 6)
+            if start is None:
+                match = BODY_OPEN.search(data)
+                if match is None:
+                    # Hold back a <body tag whose ">" has not been read yet
+                    partial = data.lower().rfind("<body")
+                    keep = partial if partial >= 0 else keep
+                else:
+                    start = offset + match.end()
+            if start is not None:
+                for match in BODY_CLOSE.finditer(data, max(0, start - offset)):
+                    end = offset + match.start()
+                # Six characters can't hold a whole "</body>", so no close is found twice
+                keep = max(keep, start - offset)
+            carry, offset = data[keep:], offset + keep
+    if start is None or end is None:
+        return None
+    return start, end
+
+
+def _payload_chunks(html_path: Path, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[str]:
+    """Yield the text ``render_entry`` would parse, in chunks."""
+    span = _body_span(html_path, chunk_size)
+    with html_path.open(encoding="utf-8", errors="ignore") as src:
+        if span is None:
+            yield from iter(lambda: src.read(chunk_size), "")
+            return
+        start, end = span
+        while start > 0:
+            start -= len(src.read(min(chunk_size, start)))
+        remaining = end - span[0]
+        while remaining > 0:
+            chunk = src.read(min(chunk_size, remaining))
+            if not chunk:
+                return
+            remaining -= len(chunk)
+            yield chunk
+
+
+def _parser_feeds(chunks: Iterable[str]) -> Iterator[str]:
+    """Re-cut chunks at their last "<" so text runs are never split across parser feeds."""
+    carry = ""
+    for chunk in chunks:
+        data = carry + chunk
+        cut = data.rfind("<")
+        if cut <= 0:
+            carry = data
+            continue
+        carry = data[cut:]
+        yield data[:cut]
+    yield carry
+
+
+def _has_page_heading(html_path: Path, chunk_size: int = STREAM_CHUNK_SIZE) -> bool:
+    """Whether the entry has a page header heading, parsing only until one is found."""
+    parser = SimpleHTMLToMarkdown()
+    for data in _parser_feeds(_payload_chunks(html_path, chunk_size)):
+        parser.feed(data)
+        parser.drain()
+        if parser.heading_added:
+            return True
+    parser.close()
+    return parser.heading_added
+
+
+def stream_entry(
+    html_path: Path,
+    out: TextIO,
+    assets: AssetPipeline | None = None,
+    chunk_size: int = STREAM_CHUNK_SIZE,
+    heading_level: int = 1,
+) -> tuple[str, frozenset[str]]:
+    """Convert one entry to Markdown on ``out`` with bounded memory.
+
+    The entry is fed to the parser in chunks and Markdown lines are written
+    as soon as they are complete. Assets are resolved as the parser meets
+    them instead of by a pre-scan of the whole document. The output matches
+    ``render_entry``: the same ``<body>`` span is parsed, and a first pass
+    (stopping at the page header) settles the heading before anything is
+    written. Returns (heading, media types).
+    """
+    heading_suffix, heading = _entry_headings(html_path)
+    parser = SimpleHTMLToMarkdown(
+        asset_resolver=_asset_resolver(html_path, assets or _default_assets()),
+        preview_resolver=_preview_resolver(html_path),
+    )
+    writer = MarkdownStreamWriter(out, heading_suffix, heading, heading_level,
+                                  page_heading=_has_page_heading(html_path, chunk_size))
+    for data in _parser_feeds(_payload_chunks(html_path, chunk_size)):
+        parser.feed(data)
+        writer.write(parser.drain())
+    parser.close()
+    writer.write(parser.drain(final=True))
+    writer.close()
+    return writer.heading, frozenset(parser.asset_types)
+
+
+def stream_convert_file(
+    html_path: Path,
+    out_path: Path,
+    assets: AssetPipeline | None = None,
+    chunk_size: int = STREAM_CHUNK_SIZE,
+) -> ConvertedEntry:
+    """Convert one entry to a Markdown file with bounded memory."""
+    with out_path.open("w", encoding="utf-8") as out:
+        heading, asset_types = stream_entry(html_path, out, assets, chunk_size)
+    return ConvertedEntry(html_path, out_path, heading, asset_types)
+
+
+def convert_into_group(
+    html_path: Path,
+    grouped: GroupedOutput,
+    assets: AssetPipeline | None = None,
+    stream: bool = False,
+    keep_markdown: bool = False,
+) -> ConvertedEntry:
+    """Append one entry to its month/year document, with its heading one level down."""
+    out, group_path, _ = grouped.start_entry(html_path)
+    if not stream:
+        md, heading, asset_types = render_entry(html_path, assets)
+        if md.startswith("# "):
+            md = "#" + md
+        out.write(md)
+        return ConvertedEntry(html_path, group_path, heading, asset_types, md)
+
+    capture = io.StringIO() if keep_markdown else None
+    target = _TeeWriter(out, capture) if capture is not None else out
+    heading, asset_types = stream_entry(html_path, target, assets, heading_level=2)
+    md = capture.getvalue() if capture is not None else None
+    return ConvertedEntry(html_path, group_path, heading, asset_types, md)
 
 
 def main() -> None:
-    global CONVERT_HEIC_TO_JPEG, INPUT_DIR, OUTPUT_DIR, OUTPUT_ASSETS
+    global CONVERT_HEIC_TO_JPEG, HEIC_CONVERTER, MEDIA_PREVIEWS, INPUT_DIR, OUTPUT_DIR, OUTPUT_ASSETS
     
     parser = argparse.ArgumentParser(
         description="Convert Apple Journal HTML exports to Markdown."
@@ -421,7 +965,82 @@ def main() -> None:
     parser.add_argument(
         "--convert-heic",
         action="store_true",
-        help="Convert HEIC images to JPEG format (requires macOS sips command)",
+        help="Convert HEIC images to JPEG format (uses Pillow + pillow-heif, or macOS sips)",
+    )
+    parser.add_argument(
+        "--heic-backend",
+        choices=BACKENDS,
+        default="auto",
+        help="HEIC conversion backend: auto prefers Pillow + pillow-heif, then sips (default: auto)",
+    )
+    parser.add_argument(
+        "--jpeg-quality",
+        type=int,
+        default=DEFAULT_QUALITY,
+        help=f"JPEG quality for converted HEIC images, 1-100 (default: {DEFAULT_QUALITY})",
+    )
+    parser.add_argument(
+        "--max-dimension",
+        type=int,
+        default=None,
+        help="Downscale converted images so the longest side is at most this many pixels",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        default=None,
+        help="Directory for cached conversion results (default: .cache/ in output directory)",
+    )
+    parser.add_argument(
+        "--jobs", "-j",
+        type=int,
+        default=os.cpu_count() or 4,
+        help="Number of worker threads for copying/converting assets; 0 runs inline (default: CPU count)",
+    )
+    parser.add_argument(
+        "--link-mode",
+        choices=LINK_MODES,
+        default="auto",
+        help="How assets reach md/assets: auto tries reflink, then hardlink, then copy (default: auto)",
+    )
+    parser.add_argument(
+        "--media-previews",
+        action="store_true",
+        help="Add a poster frame for each video and a short low-bitrate clip for each audio recording (needs ffmpeg)",
+    )
+    parser.add_argument(
+        "--preview-size",
+        type=int,
+        default=DEFAULT_PREVIEW_SIZE,
+        help=f"Longest side of video poster frames in pixels (default: {DEFAULT_PREVIEW_SIZE})",
+    )
+    parser.add_argument(
+        "--audio-preview-seconds",
+        type=int,
+        default=DEFAULT_AUDIO_SECONDS,
+        help=f"Length of audio preview clips in seconds (default: {DEFAULT_AUDIO_SECONDS})",
+    )
+    parser.add_argument(
+        "--preview-jobs",
+        type=int,
+        default=2,
+        help="Number of ffmpeg processes run at once for media previews (default: 2)",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Stream each entry through the parser in chunks (bounded memory for very large entries)",
+    )
+    parser.add_argument(
+        "--group-by",
+        choices=GROUP_MODES,
+        default="entry",
+        help="Write one Markdown file per entry, or consolidate entries per month/year (default: entry)",
+    )
+    parser.add_argument(
+        "--search-index",
+        action="store_true",
+        help=f"Build/update a full-text search index ({INDEX_FILENAME} in output directory); query it with search_index.py",
     )
     parser.add_argument(
         "--input", "-i",
@@ -457,20 +1076,88 @@ def main() -> None:
         raise SystemExit(f"index.html not found in {INPUT_DIR}")
 
     OUTPUT_DIR.mkdir(exist_ok=True)
+    cache_dir = args.cache_dir.resolve() if args.cache_dir else OUTPUT_DIR / ".cache"
 
-    index_html = index_path.read_text(encoding="utf-8")
-    links = find_entry_links(index_html)
-    if not links:
+    if CONVERT_HEIC_TO_JPEG:
+        try:
+            HEIC_CONVERTER = HeicConverter(
+                backend=args.heic_backend,
+                quality=args.jpeg_quality,
+                max_dimension=args.max_dimension,
+                workers=args.jobs or None,
+                cache_dir=cache_dir,
+                link_mode=args.link_mode,
+            )
+        except (RuntimeError, ValueError) as exc:
+            raise SystemExit(str(exc))
+
+    if args.media_previews:
+        try:
+            MEDIA_PREVIEWS = MediaPreviewer(
+                OUTPUT_ASSETS,
+                cache_dir,
+                jobs=args.preview_jobs,
+                max_dimension=args.preview_size,
+                audio_seconds=args.audio_preview_seconds,
+                link_mode=args.link_mode,
+            )
+        except RuntimeError as exc:
+            raise SystemExit(str(exc))
+
+    assets = AssetPipeline(
+        OUTPUT_ASSETS,
+        jobs=args.jobs,
+        link_mode=args.link_mode,
+        converter=HEIC_CONVERTER,
+    )
+    index = SearchIndex(OUTPUT_DIR / INDEX_FILENAME) if args.search_index else None
+    grouped = GroupedOutput(OUTPUT_DIR, args.group_by) if args.group_by != "entry" else None
+    found = 0
+    outputs: dict[Path, None] = {}
+    with assets:
+        # Entries are converted as soon as they are found in index.html
+        for rel_href in iter_entry_links(index_path):
+            found += 1
+            source_path = INPUT_DIR / rel_href
+            if not source_path.exists():
+                print(f"Skipping missing file: {rel_href}")
+                continue
+            if grouped is not None:
+                entry = convert_into_group(
+                    source_path, grouped, assets, stream=args.stream, keep_markdown=index is not None
+                )
+            elif args.stream:
+                entry = stream_convert_file(source_path, OUTPUT_DIR / (source_path.stem + ".md"), assets)
+            else:
+                entry = convert_file(source_path, OUTPUT_DIR / (source_path.stem + ".md"), assets)
+            if index is not None:
+                index.update(
+                    rel_href, entry.source, entry.output, entry.heading, entry.asset_types, entry.markdown
+                )
+            outputs[entry.output] = None
+            print(f"Converted {rel_href} -> {entry.output}")
+    if grouped is not None:
+        grouped.close()
+        print(f"Wrote {grouped.entries} entries into {grouped.files} {args.group_by} files")
+    # Entries may have been written before a background conversion failed
+    relinked = relink_failed_assets(outputs, assets.fallbacks)
+    if relinked:
+        print(f"Linked the originals in {relinked} file(s) for {len(assets.fallbacks)} failed conversion(s)")
+    if not found:
         raise SystemExit("No entry links found in index.html")
-
-    for rel_href in links:
-        source_path = INPUT_DIR / rel_href
-        if not source_path.exists():
-            print(f"Skipping missing file: {rel_href}")
-            continue
-        dest_path = OUTPUT_DIR / (source_path.stem + ".md")
-        convert_file(source_path, dest_path)
-        print(f"Converted {rel_href} -> {dest_path}")
+    if index is not None:
+        pruned = index.prune()
+        index.close()
+        print(f"Search index: {index.updated} updated, {index.unchanged} unchanged, {pruned} removed")
+    if HEIC_CONVERTER is not None:
+        HEIC_CONVERTER.close()
+    print(assets.stats.summary())
+    if MEDIA_PREVIEWS is not None:
+        MEDIA_PREVIEWS.close()
+        print(MEDIA_PREVIEWS.stats.summary())
+        relinked = relink_failed_previews(outputs, MEDIA_PREVIEWS.failed)
+        if relinked:
+            print(f"Linked the originals in {relinked} file(s) for {len(MEDIA_PREVIEWS.failed)} failed preview(s)")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+HEIC to JPEG conversion backends for the Journal converter.
+
+Two backends are available:
+- pillow: Pillow with the pillow-heif plugin, runs in a process pool on any platform
+- sips:   the macOS ``sips`` command
+
+Converted images are cached by source content hash and conversion settings,
+so repeated exports only convert new photos.
+"""
+import hashlib
+import os
+import shutil
+import subprocess
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Tuple
+
+from asset_pipeline import file_digest, link_or_copy
+
+BACKENDS = ("auto", "pillow", "sips")
+
+DEFAULT_QUALITY = 90
+
+
+def _register_heif_opener() -> None:
+    import pillow_heif
+
+    pillow_heif.register_heif_opener()
+
+
+def _pillow_convert(src_path: str, dest_path: str, quality: int, max_dimension: int | None) -> None:
+    """Process-pool worker: decode a HEIC file and write it as JPEG."""
+    from PIL import Image, ImageOps
+
+    with Image.open(src_path) as image:
+        image = ImageOps.exif_transpose(image)
+        if max_dimension:
+            image.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
+        if image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        image.save(dest_path, "JPEG", quality=quality, optimize=True, exif=image.getexif())
+
+
+class PillowBackend:
+    name = "pillow"
+
+    def __init__(self, workers: int | None = None) -> None:
+        self._workers = workers
+        self._pool: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def available() -> bool:
+        try:
+            import pillow_heif  # noqa: F401
+            from PIL import Image  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    def convert(self, src_path: Path, dest_path: Path, quality: int, max_dimension: int | None) -> None:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self._workers, initializer=_register_heif_opener
+                )
+        future = self._pool.submit(_pillow_convert, str(src_path), str(dest_path), quality, max_dimension)
+        future.result()
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+
+class SipsBackend:
+    name = "sips"
+
+    @staticmethod
+    def available() -> bool:
+        return shutil.which("sips") is not None
+
+    def convert(self, src_path: Path, dest_path: Path, quality: int, max_dimension: int | None) -> None:
+        cmd = ["sips", "-s", "format", "jpeg", "-s", "formatOptions", str(quality)]
+        if max_dimension:
+            cmd += ["-Z", str(max_dimension)]
+        cmd += [str(src_path), "--out", str(dest_path)]
+        subprocess.run(cmd, capture_output=True, check=True)
+
+    def close(self) -> None:
+        pass
+
+
+def select_backend(name: str = "auto", workers: int | None = None) -> PillowBackend | SipsBackend:
+    """Pick a conversion backend; ``auto`` prefers Pillow, then sips."""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown HEIC backend: {name}")
+    if name in ("auto", "pillow") and PillowBackend.available():
+        return PillowBackend(workers)
+    if name in ("auto", "sips") and SipsBackend.available():
+        return SipsBackend()
+    if name == "pillow":
+        raise RuntimeError("The pillow backend needs Pillow and pillow-heif (pip install pillow pillow-heif)")
+    if name == "sips":
+        raise RuntimeError("The sips backend needs the macOS sips command")
+    raise RuntimeError("No HEIC converter available: install Pillow and pillow-heif, or run on macOS")
+
+
+class HeicConverter:
+    """Convert HEIC files to JPEG in a destination directory, with a result cache.
+
+    Instances are callables matching the ``AssetPipeline`` converter signature.
+    Without ``cache_dir`` an existing output is always considered current.
+    """
+
+    def __init__(
+        self,
+        backend: str = "auto",
+        quality: int = DEFAULT_QUALITY,
+        max_dimension: int | None = None,
+        workers: int | None = None,
+        cache_dir: Path | None = None,
+        link_mode: str = "auto",
+    ) -> None:
+        if not 1 <= quality <= 100:
+            raise ValueError("JPEG quality must be between 1 and 100")
+        self.backend = select_backend(backend, workers)
+        self.quality = quality
+        self.max_dimension = max_dimension
+        self.cache_dir = cache_dir
+        self.link_mode = link_mode
+        self._digests: Dict[Tuple[Path, int, int], str] = {}
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "HeicConverter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __call__(self, src_path: Path, dest_dir: Path) -> Path:
+        dest_path = dest_dir / (src_path.stem + ".jpeg")
+        cached = self._cache_path(src_path)
+        if cached is None:
+            self._convert_atomic(src_path, dest_path)
+            return dest_path
+
+        if not cached.exists():
+            cached.parent.mkdir(parents=True, exist_ok=True)
+            self._convert_atomic(src_path, cached)
+        if dest_path.exists():
+            dest_path.unlink()
+        link_or_copy(cached, dest_path, self.link_mode)
+        return dest_path
+
+    def is_current(self, src_path: Path, dest_path: Path) -> bool:
+        cached = self._cache_path(src_path)
+        if cached is None:
+            return True
+        try:
+            cached_stat, dest_stat = cached.stat(), dest_path.stat()
+        except FileNotFoundError:
+            return False
+        # Every way of placing the cached file (link, reflink, copy2) keeps its mtime
+        return cached_stat.st_size == dest_stat.st_size and int(cached_stat.st_mtime) == int(dest_stat.st_mtime)
+
+    def close(self) -> None:
+        self.backend.close()
+
+    def _cache_path(self, src_path: Path) -> Path | None:
+        if self.cache_dir is None:
+            return None
+        stat = src_path.stat()
+        key = (src_path, stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            digest = self._digests.get(key)
+        if digest is None:
+            digest = file_digest(src_path)
+            with self._lock:
+                self._digests[key] = digest
+        settings = hashlib.sha256(
+            f"{self.backend.name}:{self.quality}:{self.max_dimension}".encode()
+        ).hexdigest()[:8]
+        return self.cache_dir / "heic" / digest[:2] / f"{digest}-{settings}.jpeg"
+
+    def _convert_atomic(self, src_path: Path, dest_path: Path) -> None:
+        tmp_path = dest_path.with_name(f".{dest_path.stem}.{os.getpid()}.{threading.get_ident()}.jpeg")
+        try:
+            self.backend.convert(src_path, tmp_path, self.quality, self.max_dimension)
+            os.replace(tmp_path, dest_path)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
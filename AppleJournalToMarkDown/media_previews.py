@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Lightweight previews for Journal audio and video assets.
+
+Videos get a size-capped JPEG poster frame and audio recordings a short,
+low-bitrate mono clip, both made with ``ffmpeg`` on a bounded worker pool.
+Previews are cached by source content hash and settings, then linked or
+copied into md/assets next to the originals. Links to a preview are written
+before it exists; names of previews that could not be made are collected in
+``MediaPreviewer.failed`` so the caller can point those links back at the
+original.
+"""
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Set
+
+from asset_pipeline import file_digest, format_bytes, link_or_copy
+
+# Suffix of the preview file for each media kind
+PREVIEW_SUFFIXES = {"video": ".preview.jpeg", "audio": ".preview.m4a"}
+
+DEFAULT_PREVIEW_SIZE = 640
+DEFAULT_AUDIO_SECONDS = 30
+DEFAULT_AUDIO_BITRATE = "48k"
+
+# Source digests from the last run, keyed by path, size and mtime, in cache_dir/media
+DIGESTS_FILENAME = "digests.json"
+
+
+@dataclass
+class PreviewStats:
+    created: int = 0
+    cached: int = 0
+    failed: int = 0
+    original_bytes: int = 0
+    preview_bytes: int = 0
+
+    def summary(self) -> str:
+        return (
+            f"Media previews: {self.created} created, {self.cached} from cache, {self.failed} failed "
+            f"({format_bytes(self.original_bytes)} of originals -> {format_bytes(self.preview_bytes)} of previews)"
+        )
+
+
+class MediaPreviewer:
+    """Create previews for audio/video assets in ``dest_dir`` on a worker pool.
+
+    ``submit`` returns the preview path straight away; the ffmpeg run happens
+    in the background. Call ``close`` to wait for all previews, after which
+    ``failed`` holds the names of the previews that could not be made.
+    """
+
+    def __init__(
+        self,
+        dest_dir: Path,
+        cache_dir: Path,
+        jobs: int = 2,
+        max_dimension: int = DEFAULT_PREVIEW_SIZE,
+        audio_seconds: int = DEFAULT_AUDIO_SECONDS,
+        audio_bitrate: str = DEFAULT_AUDIO_BITRATE,
+        link_mode: str = "auto",
+    ) -> None:
+        if not self.available():
+            raise RuntimeError("Media previews need ffmpeg on PATH")
+        self.dest_dir = dest_dir
+        self.cache_dir = cache_dir
+        self.max_dimension = max_dimension
+        self.audio_seconds = audio_seconds
+        self.audio_bitrate = audio_bitrate
+        self.link_mode = link_mode
+        self.stats = PreviewStats()
+        self.failed: Set[str] = set()
+        self._executor = ThreadPoolExecutor(max_workers=max(1, jobs))
+        self._lock = threading.Lock()
+        self._jobs: Dict[Path, Future] = {}
+        # Digests used this run, and those saved by the previous one
+        self._digests: Dict[str, str] = {}
+        self._known_digests = self._load_digests()
+
+    @staticmethod
+    def available() -> bool:
+        return shutil.which("ffmpeg") is not None
+
+    def __enter__(self) -> "MediaPreviewer":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def dest_for(self, src_path: Path, kind: str) -> Path:
+        return self.dest_dir / (src_path.stem + PREVIEW_SUFFIXES[kind])
+
+    def submit(self, src_path: Path, kind: str) -> Path:
+        """Schedule a preview of ``src_path`` (``"audio"`` or ``"video"``) and return its path."""
+        dest_path = self.dest_for(src_path, kind)
+        with self._lock:
+            if dest_path not in self._jobs:
+                self.dest_dir.mkdir(parents=True, exist_ok=True)
+                self._jobs[dest_path] = self._executor.submit(self._process, src_path, dest_path, kind)
+        return dest_path
+
+    def close(self) -> None:
+        with self._lock:
+            futures = list(self._jobs.items())
+        for dest_path, future in futures:
+            exc = future.exception()
+            if exc is not None:
+                print(f"Failed to create preview {dest_path.name}: {exc}")
+        self._executor.shutdown()
+        self._save_digests()
+
+    def _process(self, src_path: Path, dest_path: Path, kind: str) -> None:
+        try:
+            cached = self._cache_path(src_path, kind)
+            if cached.exists():
+                counter = "cached"
+            else:
+                cached.parent.mkdir(parents=True, exist_ok=True)
+                self._transcode(src_path, cached, kind)
+                counter = "created"
+            if dest_path.exists():
+                dest_path.unlink()
+            link_or_copy(cached, dest_path, self.link_mode)
+        except Exception:
+            with self._lock:
+                self.stats.failed += 1
+                self.failed.add(dest_path.name)
+            raise
+        with self._lock:
+            setattr(self.stats, counter, getattr(self.stats, counter) + 1)
+            self.stats.original_bytes += src_path.stat().st_size
+            self.stats.preview_bytes += cached.stat().st_size
+
+    def _digest_file(self) -> Path:
+        return self.cache_dir / "media" / DIGESTS_FILENAME
+
+    def _load_digests(self) -> Dict[str, str]:
+        try:
+            return json.loads(self._digest_file().read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+
+    def _save_digests(self) -> None:
+        # Only this run's sources, so entries for deleted media don't pile up
+        path = self._digest_file()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{os.getpid()}.{path.name}")
+        tmp_path.write_text(json.dumps(self._digests), encoding="utf-8")
+        os.replace(tmp_path, path)
+
+    def _cache_path(self, src_path: Path, kind: str) -> Path:
+        # An unchanged source keeps its digest, so cached previews don't re-read whole videos
+        stat = src_path.stat()
+        key = f"{src_path.absolute()}:{stat.st_size}:{stat.st_mtime_ns}"
+        with self._lock:
+            digest = self._digests.get(key) or self._known_digests.get(key)
+        if digest is None:
+            digest = file_digest(src_path)
+        with self._lock:
+            self._digests[key] = digest
+        settings = hashlib.sha256(
+            f"{kind}:{self.max_dimension}:{self.audio_seconds}:{self.audio_bitrate}".encode()
+        ).hexdigest()[:8]
+        return self.cache_dir / "media" / digest[:2] / f"{digest}-{settings}{PREVIEW_SUFFIXES[kind]}"
+
+    def _command(self, src_path: Path, out_path: Path, kind: str) -> List[str]:
+        cmd = ["ffmpeg", "-v", "error", "-y", "-i", str(src_path)]
+        if kind == "video":
+            size = self.max_dimension
+            # Pick a representative frame, scale it to fit within size x size
+            scale = f"scale=w='min(iw,{size})':h='min(ih,{size})':force_original_aspect_ratio=decrease"
+            cmd += ["-vf", f"thumbnail,{scale}", "-frames:v", "1", "-q:v", "4"]
+        else:
+            cmd += ["-vn", "-t", str(self.audio_seconds), "-ac", "1", "-c:a", "aac", "-b:a", self.audio_bitrate]
+        return cmd + [str(out_path)]
+
+    def _transcode(self, src_path: Path, out_path: Path, kind: str) -> None:
+        # Temp name keeps the real extension so ffmpeg picks the right muxer
+        tmp_path = out_path.with_name(f".{os.getpid()}.{threading.get_ident()}.{out_path.name}")
+        try:
+            subprocess.run(self._command(src_path, tmp_path, kind), capture_output=True, check=True)
+            os.replace(tmp_path, out_path)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Full-text search over converted Journal entries.
+
+With ``--search-index`` the converter records every entry's date, heading,
+media types and Markdown text in a SQLite FTS5 database next to the output.
+Entries whose source HTML is unchanged since the last run are left alone,
+and entries no longer in the export are dropped.
+
+Query it from the command line:
+
+    python3 search_index.py "beach sunset"
+    python3 search_index.py "trip OR holiday" --type photo --since 2025-01-01
+    python3 search_index.py --type video --index /path/to/md/search.sqlite
+"""
+import argparse
+import re
+import sqlite3
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, List
+
+ROOT = Path(__file__).resolve().parent
+
+INDEX_FILENAME = "search.sqlite"
+
+ASSET_TYPES = ("photo", "drawing", "audio", "video")
+
+# Entry filenames start with their date, e.g. "2026-01-15_Heading.html"
+DATE_PATTERN = re.compile(r"^(\d{4}-\d{2}-\d{2})")
+
+# Markdown links and images, indexed by their text only
+MARKDOWN_LINK = re.compile(r"!?\[([^\]]*)\]\([^)]*\)")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL UNIQUE,
+    output TEXT NOT NULL,
+    entry_date TEXT,
+    heading TEXT NOT NULL,
+    source_mtime_ns INTEGER NOT NULL,
+    source_size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_by_date ON entries (entry_date);
+CREATE TABLE IF NOT EXISTS entry_assets (
+    entry_id INTEGER NOT NULL REFERENCES entries (id) ON DELETE CASCADE,
+    asset_type TEXT NOT NULL,
+    PRIMARY KEY (asset_type, entry_id)
+) WITHOUT ROWID;
+CREATE VIRTUAL TABLE IF NOT EXISTS entries_fts USING fts5(
+    heading, body, tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+
+@dataclass
+class SearchHit:
+    entry_date: str | None
+    heading: str
+    output: str
+    snippet: str
+
+
+class SearchIndex:
+    """SQLite FTS5 index of converted entries, updated incrementally."""
+
+    def __init__(self, db_path: Path) -> None:
+        self.db_path = db_path
+        self.updated = 0
+        self.unchanged = 0
+        self._seen: set[str] = set()
+        self._conn = sqlite3.connect(db_path)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = NORMAL")
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        self._conn.executescript(SCHEMA)
+
+    def __enter__(self) -> "SearchIndex":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def update(
+        self,
+        source_key: str,
+        source_path: Path,
+        output_path: Path,
+        heading: str,
+        asset_types: Iterable[str],
+        markdown: str | None = None,
+    ) -> bool:
+        """Index one converted entry; returns False if it was already current.
+
+        ``markdown`` is the entry text; it is read from ``output_path`` if omitted.
+        """
+        self._seen.add(source_key)
+        stat = source_path.stat()
+        row = self._conn.execute(
+            "SELECT id, output, source_mtime_ns, source_size FROM entries WHERE source = ?",
+            (source_key,),
+        ).fetchone()
+        if row is not None and row[1:] == (str(output_path), stat.st_mtime_ns, stat.st_size):
+            self.unchanged += 1
+            return False
+
+        if markdown is None:
+            markdown = output_path.read_text(encoding="utf-8")
+        # Twice, so linked images like [![alt](poster)](video) reduce to their text
+        body = MARKDOWN_LINK.sub(r"\1", MARKDOWN_LINK.sub(r"\1", markdown))
+        date_match = DATE_PATTERN.match(source_path.stem)
+        entry_date = date_match.group(1) if date_match else None
+        values = (str(output_path), entry_date, heading, stat.st_mtime_ns, stat.st_size)
+        if row is None:
+            entry_id = self._conn.execute(
+                "INSERT INTO entries (output, entry_date, heading, source_mtime_ns, source_size, source) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                values + (source_key,),
+            ).lastrowid
+        else:
+            entry_id = row[0]
+            self._conn.execute(
+                "UPDATE entries SET output = ?, entry_date = ?, heading = ?, source_mtime_ns = ?, "
+                "source_size = ? WHERE id = ?",
+                values + (entry_id,),
+            )
+            self._conn.execute("DELETE FROM entries_fts WHERE rowid = ?", (entry_id,))
+            self._conn.execute("DELETE FROM entry_assets WHERE entry_id = ?", (entry_id,))
+        self._conn.execute(
+            "INSERT INTO entries_fts (rowid, heading, body) VALUES (?, ?, ?)",
+            (entry_id, heading, body),
+        )
+        self._conn.executemany(
+            "INSERT INTO entry_assets (entry_id, asset_type) VALUES (?, ?)",
+            [(entry_id, asset_type) for asset_type in sorted(set(asset_types))],
+        )
+        self.updated += 1
+        return True
+
+    def prune(self) -> int:
+        """Drop entries not passed to ``update`` since the index was opened.
+
+        Call once every entry of the export has been indexed. Output files are
+        not a reliable signal: with grouped output a removed entry's month or
+        year file usually still exists.
+        """
+        stale = [
+            (entry_id,)
+            for entry_id, source in self._conn.execute("SELECT id, source FROM entries")
+            if source not in self._seen
+        ]
+        self._conn.executemany("DELETE FROM entries_fts WHERE rowid = ?", stale)
+        self._conn.executemany("DELETE FROM entries WHERE id = ?", stale)
+        return len(stale)
+
+    def search(
+        self,
+        query: str = "",
+        asset_type: str | None = None,
+        since: str | None = None,
+        until: str | None = None,
+        limit: int = 20,
+    ) -> List[SearchHit]:
+        """Search entries; with an empty query, list matching entries newest first."""
+        conditions: List[str] = []
+        params: List[object] = []
+        if query:
+            conditions.append("entries_fts MATCH ?")
+            params.append(query)
+        if asset_type:
+            conditions.append(
+                "e.id IN (SELECT entry_id FROM entry_assets WHERE asset_type = ?)"
+            )
+            params.append(asset_type)
+        if since:
+            conditions.append("e.entry_date >= ?")
+            params.append(since)
+        if until:
+            conditions.append("e.entry_date <= ?")
+            params.append(until)
+        where = " AND ".join(conditions) or "1"
+        order = "bm25(entries_fts)" if query else "e.entry_date DESC"
+        sql = (
+            "SELECT e.entry_date, e.heading, e.output, "
+            "snippet(entries_fts, 1, '[', ']', '…', 12) "
+            "FROM entries_fts JOIN entries e ON e.id = entries_fts.rowid "
+            f"WHERE {where} ORDER BY {order} LIMIT ?"
+        )
+        params.append(limit)
+        return [SearchHit(*row) for row in self._conn.execute(sql, params)]
+
+    def close(self) -> None:
+        self._conn.commit()
+        self._conn.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Search converted Journal entries.")
+    parser.add_argument(
+        "query",
+        nargs="?",
+        default="",
+        help='FTS5 query, e.g. "beach sunset", "trip OR holiday", "run*" (omit to list entries)',
+    )
+    parser.add_argument(
+        "--index",
+        type=Path,
+        default=ROOT / "md" / INDEX_FILENAME,
+        help=f"Path to the search index (default: md/{INDEX_FILENAME} next to this script)",
+    )
+    parser.add_argument("--type", choices=ASSET_TYPES, help="Only entries containing this kind of media")
+    parser.add_argument("--since", help="Only entries on or after this date (YYYY-MM-DD)")
+    parser.add_argument("--until", help="Only entries on or before this date (YYYY-MM-DD)")
+    parser.add_argument("--limit", type=int, default=20, help="Maximum number of results (default: 20)")
+    args = parser.parse_args()
+
+    if not args.index.exists():
+        raise SystemExit(f"Search index not found: {args.index} (run the converter with --search-index)")
+
+    with SearchIndex(args.index) as index:
+        start = time.perf_counter()
+        try:
+            hits = index.search(args.query, args.type, args.since, args.until, args.limit)
+        except sqlite3.OperationalError as exc:
+            raise SystemExit(f"Invalid query: {exc}")
+        elapsed = (time.perf_counter() - start) * 1000
+
+    for hit in hits:
+        print(f"{hit.entry_date or '----------'}  {hit.heading}")
+        print(f"    {hit.output}")
+        if args.query:
+            print(f"    {' '.join(hit.snippet.split())}")
+    print(f"{len(hits)} result(s) in {elapsed:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Generate synthetic Apple Journal HTML exports for benchmarking.
+
+The export has the same layout as a real one (index.html, Entries/,
+Resources/) and entries use the same markup: a pageHeader date, an assetGrid
+of assetType_photo / assetType_video / assetType_audio (with its
+audioAssetHeader) items, a title, body paragraphs and anchored
+assetType_drawing attachments. Media files are random bytes of realistic
+sizes, so they exercise the asset pipeline but are not decodable.
+
+    python3 synthetic_export.py /tmp/journal --entries 1000 --seed 1
+"""
+import argparse
+import random
+import uuid
+from dataclasses import dataclass
+from datetime import date, timedelta
+from pathlib import Path
+
+# Typical file size per asset kind in KB, scaled by --asset-scale
+ASSET_SIZES_KB = {"photo": 400, "video": 2048, "audio": 256, "drawing": 8}
+
+WORDS = (
+    "morning walk coffee friends river quiet rain long day work garden dinner "
+    "music train city park read book evening sunset beach call family run "
+    "tired happy plan trip weekend market bread notes idea project light"
+).split()
+
+ENTRY_HEAD = """<!DOCTYPE html PUBLIC "-//W3C//DTD HTML 4.01//EN" "http://www.w3.org/TR/html4/strict.dtd">
+<html dir="auto">
+<head>
+<meta http-equiv="Content-Type" content="text/html; charset=UTF-8">
+<title></title>
+<style type="text/css">
+p.p1 {margin: 0.0px 0.0px 0.0px 0.0px}
+p.p2 {margin: 10.0px 0.0px 0.0px 0.0px; font: 14.0px '.AppleSystemUIFont'; color: #000000}
+div.pageHeader { font-weight: bold; font-size: 12pt; margin-bottom: 10pt; }
+div.assetGrid { display: grid; grid-template-columns: repeat(4, minmax(0, 1fr)); gap: 4pt; }
+</style>
+</head>
+<body>
+"""
+
+PHOTO_ITEM = """    <div id="{id}" class="gridItem assetType_photo " >
+        <img src="../Resources/{id}.heic" class="asset_image"/>
+    </div>"""
+
+VIDEO_ITEM = """    <div id="{id}" class="gridItem assetType_video " >
+            <video class="asset_video" controls>
+      <source src="../Resources/{id}.MOV" type="video/mp4">
+      Your browser does not support the video tag.<no loc>
+    </video>
+        <div class="durationText">0:{seconds:02d}</div>
+    </div>"""
+
+AUDIO_ITEM = """    <div id="{id}" class="gridItem assetType_audio " >
+            <div class="gridItemOverlayText audioAssetHeader">
+        <img src="../Resources/audioPlayButton.heic" class="audioPlayButton" />    <div class="audioDuration">00:{seconds:02d}</div>
+    </div>
+    <img src="../Resources/audioWave.heic" class="asset_image" />
+    <audio controls>
+      <source src="../Resources/{id}.m4a">
+      Your browser does not support the audio element.<no loc>
+    </audio>
+    </div>"""
+
+DRAWING_ITEM = """<p class="p1"><span class="s1">    <div class="anchoredAttachment center" style="width:100%;aspect-ratio:100/100;">    <div id="{id}" class="gridItem assetType_drawing asset_drawing" >
+        <img src="../Resources/{id}.heic" class="asset_image"/>
+    </div></div></span></p>"""
+
+ASSET_SUFFIXES = {"photo": ".heic", "video": ".MOV", "audio": ".m4a", "drawing": ".heic"}
+
+
+@dataclass
+class ExportStats:
+    entries: int = 0
+    assets: int = 0
+    asset_bytes: int = 0
+
+
+class ExportGenerator:
+    """Write a synthetic export with deterministic content for a given seed."""
+
+    def __init__(self, root: Path, seed: int = 0, asset_scale: float = 1.0) -> None:
+        self.root = root
+        self.rng = random.Random(seed)
+        self.asset_scale = asset_scale
+        self.stats = ExportStats()
+        self.entries_dir = root / "Entries"
+        self.resources_dir = root / "Resources"
+
+    def generate(self, count: int, start: date = date(2020, 1, 1)) -> ExportStats:
+        self.entries_dir.mkdir(parents=True, exist_ok=True)
+        self.resources_dir.mkdir(parents=True, exist_ok=True)
+        # UI images the converter must skip
+        for name in ("audioPlayButton.heic", "audioWave.heic"):
+            (self.resources_dir / name).write_bytes(self.rng.randbytes(1024))
+
+        links = []
+        for i in range(count):
+            day = start + timedelta(days=i * 3 // 2)
+            heading = self._sentence(2, 5) if i % 4 else ""
+            stem = f"{day.isoformat()}_{heading.replace(' ', '_')}" if heading else day.isoformat()
+            stem = f"{stem}_{i}"
+            title = f"{day.strftime('%A, %d %B %Y')}" + (f" - {heading}" if heading else "")
+            (self.entries_dir / f"{stem}.html").write_text(self._entry(day, heading), encoding="utf-8")
+            links.append(f'        <li><a href="Entries/{stem}.html">{title}</a></li>\n')
+            self.stats.entries += 1
+
+        (self.root / "index.html").write_text(
+            "<!DOCTYPE html>\n<html>\n<head>\n    <title>Journal Entries</title>\n</head>\n<body>\n    <ul>\n"
+            + "".join(reversed(links))
+            + "    </ul>\n</body>\n</html>\n",
+            encoding="utf-8",
+        )
+        return self.stats
+
+    def _entry(self, day: date, heading: str) -> str:
+        rng = self.rng
+        grid = [PHOTO_ITEM.format(id=self._asset("photo")) for _ in range(rng.randint(0, 4))]
+        if rng.random() < 0.3:
+            grid.append(VIDEO_ITEM.format(id=self._asset("video"), seconds=rng.randint(1, 59)))
+        if rng.random() < 0.3:
+            grid.append(AUDIO_ITEM.format(id=self._asset("audio"), seconds=rng.randint(1, 59)))
+        rng.shuffle(grid)
+
+        parts = [
+            ENTRY_HEAD,
+            "<p class=\"p1\"><span class=\"s1\"><div class='pageContainer'>",
+            f'    <div class="pageHeader">{day.strftime("%A, %d %B %Y")}</div>',
+        ]
+        if grid:
+            parts.append('    <div class="assetGrid">' + "".join(grid) + "</div>")
+        if heading:
+            parts.append(f"<div class='title'>{heading} </div>")
+        parts.append("<div class='bodyText'></span></p>\n")
+        for _ in range(rng.randint(2, 8)):
+            parts.append(f'<p class="p2"><span class="s2">{self._sentence(8, 40)}</span></p>\n')
+            if rng.random() < 0.05:
+                parts.append(DRAWING_ITEM.format(id=self._asset("drawing")) + "\n")
+        parts.append('<p class="p1"><span class="s1"></div></div></span></p>\n</body>\n</html>\n')
+        return "".join(parts)
+
+    def _asset(self, kind: str) -> str:
+        asset_id = str(uuid.UUID(int=self.rng.getrandbits(128), version=4)).upper()
+        size = int(ASSET_SIZES_KB[kind] * 1024 * self.asset_scale * self.rng.uniform(0.5, 1.5))
+        (self.resources_dir / f"{asset_id}{ASSET_SUFFIXES[kind]}").write_bytes(self.rng.randbytes(size))
+        self.stats.assets += 1
+        self.stats.asset_bytes += size
+        return asset_id
+
+    def _sentence(self, low: int, high: int) -> str:
+        words = self.rng.choices(WORDS, k=self.rng.randint(low, high))
+        return " ".join(words).capitalize()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate a synthetic Apple Journal HTML export.")
+    parser.add_argument("output", type=Path, help="Directory to create the export in")
+    parser.add_argument("--entries", type=int, default=1000, help="Number of entries (default: 1000)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+    parser.add_argument(
+        "--asset-scale",
+        type=float,
+        default=1.0,
+        help="Multiplier for media file sizes; 0 writes empty files (default: 1.0)",
+    )
+    args = parser.parse_args()
+
+    if (args.output / "index.html").exists():
+        raise SystemExit(f"{args.output} already contains an export")
+    stats = ExportGenerator(args.output, args.seed, args.asset_scale).generate(args.entries)
+    print(
+        f"Wrote {stats.entries} entries and {stats.assets} assets "
+        f"({stats.asset_bytes / 1e6:.1f} MB) to {args.output}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+"""
+AMFI Scheme Master Index
+
+Parses the AMFI scheme master once into compact arrays with hash indexes:
+- ISIN -> scheme (growth and reinvestment ISINs both map to the scheme)
+- scheme code -> scheme name / category
+- fuzzy scheme name -> scheme, via a character-trigram index
+
+Accepted inputs are the AMFI scheme master CSV (data/amfi_scheme_master.csv,
+from "Download Scheme Data" on amfiindia.com) and the daily NAVAll.txt file.
+The parsed index is saved next to the source as a .npz binary cache and
+reused until the source file changes, so resolving thousands of holdings
+is a bulk array join rather than a scan of the CSV.
+"""
+
+import re
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_MASTER_PATH = Path(__file__).resolve().parent / 'data' / 'amfi_scheme_master.csv'
+
+ISIN_PATTERN = re.compile(r'IN[A-Z0-9]{9}\d')
+
+# Bump when the cache layout changes
+CACHE_VERSION = 1
+
+# Words that don't help tell schemes apart in fuzzy name matching
+NAME_STOPWORDS = {'fund', 'plan', 'option', 'the', 'scheme', 'of', 'and'}
+
+# Minimum trigram similarity (Jaccard) for a fuzzy name match
+FUZZY_THRESHOLD = 0.5
+
+# Header aliases in the different AMFI downloads
+CODE_COLUMNS = ('scheme_code', 'code', 'scheme code')
+NAME_COLUMNS = ('scheme_name', 'scheme nav name', 'scheme name')
+CATEGORY_COLUMNS = ('category', 'scheme category')
+
+
+def normalize_name(name: str) -> str:
+    """Lowercase, strip punctuation and filler words: 'SBI Small Cap Fund - Direct Plan' -> 'sbi small cap direct'"""
+    words = re.sub(r'[^a-z0-9]+', ' ', str(name).lower()).split()
+    return ' '.join(word for word in words if word not in NAME_STOPWORDS)
+
+
+def short_category(category: str) -> str:
+    """'Equity Scheme - Large Cap Fund' -> 'Large Cap' (the style used in holdings)"""
+    text = str(category).split(' - ', 1)[-1].strip()
+    return re.sub(r'\s+Fund$', '', text)
+
+
+def _trigrams(text: str) -> List[str]:
+    padded = f"  {text} "
+    return sorted({padded[i:i + 3] for i in range(len(padded) - 2)})
+
+
+class SchemeMaster:
+    """
+    Indexed AMFI scheme master
+    """
+
+    def __init__(self, codes: np.ndarray, names: np.ndarray, category_ids: np.ndarray,
+                 category_labels: np.ndarray, isins: np.ndarray, isin_rows: np.ndarray,
+                 trigram_keys: Optional[np.ndarray] = None, trigram_offsets: Optional[np.ndarray] = None,
+                 trigram_rows: Optional[np.ndarray] = None):
+        self.codes = np.asarray(codes, dtype=np.int64)
+        self.names = np.asarray(names, dtype=str)
+        self.category_ids = np.asarray(category_ids, dtype=np.int32)
+        self.category_labels = np.asarray(category_labels, dtype=str)
+        self.isins = np.asarray(isins, dtype=str)
+        self.isin_rows = np.asarray(isin_rows, dtype=np.int32)
+        self._code_index = pd.Index(self.codes)
+        self._isin_index = pd.Index(self.isins)
+        self._short_labels = np.array([short_category(label) for label in self.category_labels], dtype=object)
+        if trigram_keys is None:
+            trigram_keys, trigram_offsets, trigram_rows = self._build_trigrams(self.names)
+        self._trigram_keys = np.asarray(trigram_keys, dtype=str)
+        self._trigram_offsets = np.asarray(trigram_offsets, dtype=np.int64)
+        self._trigram_rows = np.asarray(trigram_rows, dtype=np.int32)
+        self._trigram_counts = np.bincount(self._trigram_rows, minlength=len(self.codes))
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    # ---- loading ------------------------------------------------------------
+
+    @classmethod
+    def load(cls, path: Path = DEFAULT_MASTER_PATH, use_cache: bool = True) -> 'SchemeMaster':
+        """
+        Load the master from ``path``, via its .npz cache when still current
+        """
+        path = Path(path)
+        if not path.exists():
+            raise FileNotFoundError(f"AMFI scheme master not found: {path}")
+        cache_path = path.with_name(path.name + '.npz')
+        stat = path.stat()
+        source_stamp = np.array([CACHE_VERSION, stat.st_size, stat.st_mtime_ns], dtype=np.int64)
+
+        if use_cache and cache_path.exists():
+            with np.load(cache_path, allow_pickle=False) as data:
+                if np.array_equal(data['source_stamp'], source_stamp):
+                    return cls(*(data[name] for name in (
+                        'codes', 'names', 'category_ids', 'category_labels', 'isins', 'isin_rows',
+                        'trigram_keys', 'trigram_offsets', 'trigram_rows')))
+
+        frame = cls._read_navall(path) if path.suffix.lower() == '.txt' else cls._read_csv(path)
+        master = cls.from_frame(frame)
+        if use_cache:
+            master.save(cache_path, source_stamp)
+        return master
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame) -> 'SchemeMaster':
+        """
+        Build from columns scheme_code, scheme_name, category, isins (list of ISINs per row)
+        """
+        frame = frame.drop_duplicates('scheme_code', keep='last').reset_index(drop=True)
+        category_ids, category_labels = pd.factorize(frame['category'].fillna(''))
+        lengths = frame['isins'].map(len).to_numpy()
+        isins = np.array([isin for row in frame['isins'] for isin in row], dtype=str)
+        isin_rows = np.repeat(np.arange(len(frame), dtype=np.int32), lengths)
+        # First listing wins if an ISIN appears twice
+        _, first = np.unique(isins, return_index=True)
+        keep = np.sort(first)
+        return cls(frame['scheme_code'].to_numpy(dtype=np.int64), frame['scheme_name'].to_numpy(dtype=str),
+                   category_ids, np.asarray(category_labels, dtype=str), isins[keep], isin_rows[keep])
+
+    def save(self, cache_path: Path, source_stamp: np.ndarray) -> None:
+        np.savez(cache_path, source_stamp=source_stamp, codes=self.codes, names=self.names,
+                 category_ids=self.category_ids, category_labels=self.category_labels,
+                 isins=self.isins, isin_rows=self.isin_rows, trigram_keys=self._trigram_keys,
+                 trigram_offsets=self._trigram_offsets, trigram_rows=self._trigram_rows)
+
+    @staticmethod
+    def _read_csv(path: Path) -> pd.DataFrame:
+        raw = pd.read_csv(path, dtype=str, skipinitialspace=True)
+        columns = {column.strip().lower(): column for column in raw.columns}
+
+        def pick(aliases) -> str:
+            for alias in aliases:
+                if alias in columns:
+                    return columns[alias]
+            raise ValueError(f"{path.name}: none of the columns {aliases} found")
+
+        isin_text = pd.Series('', index=raw.index)
+        for key, column in columns.items():
+            if 'isin' in key:
+                isin_text = isin_text + ' ' + raw[column].fillna('')
+        frame = pd.DataFrame({
+            'scheme_code': pd.to_numeric(raw[pick(CODE_COLUMNS)], errors='coerce'),
+            'scheme_name': raw[pick(NAME_COLUMNS)].fillna('').str.strip(),
+            'category': raw[pick(CATEGORY_COLUMNS)].fillna('').str.strip(),
+            'isins': isin_text.str.findall(ISIN_PATTERN),
+        })
+        return frame.dropna(subset=['scheme_code'])
+
+    @staticmethod
+    def _read_navall(path: Path) -> pd.DataFrame:
+        # Scheme Code;ISIN Div Payout/ISIN Growth;ISIN Div Reinvestment;Scheme Name;Net Asset Value;Date
+        # interleaved with "Open Ended Schemes(Equity Scheme - Large Cap Fund)" section headers
+        rows = []
+        category = ''
+        with path.open(encoding='utf-8', errors='replace') as fh:
+            for line in fh:
+                line = line.strip()
+                if not line:
+                    continue
+                fields = line.split(';')
+                if len(fields) >= 4 and fields[0].isdigit():
+                    isins = [isin for isin in (fields[1].strip(), fields[2].strip()) if ISIN_PATTERN.fullmatch(isin)]
+                    rows.append((int(fields[0]), fields[3].strip(), category, isins))
+                elif '(' in line and line.endswith(')') and ';' not in line:
+                    category = line[line.index('(') + 1:-1].strip()
+        return pd.DataFrame(rows, columns=['scheme_code', 'scheme_name', 'category', 'isins'])
+
+    @staticmethod
+    def _build_trigrams(names: np.ndarray):
+        # CSR layout: sorted trigram keys, offsets into one rows array
+        per_name = [_trigrams(normalize_name(name)) for name in names]
+        grams = np.array([gram for name_grams in per_name for gram in name_grams], dtype='<U3')
+        rows = np.repeat(np.arange(len(per_name), dtype=np.int32), [len(g) for g in per_name])
+        keys, inverse = np.unique(grams, return_inverse=True)
+        order = np.argsort(inverse, kind='stable')
+        offsets = np.zeros(len(keys) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum(np.bincount(inverse, minlength=len(keys)))
+        return keys, offsets, rows[order]
+
+    # ---- lookups ------------------------------------------------------------
+
+    def _rows_frame(self, rows: np.ndarray) -> pd.DataFrame:
+        found = rows >= 0
+        safe = np.where(found, rows, 0)
+        category_ids = self.category_ids[safe]
+        return pd.DataFrame({
+            'scheme_code': np.where(found, self.codes[safe].astype(str), None),
+            'scheme_name': np.where(found, self.names[safe], None),
+            'category': np.where(found, self._short_labels[category_ids], None),
+            'category_full': np.where(found, self.category_labels[category_ids], None),
+        })
+
+    def resolve_isins(self, isins: Iterable[str]) -> pd.DataFrame:
+        """
+        Bulk ISIN -> scheme join; one output row per input, None where unknown
+        """
+        isin_values = pd.Index([str(isin).strip().upper() for isin in isins])
+        positions = self._isin_index.get_indexer(isin_values)
+        rows = np.full(len(positions), -1, dtype=np.int64)
+        found = positions >= 0
+        rows[found] = self.isin_rows[positions[found]]
+        frame = self._rows_frame(rows)
+        frame.insert(0, 'isin', isin_values)
+        return frame
+
+    def resolve_codes(self, codes: Iterable) -> pd.DataFrame:
+        """
+        Bulk scheme code -> name/category join
+        """
+        code_values = pd.to_numeric(pd.Series(list(codes), dtype=object), errors='coerce').fillna(-1).astype(np.int64)
+        rows = self._code_index.get_indexer(code_values)
+        return self._rows_frame(rows)
+
+    def scheme_for_isin(self, isin: str) -> Optional[str]:
+        return self.resolve_isins([isin])['scheme_code'].iloc[0]
+
+    def category(self, code) -> Optional[str]:
+        return self.resolve_codes([code])['category'].iloc[0]
+
+    def category_schemes(self, category: str) -> pd.DataFrame:
+        """
+        Every scheme in a category, given as the short ('Flexi Cap') or full AMFI label
+        """
+        wanted = str(category).strip().lower()
+        matches = [i for i, label in enumerate(self.category_labels)
+                   if wanted in (label.lower(), self._short_labels[i].lower())]
+        rows = np.flatnonzero(np.isin(self.category_ids, matches))
+        return self._rows_frame(rows)
+
+    def match_name(self, name: str, threshold: float = FUZZY_THRESHOLD) -> Optional[str]:
+        """
+        Best fuzzy match of a scheme name; returns the scheme code or None
+        """
+        grams = np.array(_trigrams(normalize_name(name)), dtype=str)
+        if not len(grams) or not len(self._trigram_keys):
+            return None
+        pos = np.minimum(np.searchsorted(self._trigram_keys, grams), len(self._trigram_keys) - 1)
+        pos = pos[self._trigram_keys[pos] == grams]
+        if not len(pos):
+            return None
+        # Gather the posting lists of all matched trigrams and count hits per scheme
+        starts, ends = self._trigram_offsets[pos], self._trigram_offsets[pos + 1]
+        lengths = ends - starts
+        flat = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        shared = np.bincount(self._trigram_rows[flat], minlength=len(self.codes))
+        # Jaccard similarity of trigram sets
+        score = shared / (len(grams) + self._trigram_counts - shared)
+        best = int(score.argmax())
+        return str(self.codes[best]) if score[best] >= threshold else None
+
+    def resolve_names(self, names: Iterable[str], threshold: float = FUZZY_THRESHOLD) -> pd.DataFrame:
+        """
+        Fuzzy name -> scheme join; one output row per input
+        """
+        codes = [self.match_name(name, threshold) for name in names]
+        rows = self._code_index.get_indexer(pd.Index([int(code) if code else -1 for code in codes]))
+        return self._rows_frame(rows)
+
+    def resolve_holdings(self, holdings: pd.DataFrame, isin_col: str = 'isin',
+                         name_col: Optional[str] = None) -> pd.DataFrame:
+        """
+        Add scheme_code/category columns to holdings by ISIN, falling back to fuzzy names
+        """
+        resolved = self.resolve_isins(holdings[isin_col]).drop(columns='isin')
+        resolved.index = holdings.index
+        if name_col is not None:
+            missing = resolved['scheme_code'].isna()
+            if missing.any():
+                by_name = self.resolve_names(holdings.loc[missing, name_col])
+                by_name.index = resolved.index[missing]
+                resolved.loc[missing] = by_name
+        return holdings.drop(columns=[c for c in resolved.columns if c in holdings.columns]).join(resolved)
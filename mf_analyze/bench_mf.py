@@ -0,0 +1,924 @@
+"""
+Benchmarks for the mf_analyze engines, on synthetic data.
+
+    python bench_mf.py nav --funds 500 --years 10
+    python bench_mf.py cache --funds 200 --years 10
+    python bench_mf.py amfi --schemes 40000 --lookups 5000
+    python bench_mf.py rolling --funds 200 --years 10 --window-years 3
+    python bench_mf.py screen --funds 200 --years 10 --latency-ms 50
+    python bench_mf.py overlap --funds 1500 --securities 2500
+    python bench_mf.py corr --funds 500 --years 10
+    python bench_mf.py report --jobs 4
+    python bench_mf.py xirr --folios 500 --years 10
+    python bench_mf.py tax --folios 60 --years 10
+    python bench_mf.py rebalance --funds 60 --scenarios 10000
+    python bench_mf.py project --funds 20 --horizon 20 --paths 100000 --jobs 4
+    python bench_mf.py kite --latency-ms 30 --requests 40
+    python bench_mf.py snapshots --funds 200 --folios 400 --years 3 --days 750
+    python bench_mf.py export --funds 200 --years 10
+    python bench_mf.py benchmarks --funds 1000 --years 10
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, List
+
+import pandas as pd
+
+import numpy as np
+
+import rolling
+from amfi_master import SchemeMaster
+from benchmarks import assign, levels_for, load_levels, relative_metrics, store_levels
+from correlation import CovarianceState
+from export import export_tables
+from kite_client import KiteClient, holdings_frame
+from kite_mock import MockKiteServer
+from mf_analyzer import MFPortfolioAnalyzer
+from nav_cache import NAVCache
+from nav_history import RISK_FREE_RATE, TRADING_DAYS, NAVHistory, _daily_rate
+from overlap import HoldingsMatrix
+from projection import MONTH_DAYS, contributions, portfolio_returns, project_sip, simulate
+from screener import CategoryScreener
+from snapshots import SnapshotStore
+from rebalance import rebalance, stress_test
+from synthetic_data import (CATEGORIES, synthetic_benchmarks, synthetic_category, synthetic_holdings,
+                            synthetic_kite_account, synthetic_nav_history, synthetic_portfolio,
+                            synthetic_transactions)
+from tax_lots import TaxLots
+from xirr import CashFlowLedger, xirr, xirr_batch
+
+
+def time_runs(func: Callable[[], object], repeat: int) -> List[float]:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def report(name: str, timings: List[float]) -> None:
+    print(f"{name}: best {min(timings) * 1000:.1f} ms, median {statistics.median(timings) * 1000:.1f} ms")
+
+
+def bench_nav(args: argparse.Namespace) -> None:
+    history, benchmark = synthetic_nav_history(args.funds, args.years, seed=args.seed)
+    print(f"NAV history: {len(history)} funds x {len(history.dates)} days")
+    empty = NAVHistory([], [], np.empty((0, 0)))
+    print(f"  empty history builds: {'yes' if empty.navs.shape == (0, 0) else 'NO'}")
+
+    report("metrics (returns, CAGR, vol, Sharpe, Sortino, max DD, beta)",
+           time_runs(lambda: history.metrics(benchmark), args.repeat))
+    report("rolling 3Y CAGR", time_runs(lambda: history.rolling_cagr(3), args.repeat))
+
+
+def bench_cache(args: argparse.Namespace) -> None:
+    history, _ = synthetic_nav_history(args.funds, args.years, seed=args.seed)
+    full = history.to_frame()
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = NAVCache(Path(tmp))
+        # Offline fixture missing the last week, then topped up from a local "source"
+        cache.store_history(history.slice(end=history.dates[-6]))
+        print(f"Cache fixture: {len(history)} funds x {len(history.dates) - 5} days")
+
+        def source(code: str, start) -> pd.Series:
+            series = full[code]
+            return series if start is None else series[series.index >= start]
+
+        start = time.perf_counter()
+        added = cache.refresh(history.codes, source)
+        print(f"incremental refresh: {sum(added.values())} rows added in {(time.perf_counter() - start) * 1000:.1f} ms")
+        added = cache.refresh(history.codes, source)
+        print(f"second refresh: {sum(added.values())} rows added")
+
+        loaded = cache.load_history(history.codes)
+        assert loaded.navs.shape == history.navs.shape
+        report("load_history (memory-mapped)", time_runs(lambda: cache.load_history(history.codes), args.repeat))
+
+
+def bench_amfi(args: argparse.Namespace) -> None:
+    rng = np.random.default_rng(args.seed)
+    words = np.array(['Alpha', 'Bharat', 'Capital', 'Dynamic', 'Equity', 'Focused', 'Growth', 'Hybrid',
+                      'India', 'Value', 'Opportunities', 'Bluechip', 'Midcap', 'Smallcap', 'Tax', 'Saver'])
+    categories = ['Equity Scheme - Large Cap Fund', 'Equity Scheme - Mid Cap Fund',
+                  'Equity Scheme - Small Cap Fund', 'Equity Scheme - Flexi Cap Fund', 'Other Scheme - Index Funds']
+    n = args.schemes
+    codes = 100000 + np.arange(n)
+    names = [' '.join(rng.choice(words, 3)) + f' {i} Fund - Direct Plan - Growth' for i in range(n)]
+    isins = [f'INF{i:07d}A1' for i in range(n)]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'amfi_scheme_master.csv'
+        pd.DataFrame({
+            'Code': codes, 'Scheme NAV Name': names,
+            'Scheme Category': rng.choice(categories, n), 'ISIN Div Payout/ ISIN Growth': isins,
+        }).to_csv(path, index=False)
+        print(f"Synthetic AMFI master: {n:,} schemes")
+
+        start = time.perf_counter()
+        master = SchemeMaster.load(path)
+        print(f"parse CSV + build index: {(time.perf_counter() - start) * 1000:.1f} ms")
+        report("load from .npz cache", time_runs(lambda: SchemeMaster.load(path), args.repeat))
+
+        lookups = [isins[i] for i in rng.integers(0, n, args.lookups)]
+        report(f"resolve {args.lookups:,} ISINs", time_runs(lambda: master.resolve_isins(lookups), args.repeat))
+        queries = [names[i].replace(' - Direct Plan', '') for i in rng.integers(0, n, 100)]
+        report("fuzzy-match 100 names", time_runs(lambda: master.resolve_names(queries), args.repeat))
+        matched = sum(code is not None for code in master.resolve_names(queries)['scheme_code'])
+        print(f"fuzzy matches: {matched}/100")
+
+
+def reference_rolling(navs: pd.DataFrame, bench: pd.Series, window: int) -> dict:
+    """Straightforward pandas .rolling().apply() versions of the rolling kernels"""
+    returns = navs.pct_change(fill_method=None)
+    bench_returns = bench.pct_change()
+    rf = _daily_rate(RISK_FREE_RATE)
+
+    def alpha_beta(fund: pd.Series):
+        pairs = pd.concat([fund - rf, bench_returns - rf], axis=1)
+        beta = pairs.iloc[:, 0].rolling(window).cov(pairs.iloc[:, 1]) / pairs.iloc[:, 1].rolling(window).var()
+        alpha = (pairs.iloc[:, 0].rolling(window).mean() - beta * pairs.iloc[:, 1].rolling(window).mean()) * TRADING_DAYS
+        return alpha, beta
+
+    def max_dd(values: np.ndarray) -> float:
+        return (values / np.maximum.accumulate(values) - 1.0).min()
+
+    def capture(fund: pd.Series, up: bool):
+        mask = bench_returns > 0 if up else bench_returns < 0
+        fund_sum = fund.where(mask | fund.isna(), 0.0).rolling(window).sum()
+        return fund_sum / bench_returns.where(mask, 0.0).rolling(window).sum() * 100
+
+    alphas, betas = zip(*(alpha_beta(returns[col]) for col in navs.columns))
+    return {
+        'volatility': returns.rolling(window).std() * np.sqrt(TRADING_DAYS),
+        'alpha': pd.concat(alphas, axis=1),
+        'beta': pd.concat(betas, axis=1),
+        'up_capture': pd.concat([capture(returns[c], True) for c in navs.columns], axis=1),
+        'down_capture': pd.concat([capture(returns[c], False) for c in navs.columns], axis=1),
+        'max_drawdown': navs.rolling(window).apply(max_dd, raw=True),
+    }
+
+
+def bench_rolling(args: argparse.Namespace) -> None:
+    history, bench = synthetic_nav_history(args.funds, args.years, seed=args.seed)
+    window = int(round(args.window_years * TRADING_DAYS))
+    navs = history.navs
+    returns = np.vstack([np.full((1, navs.shape[1]), np.nan), history.returns()])
+    bench_returns = np.concatenate([[np.nan], bench[1:] / bench[:-1] - 1.0])
+    print(f"Rolling {args.window_years:g}Y ({window} days) over {len(history)} funds x {len(history.dates)} days")
+
+    def fast() -> dict:
+        alpha, beta = rolling.rolling_alpha_beta(returns, bench_returns, window)
+        up, down = rolling.rolling_capture(returns, bench_returns, window)
+        return {
+            'volatility': rolling.rolling_volatility(returns, window),
+            'alpha': alpha, 'beta': beta, 'up_capture': up, 'down_capture': down,
+            'max_drawdown': rolling.rolling_max_drawdown(navs, window),
+        }
+
+    # Cross-check on a handful of funds; the reference is far too slow for all of them
+    sample = history.codes[:args.check_funds]
+    frame = history.to_frame()[sample]
+    start = time.perf_counter()
+    expected = reference_rolling(frame, pd.Series(bench, index=history.dates), window)
+    reference_time = time.perf_counter() - start
+    actual = fast()
+    for name, ref in expected.items():
+        got = actual[name][:, :len(sample)]
+        ok = np.allclose(got, ref.to_numpy(), rtol=1e-6, atol=1e-9, equal_nan=True)
+        print(f"  {name:13} matches reference: {'yes' if ok else 'NO'}")
+        if not ok:
+            raise SystemExit(f"Rolling {name} differs from the reference implementation")
+
+    per_fund = reference_time / len(sample)
+    print(f"reference (pandas rolling/apply): {per_fund * 1000:.0f} ms per fund, "
+          f"~{per_fund * len(history):.1f} s for all {len(history)} funds")
+    report("kernels, all funds", time_runs(fast, args.repeat))
+    report("  rolling alpha/beta", time_runs(lambda: rolling.rolling_alpha_beta(returns, bench_returns, window), args.repeat))
+    report("  rolling max drawdown", time_runs(lambda: rolling.rolling_max_drawdown(navs, window), args.repeat))
+
+
+def bench_screen(args: argparse.Namespace) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        start = time.perf_counter()
+        master = synthetic_category(NAVCache(root / 'full'), args.funds, args.years, seed=args.seed)
+        print(f"Category fixture: {args.funds} funds x {args.years:g} years "
+              f"({(time.perf_counter() - start) * 1000:.0f} ms to build)")
+        full = NAVCache(root / 'full')
+
+        def source(code: str, since) -> pd.Series:
+            # Stands in for mfapi.in: fixed latency per request
+            time.sleep(args.latency_ms / 1000)
+            series = full.read(code)
+            return series if since is None else series[series.index >= since]
+
+        codes = CategoryScreener(master, full).schemes('Flexi Cap')['scheme_code'].tolist()
+        for workers in (1, args.workers):
+            cache = NAVCache(root / f'fetch_{workers}', workers=workers)
+            start = time.perf_counter()
+            cache.refresh(codes, source)
+            print(f"fetch {len(codes)} histories, {workers} worker(s): {time.perf_counter() - start:.2f} s")
+
+        screener = CategoryScreener(master, full, screen_dir=root / 'screens')
+        start = time.perf_counter()
+        result = screener.screen('Flexi Cap', '^SYNTH', offline=True)
+        print(f"screen + rank (cold): {(time.perf_counter() - start) * 1000:.1f} ms, {len(result)} schemes ranked")
+        report("screen (saved result)", time_runs(
+            lambda: screener.screen('Flexi Cap', '^SYNTH', offline=True), args.repeat))
+        report("screen (recomputed)", time_runs(
+            lambda: screener.screen('Flexi Cap', '^SYNTH', offline=True, use_cache=False), args.repeat))
+
+
+def bench_overlap(args: argparse.Namespace) -> None:
+    disclosures = synthetic_holdings(args.funds, args.securities, seed=args.seed)
+    start = time.perf_counter()
+    matrix = HoldingsMatrix.from_frame(disclosures)
+    print(f"Holdings: {len(matrix)} funds x {len(matrix.securities)} securities, "
+          f"{matrix.weights.nnz:,} positions ({(time.perf_counter() - start) * 1000:.0f} ms to build)")
+
+    # Cross-check a few pairs against a plain merge on ISIN
+    rng = np.random.default_rng(args.seed)
+    by_fund = {code: group.set_index('isin')['weight'] for code, group in disclosures.groupby('scheme_code')}
+    pairs = rng.choice(matrix.codes, size=(20, 2))
+    overlap = matrix.overlap(sorted(set(pairs[:, 0])))
+    for a, b in pairs:
+        shared = by_fund[a].to_frame('a').join(by_fund[b].to_frame('b'), how='inner')
+        if not np.isclose(overlap.loc[a, b], np.minimum(shared['a'], shared['b']).sum()):
+            raise SystemExit(f"Overlap of {a} and {b} differs from the merge-based reference")
+    print("overlap matches merge reference: yes")
+
+    reference_time = min(time_runs(lambda: [
+        by_fund[a].to_frame('a').join(by_fund[b].to_frame('b'), how='inner').min(axis=1).sum()
+        for a, b in pairs], 1)) / len(pairs)
+    print(f"reference (merge per pair): {reference_time * 1000:.2f} ms per pair, "
+          f"~{reference_time * len(matrix) ** 2 / 2:.0f} s for all pairs")
+
+    allocation = dict(zip(matrix.codes[:5], [125000, 180000, 95000, 110000, 140000]))
+    report("portfolio (5 funds) look-through vs all funds", time_runs(
+        lambda: matrix.portfolio_overlap(allocation), args.repeat))
+    report("top-10 overlap, 5 funds vs all", time_runs(
+        lambda: matrix.top_n(10).overlap(matrix.codes[:5]), args.repeat))
+    report("sector overlap, all pairs", time_runs(lambda: matrix.sector_overlap(), args.repeat))
+    report("stock overlap, all pairs", time_runs(lambda: matrix.overlap(), args.repeat))
+
+
+def bench_corr(args: argparse.Namespace) -> None:
+    history, _ = synthetic_nav_history(args.funds, args.years, seed=args.seed)
+    print(f"NAV history: {len(history)} funds x {len(history.dates)} days")
+    returns = pd.DataFrame(history.returns(), columns=history.codes)
+
+    state = CovarianceState.from_history(history)
+    for name, ours, reference in (('covariance', state.covariance(), returns.cov(min_periods=20)),
+                                  ('correlation', state.correlation(), returns.corr(min_periods=20))):
+        ok = np.allclose(ours.to_numpy(), reference.to_numpy(), rtol=1e-7, atol=1e-12, equal_nan=True)
+        print(f"  pairwise {name} matches pandas: {'yes' if ok else 'NO'}")
+        if not ok:
+            raise SystemExit(f"Pairwise {name} differs from pandas")
+
+    report("pandas DataFrame.corr (pairwise)", time_runs(lambda: returns.corr(min_periods=20), 1))
+    report("build state from full history", time_runs(lambda: CovarianceState.from_history(history), args.repeat))
+    report("correlation from state", time_runs(state.correlation, args.repeat))
+    report("Ledoit-Wolf shrunk covariance", time_runs(state.shrunk_covariance, args.repeat))
+    _, intensity = state.shrunk_covariance()
+    print(f"shrinkage intensity: {intensity:.3f}")
+
+    # Nightly refresh: state up to yesterday, then one new day
+    yesterday = CovarianceState.from_history(history.slice(end=history.dates[-2]))
+
+    def add_day() -> None:
+        fresh = CovarianceState(yesterday.codes, {k: v.copy() for k, v in yesterday.stats.items()},
+                                yesterday.last_date, yesterday.last_navs)
+        fresh.update(history)
+
+    report("incremental update, 1 new day", time_runs(add_day, args.repeat))
+    # Refreshing again with nothing new must be a no-op, as on a repeated get_correlation_matrix()
+    added = [state.update(history) for _ in range(2)]
+    print(f"  repeated update adds no days: {'yes' if added == [0, 0] else 'NO'}")
+
+
+def bench_report(args: argparse.Namespace) -> None:
+    from mf_analyzer import MFPortfolioAnalyzer
+
+    # Cold import in a fresh interpreter, as a CLI run would see it
+    code = "import time; t = time.perf_counter(); import mf_analyzer; print(time.perf_counter() - t)"
+    timings = [float(subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                                    cwd=Path(__file__).resolve().parent, check=True).stdout)
+               for _ in range(args.repeat)]
+    report("import mf_analyzer (fresh interpreter)", timings)
+
+    analyzer = MFPortfolioAnalyzer()
+    holdings = analyzer.load_sample_data()
+    history, benchmark = synthetic_nav_history(len(holdings), args.years, seed=args.seed)
+    analyzer.load_nav_history(NAVHistory(history.dates, holdings['scheme_code'], history.navs), benchmark)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for jobs in (1, args.jobs):
+            start = time.perf_counter()
+            analyzer.generate_report(Path(tmp) / f'jobs_{jobs}', jobs=jobs)
+            print(f"report, {jobs} job(s), cold: {time.perf_counter() - start:.2f} s")
+        report("report, unchanged data (all charts reused)", time_runs(
+            lambda: analyzer.generate_report(Path(tmp) / f'jobs_{args.jobs}', jobs=args.jobs), args.repeat))
+
+
+# Known XIRR values: (dates, cash flows, expected rate)
+XIRR_KNOWN_VALUES = [
+    # Excel's XIRR documentation example
+    (['2008-01-01', '2008-03-01', '2008-10-30', '2009-02-15', '2009-04-01'],
+     [-10000, 2750, 4250, 3250, 2750], 0.373362535),
+    # Doubling in exactly one (non-leap) year
+    (['2021-01-01', '2022-01-01'], [-1000, 2000], 1.0),
+    # Losing half over two years
+    (['2021-01-01', '2023-01-01'], [-1000, 500], 0.5 ** (365 / 730) - 1),
+    # Only investments, no value: no rate exists
+    (['2021-01-01', '2021-02-01'], [-1000, -1000], np.nan),
+]
+
+
+def bench_xirr(args: argparse.Namespace) -> None:
+    from scipy.optimize import brentq
+
+    for dates, flows, expected in XIRR_KNOWN_VALUES:
+        rate = xirr(pd.to_datetime(dates), flows)
+        if not (np.isclose(rate, expected, rtol=1e-8) or (np.isnan(expected) and np.isnan(rate))):
+            raise SystemExit(f"XIRR of {flows} is {rate}, expected {expected}")
+    # Monthly SIP into a NAV compounding at exactly 12% a year (days / 365)
+    sip = pd.date_range('2015-01-05', periods=120, freq='MS')
+    growth = 1.12 ** ((sip - sip[0]).days.to_numpy() / 365)
+    end = sip[-1] + pd.Timedelta(days=30)
+    value = (10000 / growth).sum() * 1.12 ** ((end - sip[0]).days / 365)
+    rate = xirr(sip.append(pd.DatetimeIndex([end])), np.append(np.full(len(sip), -10000.0), value))
+    if not np.isclose(rate, 0.12, rtol=1e-9):
+        raise SystemExit(f"XIRR of a 12% SIP is {rate}")
+    print(f"known values ({len(XIRR_KNOWN_VALUES) + 1} cases) match: yes")
+
+    history, _ = synthetic_nav_history(args.funds, args.years, seed=args.seed)
+    transactions = synthetic_transactions(history, args.folios, seed=args.seed)
+    units = transactions.groupby(['folio', 'scheme_code'], as_index=False)['units'].sum()
+    last_navs = pd.Series(history.navs[-1], index=history.codes)
+    units['current_value'] = units['units'] * last_navs[units['scheme_code']].to_numpy()
+    ledger = CashFlowLedger.from_transactions(transactions).with_valuations(units, history.dates[-1])
+    print(f"Ledger: {args.folios} folios, {len(ledger):,} cash flows over {args.years:g} years")
+
+    frame = ledger.frame()
+    groups, labels = pd.factorize(frame['folio'] + '|' + frame['scheme_code'])
+    years = (frame['date'] - frame.groupby(groups)['date'].transform('min')).dt.days.to_numpy() / 365.0
+
+    def reference() -> np.ndarray:
+        # One scalar Brent solve per folio
+        rates = np.empty(len(labels))
+        for g, rows in enumerate(pd.Series(np.arange(len(frame))).groupby(groups).indices.values()):
+            t, a = years[rows], frame['amount'].to_numpy()[rows]
+            rates[g] = brentq(lambda r: np.sum(a * (1 + r) ** -t), -0.99, 10.0, xtol=1e-12)
+        return rates
+
+    ours = xirr_batch(groups, frame['date'], frame['amount'], n_groups=len(labels))
+    expected = reference()
+    if not np.allclose(ours, expected, rtol=1e-7, atol=1e-9):
+        raise SystemExit("Batched XIRR differs from the per-folio Brent reference")
+    # Starved of Newton iterations every folio goes through the Brent fallback
+    fallback = xirr_batch(groups, frame['date'], frame['amount'], n_groups=len(labels), max_iter=1)
+    if not np.allclose(fallback, expected, rtol=1e-7, atol=1e-9):
+        raise SystemExit("Brent fallback differs from the per-folio Brent reference")
+    print("batched Newton and Brent fallback match per-folio reference: yes")
+
+    report("reference (scalar Brent per folio)", time_runs(reference, 1))
+    report("batched XIRR, per folio", time_runs(
+        lambda: ledger.xirr(['folio', 'scheme_code']), args.repeat))
+    report("batched XIRR, per fund", time_runs(lambda: ledger.xirr('scheme_code'), args.repeat))
+    report("portfolio XIRR", time_runs(lambda: ledger.xirr(None), args.repeat))
+
+
+def reference_fifo(transactions: pd.DataFrame) -> pd.DataFrame:
+    """Lot-by-lot FIFO with a deque per folio: (buy_date, sell_date, units) per match"""
+    from collections import deque
+
+    matches = []
+    ordered = transactions.sort_values(['folio', 'scheme_code', 'date'], kind='stable')
+    for _, group in ordered.groupby(['folio', 'scheme_code'], sort=True):
+        queue = deque()
+        for row in group.itertuples():
+            units = round(row.units * 1000)
+            if units > 0:
+                queue.append([row.date, units])
+                continue
+            needed = -units
+            while needed:
+                lot = queue[0]
+                used = min(lot[1], needed)
+                matches.append((lot[0], row.date, used / 1000))
+                lot[1] -= used
+                needed -= used
+                if lot[1] == 0:
+                    queue.popleft()
+    return pd.DataFrame(matches, columns=['buy_date', 'sell_date', 'units'])
+
+
+def bench_tax(args: argparse.Namespace) -> None:
+    history, _ = synthetic_nav_history(args.funds, args.years, seed=args.seed)
+    transactions = synthetic_transactions(history, args.folios, seed=args.seed, redeem_share=0.5)
+    navs = pd.Series(history.navs[-1], index=history.codes)
+    lots = TaxLots(transactions)
+    print(f"Transactions: {args.folios} folios, {len(lots.buy_units):,} purchases, "
+          f"{len(lots.sell_key)} redemptions over {args.years:g} years")
+
+    realised = lots.realised()
+    expected = reference_fifo(transactions)
+    ok = (len(realised) == len(expected)
+          and (realised['buy_date'].to_numpy() == expected['buy_date'].to_numpy()).all()
+          and np.allclose(realised['units'], expected['units']))
+    print(f"FIFO matches lot-by-lot reference: {'yes' if ok else 'NO'}")
+    if not ok:
+        raise SystemExit("FIFO matching differs from the deque reference")
+
+    report("reference (deque FIFO per folio)", time_runs(lambda: reference_fifo(transactions), 1))
+    report("build lots + FIFO match", time_runs(lambda: TaxLots(transactions), args.repeat))
+    report("realised gains per FY", time_runs(lots.realised_summary, args.repeat))
+    report("unrealised gains per folio", time_runs(
+        lambda: lots.unrealised_summary(navs, history.dates[-1]), args.repeat))
+    report("redemption plan, ₹10 lakh", time_runs(
+        lambda: lots.redemption_plan(1_000_000, navs, history.dates[-1]), args.repeat))
+
+
+def bench_rebalance(args: argparse.Namespace) -> None:
+    history, _ = synthetic_nav_history(args.funds, args.years, seed=args.seed, late_start_share=0.0)
+    transactions = synthetic_transactions(history, args.folios, seed=args.seed)
+    holdings = synthetic_portfolio(history, transactions)
+    lots = TaxLots(transactions)
+    as_of = history.dates[-1]
+    print(f"Portfolio: {len(holdings)} funds, {args.folios} folios, {len(lots.buy_units):,} tax lots")
+
+    # Equal weight per category, and separately per scheme
+    by_category = dict.fromkeys(holdings['category'].unique(), 1.0)
+    by_scheme = dict.fromkeys(holdings['scheme_code'], 1.0)
+    trades, allocation = rebalance(holdings, by_category, tax_lots=lots, as_of=as_of, min_trade=args.min_trade)
+    checks = {
+        'on target': np.allclose(allocation['new_pct'], allocation['target_pct'], atol=0.01),
+        'cash balanced': np.isclose(trades['buy'].sum(), trades['sell'].sum(), atol=1.0),
+        'min trade size': ((trades[['buy', 'sell']] == 0) | (trades[['buy', 'sell']] >= args.min_trade - 0.01)).all().all(),
+        'no buy and sell of one scheme': not ((trades['buy'] > 0) & (trades['sell'] > 0)).any(),
+    }
+    for name, ok in checks.items():
+        print(f"  {name}: {'yes' if ok else 'NO'}")
+    if not all(checks.values()):
+        raise SystemExit("Rebalance plan breaks a constraint")
+
+    print(f"plan: {(trades['buy'] > 0).sum()} buys, {(trades['sell'] > 0).sum()} sells of "
+          f"₹{trades['sell'].sum():,.0f}; tax net of realised losses ₹{trades['tax'].sum():,.0f}, "
+          f"exit loads ₹{trades['exit_load'].sum():,.0f}")
+
+    report("rebalance by category (tax lots)", time_runs(
+        lambda: rebalance(holdings, by_category, tax_lots=lots, as_of=as_of, min_trade=args.min_trade), args.repeat))
+    report("rebalance by category, harvesting losses", time_runs(
+        lambda: rebalance(holdings, by_category, tax_lots=lots, as_of=as_of, min_trade=args.min_trade,
+                          harvest_losses=True), args.repeat))
+    report("rebalance by category, 1% band", time_runs(
+        lambda: rebalance(holdings, by_category, tax_lots=lots, as_of=as_of, min_trade=args.min_trade,
+                          tolerance=0.01), args.repeat))
+    report("rebalance per scheme (tax lots)", time_runs(
+        lambda: rebalance(holdings, by_scheme, by='scheme_code', tax_lots=lots, as_of=as_of,
+                          min_trade=args.min_trade), args.repeat))
+
+    state = CovarianceState.from_history(history.select(holdings['scheme_code'].tolist()))
+    covariance, _ = state.shrunk_covariance()
+    portfolios = {'current': holdings.set_index('scheme_code')['current_value'],
+                  'rebalanced': trades.set_index('scheme_code')['new_value']}
+    groups = holdings.set_index('scheme_code')['category']
+    result = stress_test(portfolios, state.mean(), covariance, groups, by_category, n_scenarios=args.scenarios)
+    print(result.T.round(3).to_string())
+    report(f"stress test, {args.scenarios:,} scenarios x 12 steps", time_runs(
+        lambda: stress_test(portfolios, state.mean(), covariance, groups, by_category,
+                            n_scenarios=args.scenarios), args.repeat))
+
+
+def reference_projection(log_returns: np.ndarray, amounts: np.ndarray, n_paths: int, block_days: int,
+                         seed: int, chunk_size: int) -> np.ndarray:
+    """
+    Path-by-path SIP values at each month end, on the same bootstrap draws as simulate()
+    """
+    n_blocks = -(-len(amounts) * MONTH_DAYS // block_days)
+    sizes = [min(chunk_size, n_paths - start) for start in range(0, n_paths, chunk_size)]
+    values = []
+    for size, chunk_seed in zip(sizes, np.random.SeedSequence(seed).spawn(len(sizes))):
+        starts = np.random.default_rng(chunk_seed).integers(0, len(log_returns) + 1 - block_days, size=(size, n_blocks))
+        for row in starts:
+            days = np.concatenate([log_returns[s:s + block_days] for s in row])
+            value, path = 0.0, []
+            for month, amount in enumerate(amounts):
+                value = (value + amount) * np.exp(days[month * MONTH_DAYS:(month + 1) * MONTH_DAYS].sum())
+                path.append(value)
+            values.append(path)
+    return np.array(values)
+
+
+def bench_project(args: argparse.Namespace) -> None:
+    history, _ = synthetic_nav_history(args.funds, args.history_years, seed=args.seed)
+    rng = np.random.default_rng(args.seed)
+    weights = pd.Series(rng.uniform(1e4, 1e5, args.funds), index=history.codes)
+    log_returns = portfolio_returns(history, weights)
+    print(f"History: {args.funds} funds, {len(log_returns):,} days of portfolio returns; "
+          f"SIP ₹{args.monthly:,.0f}/month for {args.horizon} years")
+
+    amounts = contributions(args.monthly, args.horizon * 12)
+    months = np.arange(len(amounts))
+    fast = simulate(log_returns, amounts, 300, seed=args.seed, chunk_size=100, record=months)
+    reference = reference_projection(log_returns, amounts, 300, MONTH_DAYS, args.seed, 100)
+    print(f"  matches path-by-path reference: {'yes' if np.allclose(fast, reference, rtol=1e-9) else 'NO'}")
+
+    # A flat 12% a year makes every path the textbook SIP future value
+    rate = 1.12 ** (1.0 / 12) - 1.0
+    flat = simulate(np.full(len(log_returns), np.log1p(rate) / MONTH_DAYS), amounts, 1000, seed=args.seed)[:, -1]
+    annuity = args.monthly * ((1.0 + rate) ** len(amounts) - 1.0) / rate * (1.0 + rate)
+    print(f"  flat returns give the SIP annuity value: {'yes' if np.allclose(flat, annuity) else 'NO'}")
+
+    serial = simulate(log_returns, amounts, 20000, seed=args.seed)
+    pooled = simulate(log_returns, amounts, 20000, seed=args.seed, jobs=args.jobs)
+    print(f"  same paths with {args.jobs} processes: {'yes' if np.array_equal(serial, pooled) else 'NO'}")
+
+    bands, summary = project_sip(log_returns, args.monthly, args.horizon, n_paths=args.paths, seed=args.seed)
+    last = len(bands) - 1
+    print(bands.iloc[sorted({0, min(4, last), min(9, last), last})].round(0).to_string())
+    print(summary.round(3).to_string())
+
+    tracemalloc.start()
+    project_sip(log_returns, args.monthly, args.horizon, n_paths=args.paths, seed=args.seed)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"peak memory, {args.paths:,} paths: {peak / 2 ** 20:.0f} MiB "
+          f"(results alone: {args.paths * args.horizon * 8 / 2 ** 20:.0f} MiB)")
+    for jobs in (1, args.jobs):
+        report(f"project {args.paths:,} paths x {args.horizon} years, {jobs} job(s)", time_runs(
+            lambda: project_sip(log_returns, args.monthly, args.horizon, n_paths=args.paths, seed=args.seed,
+                                jobs=jobs), args.repeat))
+
+
+def bench_kite(args: argparse.Namespace) -> None:
+    holdings, orders, instruments = synthetic_kite_account(args.holdings, args.orders, args.instruments, seed=args.seed)
+    with MockKiteServer(holdings, orders, instruments, latency_ms=args.latency_ms) as server:
+        def client(**kwargs) -> KiteClient:
+            return KiteClient(server.api_key, server.access_token, base_url=server.url, rate_limit=None, **kwargs)
+
+        print(f"Mock Kite server at {server.url}: {args.holdings} holdings, {args.orders} orders, "
+              f"{args.instruments:,} instruments, {args.latency_ms:g} ms per request")
+        fetched = client().fetch()
+        expected = holdings_frame(holdings)
+        print(f"  holdings match the fixture: {'yes' if fetched['holdings'].equals(expected) else 'NO'}")
+        complete = len(fetched['orders']) == len(orders) and len(fetched['instruments']) == len(instruments)
+        print(f"  orders and instruments complete: {'yes' if complete else 'NO'}")
+
+        # Every 4th request fails with 429 or 503; all calls should still succeed
+        for status in (429, 503):
+            server.fail_every, server.fail_status = 4, status
+            flaky = client(backoff=0.01)
+            results = [flaky.mf_holdings() for _ in range(12)]
+            ok = all(frame.equals(expected) for frame in results)
+            print(f"  every 4th request answers {status}: {'all fetched' if ok else 'FAILED'} "
+                  f"after {flaky.retries} retries")
+        server.fail_every = 0
+
+        limited = KiteClient(server.api_key, server.access_token, base_url=server.url, rate_limit=50.0)
+        start = time.perf_counter()
+        for _ in range(11):
+            limited.profile()
+        print(f"  11 requests at 50/s took >= 0.2 s: {'yes' if time.perf_counter() - start >= 0.2 else 'NO'}")
+
+        for workers in (1, 3):
+            report(f"fetch holdings + orders + instruments, {workers} thread(s)", time_runs(
+                lambda: client().fetch(workers=workers), args.repeat))
+
+        def burst(make_client: Callable[[], KiteClient]) -> None:
+            with ThreadPoolExecutor(max_workers=8) as pool:
+                list(pool.map(lambda _: make_client().mf_holdings(), range(args.requests)))
+
+        shared = client()
+        for name, make_client in (("pooled session", lambda: shared), ("new session per request", client)):
+            server.reset_counts()
+            timings = time_runs(lambda: burst(make_client), args.repeat)
+            report(f"{args.requests} holdings requests over 8 threads, {name}", timings)
+            print(f"  connections opened: {server.connections} for {server.requests} requests")
+
+
+def daily_holdings(history, transactions: pd.DataFrame, days: pd.DatetimeIndex) -> List[pd.DataFrame]:
+    """
+    Folio-level holdings on each of ``days``, in the analyzer layout plus a folio column
+    """
+    units = transactions.pivot_table(index='date', columns='folio', values='units', aggfunc='sum')
+    invested = transactions.pivot_table(index='date', columns='folio', values='amount', aggfunc='sum')
+    calendar = units.index.union(days)
+    units = units.reindex(calendar).fillna(0.0).cumsum().reindex(days).round(3)
+    invested = invested.reindex(calendar).fillna(0.0).cumsum().reindex(days).round(2)
+    codes = transactions.drop_duplicates('folio').set_index('folio')['scheme_code'][units.columns]
+    navs = history.to_frame().reindex(days)[codes.to_numpy()].to_numpy()
+    frames = []
+    for row, day in enumerate(days):
+        held = units.iloc[row].to_numpy() > 0
+        frames.append(pd.DataFrame({
+            'scheme_code': codes.to_numpy()[held], 'folio': units.columns[held],
+            'scheme_name': [f'Synthetic {code} Fund' for code in codes.to_numpy()[held]],
+            'units': units.iloc[row].to_numpy()[held], 'invested_amount': invested.iloc[row].to_numpy()[held],
+            'current_nav': navs[row, held], 'current_value': units.iloc[row].to_numpy()[held] * navs[row, held],
+        }))
+    return frames
+
+
+def bench_snapshots(args: argparse.Namespace) -> None:
+    history, _ = synthetic_nav_history(args.funds, args.years, seed=args.seed, late_start_share=0.0)
+    transactions = synthetic_transactions(history, args.folios, seed=args.seed)
+    days = history.dates[-args.days:]
+    frames = daily_holdings(history, transactions, days)
+    print(f"History: {len(days)} daily snapshots of up to {max(len(frame) for frame in frames)} holdings")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        store = SnapshotStore(root / 'snapshots.sqlite')
+        start = time.perf_counter()
+        for day, frame in zip(days, frames):
+            store.record(frame, day)
+        elapsed = time.perf_counter() - start
+        rows = sum(len(frame) for frame in frames)
+        positions = store.conn.execute('SELECT COUNT(*) FROM positions').fetchone()[0]
+        print(f"record {len(days)} snapshots: {elapsed:.2f} s ({elapsed / len(days) * 1000:.1f} ms each); "
+              f"{positions:,} position rows stored for {rows:,} holding rows")
+
+        # The old way: one full CSV per day, replayed to answer questions
+        csv_dir = root / 'csv'
+        csv_dir.mkdir()
+        for day, frame in zip(days, frames):
+            frame.to_csv(csv_dir / f"holdings_{day:%Y%m%d}.csv", index=False)
+        store.conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        csv_bytes = sum(path.stat().st_size for path in csv_dir.iterdir())
+        print(f"size: SQLite {(root / 'snapshots.sqlite').stat().st_size / 2 ** 20:.1f} MiB, "
+              f"daily CSVs {csv_bytes / 2 ** 20:.1f} MiB")
+
+        def replay_first_held(code: str):
+            for path in sorted(csv_dir.iterdir()):
+                if code in pd.read_csv(path, dtype={'scheme_code': str})['scheme_code'].values:
+                    return pd.Timestamp(path.stem.split('_')[1])
+            return None
+
+        def replay_values() -> pd.Series:
+            return pd.Series({pd.Timestamp(path.stem.split('_')[1]): pd.read_csv(path)['current_value'].sum()
+                              for path in sorted(csv_dir.iterdir())})
+
+        late = store.entries()['first_held'].idxmax()
+        values = store.value_history()['total_value']
+        checks = {
+            'first held matches replay': store.first_held(late) == replay_first_held(late),
+            'value history matches replay': np.allclose(values.to_numpy(), replay_values().to_numpy()),
+            'holdings on a date match': np.isclose(store.holdings_on(days[len(days) // 2])['current_value'].sum(),
+                                                   frames[len(days) // 2]['current_value'].sum()),
+        }
+        for name, ok in checks.items():
+            print(f"  {name}: {'yes' if ok else 'NO'}")
+
+        report("value over time (store)", time_runs(store.value_history, args.repeat))
+        report("value over time (replay CSVs)", time_runs(replay_values, 1))
+        report(f"when did {late} enter (store)", time_runs(lambda: store.first_held(late), args.repeat))
+        report(f"when did {late} enter (replay CSVs)", time_runs(lambda: replay_first_held(late), 1))
+        report("holdings on a past date", time_runs(lambda: store.holdings_on(days[len(days) // 2]), args.repeat))
+        report(f"history of scheme {late}", time_runs(lambda: store.scheme_history(late), args.repeat))
+        store.close()
+
+
+def bench_export(args: argparse.Namespace) -> None:
+    history, benchmark = synthetic_nav_history(args.funds, args.years, seed=args.seed, late_start_share=0.0)
+    analyzer = MFPortfolioAnalyzer()
+    analyzer.holdings = synthetic_portfolio(history, synthetic_transactions(history, args.funds * 2, seed=args.seed))
+    analyzer.load_nav_history(history.select(analyzer.holdings['scheme_code']), benchmark)
+    navs = analyzer.nav_history.to_frame().rename_axis('date')
+    tables = {'Holdings': analyzer.holdings, 'Allocation': analyzer.analyze_allocation(), 'NAV History': navs,
+              'Risk Metrics': analyzer.get_risk_metrics()}
+    print(f"Tables: {', '.join(f'{name} {len(df):,} x {df.shape[1]}' for name, df in tables.items())}")
+
+    def openpyxl_export(path: Path) -> None:
+        with pd.ExcelWriter(path, engine='openpyxl') as writer:
+            for name, df in tables.items():
+                df.to_excel(writer, sheet_name=name)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        export_tables(tables, root / 'streamed.xlsx')
+        back = pd.read_excel(root / 'streamed.xlsx', sheet_name='NAV History', index_col=0)
+        back.columns = back.columns.astype(str)
+        same = back.index.equals(navs.index) and np.allclose(back.to_numpy(), navs.to_numpy(), equal_nan=True)
+        print(f"  NAV History reads back unchanged: {'yes' if same else 'NO'}")
+
+        tracemalloc.start()
+        export_tables(tables, root / 'traced.xlsx', verbose=False)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"peak memory, streamed xlsx: {peak / 2 ** 20:.0f} MiB "
+              f"(NAV History frame: {navs.memory_usage().sum() / 2 ** 20:.0f} MiB)")
+
+        report("xlsx, streamed", time_runs(lambda: export_tables(tables, root / 'a.xlsx', verbose=False),
+                                           args.repeat))
+        report("xlsx, pandas + openpyxl", time_runs(lambda: openpyxl_export(root / 'b.xlsx'), 1))
+        report("parquet", time_runs(lambda: export_tables(tables, root / 'parquet', 'parquet', verbose=False),
+                                    args.repeat))
+        report("csv", time_runs(lambda: export_tables(tables, root / 'csv', 'csv', verbose=False), args.repeat))
+        for name in ('a.xlsx', 'b.xlsx'):
+            print(f"  {name}: {(root / name).stat().st_size / 2 ** 20:.1f} MiB")
+
+
+def reference_relative(history, levels: np.ndarray, risk_free: float) -> pd.DataFrame:
+    """Per-fund pandas/np.polyfit alpha, beta and capture on the days both have a return"""
+    rf = _daily_rate(risk_free)
+    rows = []
+    for i, code in enumerate(history.codes):
+        pair = pd.DataFrame({'r': history.navs[:, i], 'b': levels[:, i]}).pct_change(fill_method=None).dropna()
+        beta, intercept = np.polyfit(pair['b'] - rf, pair['r'] - rf, 1)
+        up, down = pair[pair['b'] > 0], pair[pair['b'] < 0]
+        rows.append({'scheme_code': code, 'alpha': intercept * TRADING_DAYS, 'beta': beta,
+                     'up_capture': up['r'].sum() / up['b'].sum() * 100,
+                     'down_capture': down['r'].sum() / down['b'].sum() * 100})
+    return pd.DataFrame(rows).set_index('scheme_code')
+
+
+def bench_benchmarks(args: argparse.Namespace) -> None:
+    history, market = synthetic_nav_history(args.funds, args.years, seed=args.seed)
+    levels = synthetic_benchmarks(history.dates, market, seed=args.seed)
+    categories = [CATEGORIES[i % len(CATEGORIES)] for i in range(args.funds)]
+    print(f"History: {args.funds} funds x {len(history.dates):,} days; {levels.shape[1]} indices on their own "
+          f"calendar ({len(levels.index.difference(history.dates))} extra, "
+          f"{len(history.dates.difference(levels.index))} missing days)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = NAVCache(Path(tmp))
+        store_levels(cache, levels)
+        benchmarks = load_levels(cache, levels.columns, history.dates)
+        names = assign(benchmarks, categories)
+
+        # Per fund: align its index from the cache, then regress in pandas
+        def per_fund_levels() -> np.ndarray:
+            return np.column_stack([cache.load_series(name, history.dates) for name in names])
+
+        def batched_levels() -> np.ndarray:
+            return levels_for(load_levels(cache, levels.columns, history.dates), names)
+
+        aligned = batched_levels()
+        table = relative_metrics(history, benchmarks, names, args.risk_free)
+        reference = reference_relative(history, aligned, args.risk_free)
+        checks = {
+            'aligned levels match per-index load_series': np.allclose(aligned, per_fund_levels(), equal_nan=True),
+            'alpha, beta and capture match per-fund polyfit': np.allclose(
+                table[reference.columns].to_numpy(), reference.to_numpy(), rtol=1e-6, atol=1e-9),
+        }
+        for name, ok in checks.items():
+            print(f"  {name}: {'yes' if ok else 'NO'}")
+
+        report("align, per fund (load_series each)", time_runs(per_fund_levels, 1))
+        report("align, one reindex + ffill", time_runs(batched_levels, args.repeat))
+        report("alpha/beta/capture, per fund (pandas)",
+               time_runs(lambda: reference_relative(history, aligned, args.risk_free), 1))
+        report("alpha/beta/capture, batched",
+               time_runs(lambda: relative_metrics(history, benchmarks, names, args.risk_free), args.repeat))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmarks for mf_analyze")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    nav = sub.add_parser("nav", help="NAV-history metrics across many funds")
+    nav.add_argument("--funds", type=int, default=500, help="Number of funds (default: 500)")
+    nav.add_argument("--years", type=float, default=10, help="Years of daily data (default: 10)")
+    nav.add_argument("--seed", type=int, default=42, help="Random seed (default: 42)")
+    nav.add_argument("--repeat", type=int, default=5, help="Timed runs (default: 5)")
+    nav.set_defaults(func=bench_nav)
+
+    cache = sub.add_parser("cache", help="NAV cache refresh and load times")
+    cache.add_argument("--funds", type=int, default=200, help="Number of funds (default: 200)")
+    cache.add_argument("--years", type=float, default=10, help="Years of daily data (default: 10)")
+    cache.add_argument("--seed", type=int, default=42, help="Random seed (default: 42)")
+    cache.add_argument("--repeat", type=int, default=5, help="Timed runs (default: 5)")
+    cache.set_defaults(func=bench_cache)
+
+    amfi = sub.add_parser("amfi", help="AMFI scheme master load and lookup times")
+    amfi.add_argument("--schemes", type=int, default=40000, help="Schemes in the master (default: 40000)")
+    amfi.add_argument("--lookups", type=int, default=5000, help="ISINs to resolve (default: 5000)")
+    amfi.add_argument("--seed", type=int, default=42, help="Random seed (default: 42)")
+    amfi.add_argument("--repeat", type=int, default=5, help="Timed runs (default: 5)")
+    amfi.set_defaults(func=bench_amfi)
+
+    roll = sub.add_parser("rolling", help="Rolling-window kernels vs a pandas reference")
+    roll.add_argument("--funds", type=int, default=200, help="Number of funds (default: 200)")
+    roll.add_argument("--years", type=float, default=10, help="Years of daily data (default: 10)")
+    roll.add_argument("--window-years", type=float, default=3, help="Rolling window in years (default: 3)")
+    roll.add_argument("--check-funds", type=int, default=5, help="Funds cross-checked against the reference (default: 5)")
+    roll.add_argument("--seed", type=int, default=42, help="Random seed (default: 42)")
+    roll.add_argument("--repeat", type=int, default=3, help="Timed runs (default: 3)")
+    roll.set_defaults(func=bench_rolling)
+
+    screen = sub.add_parser("screen", help="Category screener on a synthetic category fixture")
+    screen.add_argument("--funds", type=int, default=200, help="Funds in the category (default: 200)")
+    screen.add_argument("--years", type=float, default=10, help="Years of daily data (default: 10)")
+    screen.add_argument("--workers", type=int, default=8, help="Concurrent fetches (default: 8)")
+    screen.add_argument("--latency-ms", type=float, default=50, help="Simulated latency per fetch (default: 50)")
+    screen.add_argument("--seed", type=int, default=42, help="Random seed (default: 42)")
+    screen.add_argument("--repeat", type=int, default=3, help="Timed runs (default: 3)")
+    screen.set_defaults(func=bench_screen)
+
+    ovl = sub.add_parser("overlap", help="Sparse holdings-overlap engine")
+    ovl.add_argument("--funds", type=int, default=1500, help="Number of funds (default: 1500)")
+    ovl.add_argument("--securities", type=int, default=2500, help="Number of securities (default: 2500)")
+    ovl.add_argument("--seed", type=int, default=42, help="Random seed (default: 42)")
+    ovl.add_argument("--repeat", type=int, default=3, help="Timed runs (default: 3)")
+    ovl.set_defaults(func=bench_overlap)
+
+    corr = sub.add_parser("corr", help="Pairwise covariance/correlation and incremental updates")
+    corr.add_argument("--funds", type=int, default=500, help="Number of funds (default: 500)")
+    corr.add_argument("--years", type=float, default=10, help="Years of daily data (default: 10)")
+    corr.add_argument("--seed", type=int, default=42, help="Random seed (default: 42)")
+    corr.add_argument("--repeat", type=int, default=3, help="Timed runs (default: 3)")
+    corr.set_defaults(func=bench_corr)
+
+    rep = sub.add_parser("report", help="Import time and headless report rendering")
+    rep.add_argument("--years", type=float, default=6, help="Years of synthetic NAVs (default: 6)")
+    rep.add_argument("--jobs", type=int, default=4, help="Charts rendered in parallel (default: 4)")
+    rep.add_argument("--seed", type=int, default=42, help="Random seed (default: 42)")
+    rep.add_argument("--repeat", type=int, default=3, help="Timed runs (default: 3)")
+    rep.set_defaults(func=bench_report)
+
+    xr = sub.add_parser("xirr", help="Batched XIRR vs known values and a per-folio reference")
+    xr.add_argument("--folios", type=int, default=500, help="Number of SIP folios (default: 500)")
+    xr.add_argument("--funds", type=int, default=100, help="Number of funds (default: 100)")
+    xr.add_argument("--years", type=float, default=10, help="Years of daily data (default: 10)")
+    xr.add_argument("--seed", type=int, default=42, help="Random seed (default: 42)")
+    xr.add_argument("--repeat", type=int, default=5, help="Timed runs (default: 5)")
+    xr.set_defaults(func=bench_xirr)
+
+    tax = sub.add_parser("tax", help="FIFO tax lots vs a lot-by-lot reference")
+    tax.add_argument("--folios", type=int, default=60, help="Number of SIP folios (default: 60)")
+    tax.add_argument("--funds", type=int, default=40, help="Number of funds (default: 40)")
+    tax.add_argument("--years", type=float, default=10, help="Years of daily data (default: 10)")
+    tax.add_argument("--seed", type=int, default=42, help="Random seed (default: 42)")
+    tax.add_argument("--repeat", type=int, default=5, help="Timed runs (default: 5)")
+    tax.set_defaults(func=bench_tax)
+
+    reb = sub.add_parser("rebalance", help="Rebalancing MILP and Monte Carlo stress test")
+    reb.add_argument("--funds", type=int, default=60, help="Funds to draw folios from (default: 60)")
+    reb.add_argument("--folios", type=int, default=150, help="Number of SIP folios (default: 150)")
+    reb.add_argument("--years", type=float, default=10, help="Years of daily data (default: 10)")
+    reb.add_argument("--min-trade", type=float, default=1000, help="Minimum trade in rupees (default: 1000)")
+    reb.add_argument("--scenarios", type=int, default=10000, help="Stress scenarios (default: 10000)")
+    reb.add_argument("--seed", type=int, default=42, help="Random seed (default: 42)")
+    reb.add_argument("--repeat", type=int, default=3, help="Timed runs (default: 3)")
+    reb.set_defaults(func=bench_rebalance)
+
+    proj = sub.add_parser("project", help="Block-bootstrap SIP projections")
+    proj.add_argument("--funds", type=int, default=20, help="Funds in the portfolio (default: 20)")
+    proj.add_argument("--history-years", type=float, default=10, help="Years of NAV history (default: 10)")
+    proj.add_argument("--horizon", type=int, default=20, help="Projection horizon in years (default: 20)")
+    proj.add_argument("--monthly", type=float, default=10000, help="Monthly SIP in rupees (default: 10000)")
+    proj.add_argument("--paths", type=int, default=100000, help="Simulated paths (default: 100000)")
+    proj.add_argument("--jobs", type=int, default=4, help="Processes for the pooled run (default: 4)")
+    proj.add_argument("--seed", type=int, default=42, help="Random seed (default: 42)")
+    proj.add_argument("--repeat", type=int, default=3, help="Timed runs (default: 3)")
+    proj.set_defaults(func=bench_project)
+
+    kite = sub.add_parser("kite", help="Kite client against the local mock server")
+    kite.add_argument("--holdings", type=int, default=25, help="Holdings in the account (default: 25)")
+    kite.add_argument("--orders", type=int, default=40, help="Recent orders (default: 40)")
+    kite.add_argument("--instruments", type=int, default=3000, help="MF instruments (default: 3000)")
+    kite.add_argument("--latency-ms", type=float, default=30, help="Server latency per request (default: 30)")
+    kite.add_argument("--requests", type=int, default=40, help="Requests in the pooling burst (default: 40)")
+    kite.add_argument("--seed", type=int, default=42, help="Random seed (default: 42)")
+    kite.add_argument("--repeat", type=int, default=3, help="Timed runs (default: 3)")
+    kite.set_defaults(func=bench_kite)
+
+    snap = sub.add_parser("snapshots", help="Holdings snapshot store vs replaying daily CSVs")
+    snap.add_argument("--funds", type=int, default=200, help="Funds to draw folios from (default: 200)")
+    snap.add_argument("--folios", type=int, default=400, help="Number of SIP folios (default: 400)")
+    snap.add_argument("--years", type=float, default=3, help="Years of daily data (default: 3)")
+    snap.add_argument("--days", type=int, default=750, help="Daily snapshots recorded (default: 750)")
+    snap.add_argument("--seed", type=int, default=42, help="Random seed (default: 42)")
+    snap.add_argument("--repeat", type=int, default=5, help="Timed runs (default: 5)")
+    snap.set_defaults(func=bench_snapshots)
+
+    exp = sub.add_parser("export", help="Streaming xlsx/parquet/csv export vs pandas + openpyxl")
+    exp.add_argument("--funds", type=int, default=200, help="Number of funds (default: 200)")
+    exp.add_argument("--years", type=float, default=10, help="Years of daily data (default: 10)")
+    exp.add_argument("--seed", type=int, default=42, help="Random seed (default: 42)")
+    exp.add_argument("--repeat", type=int, default=3, help="Timed runs (default: 3)")
+    exp.set_defaults(func=bench_export)
+
+    bm = sub.add_parser("benchmarks", help="Category benchmark alignment and batched alpha/beta/capture")
+    bm.add_argument("--funds", type=int, default=1000, help="Number of funds (default: 1000)")
+    bm.add_argument("--years", type=float, default=10, help="Years of daily data (default: 10)")
+    bm.add_argument("--risk-free", type=float, default=RISK_FREE_RATE, help="Annual risk-free rate (default: 0.065)")
+    bm.add_argument("--seed", type=int, default=42, help="Random seed (default: 42)")
+    bm.add_argument("--repeat", type=int, default=5, help="Timed runs (default: 5)")
+    bm.set_defaults(func=bench_benchmarks)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+Benchmark Indices
+
+Total-return index (TRI) levels for the indices funds are measured
+against, aligned with fund NAVs on the NAV history's trading-day calendar:
+- Levels come from the local NAV cache (one Feather file per index, e.g.
+  'NIFTY 500 TRI') or a fixture: a niftyindices.com TRI export, or any
+  table of levels indexed by date with one column per index
+- Every index is placed on the funds' calendar with one reindex and
+  forward-fill, so index holidays carry the last level. The result is a
+  NAVHistory keyed by index name: one (days, indices) array
+- Each fund is measured against the TRI of its SEBI category
+  (CATEGORY_BENCHMARKS). levels_for() hands the metrics a (days, funds)
+  array, so alpha, beta and capture ratios for a whole portfolio are one
+  batched computation
+
+    python benchmarks.py data/NIFTY_500_TRI.csv data/NIFTY_100_TRI.csv
+"""
+
+import argparse
+from pathlib import Path
+from typing import Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from amfi_master import short_category
+from nav_cache import NAVCache
+from nav_history import RISK_FREE_RATE, NAVHistory
+
+# Short category (as in holdings) -> TRI it is benchmarked against (SEBI tier-1 benchmarks)
+CATEGORY_BENCHMARKS = {
+    'Large Cap': 'NIFTY 100 TRI',
+    'Mid Cap': 'NIFTY MIDCAP 150 TRI',
+    'Small Cap': 'NIFTY SMALLCAP 250 TRI',
+    'Large & Mid Cap': 'NIFTY LARGEMIDCAP 250 TRI',
+    'Multi Cap': 'NIFTY 500 MULTICAP 50:25:25 TRI',
+    'Flexi Cap': 'NIFTY 500 TRI',
+    'Focused': 'NIFTY 500 TRI',
+    'Value': 'NIFTY 500 TRI',
+    'ELSS': 'NIFTY 500 TRI',
+    'Index Funds': 'NIFTY 50 TRI',
+}
+
+# Broad-market index for categories without their own
+DEFAULT_BENCHMARK = 'NIFTY 500 TRI'
+
+_CATEGORY_KEYS = {category.lower(): index for category, index in CATEGORY_BENCHMARKS.items()}
+
+
+def benchmark_for(category: Optional[str]) -> str:
+    """
+    TRI for a category, short ('Mid Cap') or full AMFI label ('Equity Scheme - Mid Cap Fund')
+    """
+    if category is None or pd.isna(category):
+        return DEFAULT_BENCHMARK
+    return _CATEGORY_KEYS.get(short_category(category).lower(), DEFAULT_BENCHMARK)
+
+
+def read_tri_csv(path, name: Optional[str] = None) -> pd.DataFrame:
+    """
+    TRI levels from a CSV, one column per index indexed by date
+
+    Reads niftyindices.com exports (Index Name, Date, Total Returns Index)
+    and plain date/value files; without an index-name column the series is
+    named ``name`` or after the file.
+    """
+    df = pd.read_csv(path)
+    columns = {column.strip().lower(): column for column in df.columns}
+    date_col = columns.get('date')
+    value_col = next((columns[key] for key in columns if 'total return' in key or 'totalreturn' in key),
+                     next((columns[key] for key in ('tri', 'close', 'value') if key in columns), None))
+    if date_col is None or value_col is None:
+        raise ValueError(f"{path}: expected a Date column and a Total Returns Index / close / value column")
+
+    dates = pd.to_datetime(df[date_col].astype(str).str.strip(), format='mixed', dayfirst=True)
+    values = pd.to_numeric(df[value_col].astype(str).str.replace(',', '', regex=False), errors='coerce')
+    names = (df[columns['index name']].astype(str).str.strip() if 'index name' in columns
+             else pd.Series(name or Path(path).stem.replace('_', ' '), index=df.index))
+    levels = pd.DataFrame({'date': dates, 'index': names, 'value': values}).dropna()
+    return levels.pivot_table(index='date', columns='index', values='value', aggfunc='last').rename_axis(
+        index='date', columns=None)
+
+
+def align_levels(levels: pd.DataFrame, dates: pd.DatetimeIndex) -> NAVHistory:
+    """
+    Index levels (date index, one column per index) on ``dates``, carrying the last level forward
+
+    Dates before an index's first level stay NaN.
+    """
+    levels = levels[~levels.index.duplicated(keep='last')].sort_index()
+    aligned = levels.ffill().reindex(pd.DatetimeIndex(dates), method='ffill')
+    return NAVHistory(dates, [str(column) for column in aligned.columns],
+                      aligned.to_numpy(dtype=np.float64, na_value=np.nan))
+
+
+def load_levels(cache: NAVCache, names: Iterable[str], dates: pd.DatetimeIndex) -> NAVHistory:
+    """
+    Cached index levels aligned to ``dates`` (indices not in the cache are skipped)
+    """
+    series = {str(name): cache.read(name) for name in dict.fromkeys(names)}
+    missing = [name for name, values in series.items() if not len(values)]
+    if missing:
+        print(f"⚠️ No cached levels for: {', '.join(missing)}")
+    series = {name: values for name, values in series.items() if len(values)}
+    if not series:
+        return NAVHistory(dates, [], np.empty((len(dates), 0)))
+    return align_levels(pd.concat(series, axis=1), dates)
+
+
+def store_levels(cache: NAVCache, levels: pd.DataFrame) -> List[str]:
+    """
+    Write every index in ``levels`` to the cache, e.g. from read_tri_csv() or a fixture
+    """
+    for name in levels.columns:
+        cache.write(str(name), levels[name])
+    return [str(name) for name in levels.columns]
+
+
+def assign(benchmarks: NAVHistory, categories: Iterable[Optional[str]]) -> List[str]:
+    """
+    Index for each fund's category, falling back to DEFAULT_BENCHMARK when that index isn't loaded
+    """
+    names = [benchmark_for(category) for category in categories]
+    unavailable = sorted({name for name in names if name not in benchmarks})
+    if unavailable:
+        if DEFAULT_BENCHMARK not in benchmarks:
+            raise ValueError(f"Benchmark levels missing for {', '.join(unavailable)} and {DEFAULT_BENCHMARK}")
+        print(f"⚠️ Using {DEFAULT_BENCHMARK} in place of: {', '.join(unavailable)}")
+        names = [name if name in benchmarks else DEFAULT_BENCHMARK for name in names]
+    return names
+
+
+def levels_for(benchmarks: NAVHistory, names: Sequence[str]) -> np.ndarray:
+    """
+    (days, funds) array with the levels of each fund's index, one column per entry of ``names``
+    """
+    columns = {code: i for i, code in enumerate(benchmarks.codes)}
+    return benchmarks.navs[:, [columns[str(name)] for name in names]]
+
+
+def relative_metrics(history: NAVHistory, benchmarks: NAVHistory, names: Sequence[str],
+                     risk_free: float = RISK_FREE_RATE) -> pd.DataFrame:
+    """
+    Alpha, beta and capture ratios of every scheme in ``history`` against its index in ``names``
+
+    ``benchmarks`` must be aligned to ``history.dates`` (align_levels / load_levels).
+    """
+    if not benchmarks.dates.equals(history.dates):
+        raise ValueError("Benchmark levels are not on the NAV history's calendar; align them first")
+    table = history.relative_metrics(levels_for(benchmarks, names), risk_free)
+    table.insert(0, 'benchmark', list(names))
+    return table
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Import TRI CSVs (e.g. niftyindices.com exports) into the NAV cache")
+    parser.add_argument("files", nargs='+', type=Path, help="CSV files of index levels")
+    parser.add_argument("--name", help="Index name for files without an Index Name column")
+    args = parser.parse_args()
+
+    cache = NAVCache()
+    for path in args.files:
+        levels = read_tri_csv(path, args.name)
+        for name in store_levels(cache, levels):
+            values = levels[name].dropna()
+            print(f"✅ {name}: {len(values):,} days, {values.index[0]:%Y-%m-%d} to {values.index[-1]:%Y-%m-%d}")
+
+
+if __name__ == "__main__":
+    main()
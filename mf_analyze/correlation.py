@@ -0,0 +1,231 @@
+"""
+Fund Return Covariance and Correlation
+
+Covariance and correlation of daily fund returns from a NAVHistory, for
+funds with different inception dates:
+- Pairwise-complete: each pair of funds uses the days on which both have
+  a return, for all pairs at once through masked matrix products
+- Ledoit-Wolf shrinkage towards the constant-correlation target, which
+  tames noisy pairs with little common history
+- Incremental: CovarianceState keeps the per-pair sums the estimates are
+  built from, so a nightly refresh adds only the new days (O(new days x N^2))
+  instead of recomputing from the full history; it can be saved between runs
+
+Returns are small numbers (~1e-2), so raw power sums stay accurate in
+float64 without centring.
+"""
+
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+from nav_history import NAVHistory, TRADING_DAYS
+
+# Pairs with fewer common days than this get NaN
+MIN_PERIODS = 20
+
+# Bump when the saved state layout changes
+STATE_VERSION = 1
+
+# Masked power sums kept per pair; entry [i, j] sums over days where both i and j have a return
+#   count: days    s1: x_i    s2: x_i^2    s3: x_i^3
+#   s11: x_i x_j   s21: x_i^2 x_j   s31: x_i^3 x_j   s22: x_i^2 x_j^2
+STAT_NAMES = ('count', 's1', 's2', 's3', 's11', 's21', 's31', 's22')
+
+
+def _power_sums(returns: np.ndarray) -> dict:
+    valid = ~np.isnan(returns)
+    mask = valid.astype(np.float64)
+    x1 = np.where(valid, returns, 0.0)
+    x2 = x1 * x1
+    x3 = x2 * x1
+    return {
+        'count': mask.T @ mask,
+        's1': x1.T @ mask, 's2': x2.T @ mask, 's3': x3.T @ mask,
+        's11': x1.T @ x1, 's21': x2.T @ x1, 's31': x3.T @ x1, 's22': x2.T @ x2,
+    }
+
+
+def _nearest_psd(cov: np.ndarray, floor: float = 1e-10) -> np.ndarray:
+    """
+    Clip negative eigenvalues, keeping the variances on the diagonal
+
+    Pairwise-complete estimates mix different date ranges, so the matrix
+    need not be positive semi-definite, which optimisers require.
+    """
+    sd = np.sqrt(np.diag(cov))
+    corr = cov / np.outer(sd, sd)
+    eigenvalues, vectors = np.linalg.eigh(corr)
+    if eigenvalues.min() >= 0:
+        return cov
+    corr = (vectors * np.maximum(eigenvalues, floor)) @ vectors.T
+    scale = np.sqrt(np.diag(corr))
+    return corr / np.outer(scale, scale) * np.outer(sd, sd)
+
+
+class CovarianceState:
+    """
+    Running pairwise sums of daily returns for a fixed list of scheme codes
+    """
+
+    def __init__(self, codes, stats: dict, last_date, last_navs: np.ndarray):
+        self.codes: List[str] = [str(code) for code in codes]
+        self.stats = stats
+        self.last_date = None if last_date is None else pd.Timestamp(last_date)
+        self.last_navs = np.asarray(last_navs, dtype=np.float64)
+
+    @classmethod
+    def from_history(cls, history: NAVHistory) -> 'CovarianceState':
+        state = cls(history.codes, {name: np.zeros((len(history), len(history))) for name in STAT_NAMES},
+                    None, np.full(len(history), np.nan))
+        state.update(history)
+        return state
+
+    def update(self, history: NAVHistory) -> int:
+        """
+        Add the days in ``history`` after ``last_date``; returns the number of days added
+        """
+        # Check the dates before slicing: a refresh with no new days is the common case
+        if len(history.dates) == 0 or (self.last_date is not None and history.dates[-1] <= self.last_date):
+            return 0
+        if self.last_date is not None:
+            history = history.slice(start=self.last_date + pd.Timedelta(days=1))
+        navs = history.select(self.codes).navs
+        previous = np.vstack([self.last_navs.reshape(1, -1), navs[:-1]])
+        with np.errstate(invalid='ignore'):
+            returns = navs / previous - 1.0
+        for name, values in _power_sums(returns).items():
+            self.stats[name] += values
+        self.last_date = history.dates[-1]
+        # Keep the previous NAV for funds with no NAV yet (still NaN before inception)
+        self.last_navs = np.where(np.isnan(navs[-1]), self.last_navs, navs[-1])
+        return len(history.dates)
+
+    def save(self, path: Path) -> None:
+        np.savez(path, version=STATE_VERSION, codes=np.array(self.codes, dtype=str),
+                 last_date=np.array(self.last_date.value if self.last_date is not None else -1),
+                 last_navs=self.last_navs, **self.stats)
+
+    @classmethod
+    def load(cls, path: Path) -> Optional['CovarianceState']:
+        """
+        Saved state, or None if missing or written by an older layout
+        """
+        path = Path(path)
+        if not path.exists():
+            return None
+        with np.load(path, allow_pickle=False) as data:
+            if int(data['version']) != STATE_VERSION:
+                return None
+            last_date = int(data['last_date'])
+            return cls(data['codes'], {name: data[name] for name in STAT_NAMES},
+                       None if last_date < 0 else pd.Timestamp(last_date), data['last_navs'])
+
+    # ---- estimates ------------------------------------------------------------
+
+    def _moments(self):
+        # Pairwise means, variances and covariance (biased, 1/n) over each pair's common days
+        s = self.stats
+        n = s['count']
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean_i = s['s1'] / n                     # mean of i over days shared with j
+            mean_j = mean_i.T
+            cov = s['s11'] / n - mean_i * mean_j
+            var_i = s['s2'] / n - mean_i * mean_i
+        return n, mean_i, mean_j, cov, var_i
+
+    def mean(self, annualise: bool = False) -> pd.Series:
+        """
+        Mean daily return of each fund over all its days
+        """
+        with np.errstate(divide='ignore', invalid='ignore'):
+            values = np.diag(self.stats['s1']) / np.diag(self.stats['count'])
+        return pd.Series(values * (TRADING_DAYS if annualise else 1.0),
+                         index=pd.Index(self.codes, name='scheme_code'), name='mean_return')
+
+    def covariance(self, min_periods: int = MIN_PERIODS, annualise: bool = False) -> pd.DataFrame:
+        """
+        Pairwise-complete sample covariance (ddof=1) of daily returns
+        """
+        n, _, _, cov, _ = self._moments()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            values = np.where(n >= max(min_periods, 2), cov * n / (n - 1), np.nan)
+        return self._frame(values * (TRADING_DAYS if annualise else 1.0))
+
+    def correlation(self, min_periods: int = MIN_PERIODS) -> pd.DataFrame:
+        """
+        Pairwise-complete correlation; each pair is standardised over its common days
+        """
+        n, _, _, cov, var_i = self._moments()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            values = np.where(n >= max(min_periods, 2), cov / np.sqrt(var_i * var_i.T), np.nan)
+        np.fill_diagonal(values, np.where(np.diag(n) >= max(min_periods, 2), 1.0, np.nan))
+        return self._frame(np.clip(values, -1.0, 1.0))
+
+    def shrunk_covariance(self, min_periods: int = MIN_PERIODS, annualise: bool = False):
+        """
+        Ledoit-Wolf shrinkage of the covariance towards constant correlation
+
+        Returns (covariance DataFrame, shrinkage intensity in [0, 1]). Funds
+        with fewer than ``min_periods`` days are left out. With complete data
+        this is the Ledoit & Wolf (2004) estimator; with gaps each pair's
+        estimation noise is scaled by its own number of common days, and the
+        result is repaired to be positive semi-definite.
+        """
+        keep = np.diag(self.stats['count']) >= max(min_periods, 2)
+        s = {name: values[np.ix_(keep, keep)] for name, values in self.stats.items()}
+        n = s['count']
+        with np.errstate(divide='ignore', invalid='ignore'):
+            a = s['s1'] / n                          # mean of i on the pair's common days
+            b = a.T                                  # mean of j on the pair's common days
+            sample = s['s11'] / n - a * b
+            var = np.diag(sample).copy()
+            sd = np.sqrt(var)
+
+            corr = sample / np.outer(sd, sd)
+            off = ~np.eye(len(var), dtype=bool) & (n >= 2)
+            r_bar = corr[off].mean() if off.any() else 0.0
+            prior = r_bar * np.outer(sd, sd)
+            np.fill_diagonal(prior, var)
+            # Pairs that never overlap carry no information: use the target
+            sample = np.where(n >= 2, sample, prior)
+
+            # pi_ij: variance of y_i y_j, from the centred 4th moment on common days
+            s2_j = s['s2'].T
+            s1_j = s['s1'].T
+            fourth = (s['s22'] - 2 * b * s['s21'] - 2 * a * s['s21'].T + b * b * s['s2'] + a * a * s2_j
+                      + 4 * a * b * s['s11'] - 2 * a * b * b * s['s1'] - 2 * a * a * b * s1_j
+                      + a * a * b * b * n) / n
+            pi = fourth - sample * sample
+
+            # theta_ij: covariance of y_i^2 with y_i y_j
+            third = (s['s31'] - b * s['s3'] - 3 * a * s['s21'] + 3 * a * b * s['s2'] + 3 * a * a * s['s11']
+                     - 3 * a * a * b * s['s1'] - a ** 3 * s1_j + a ** 3 * b * n) / n
+            var_i = s['s2'] / n - a * a
+            theta = third - var_i * sample
+
+            weights = np.where(n >= 2, 1.0 / n, 0.0)
+            pi_sum = np.nansum(pi * weights)
+            ratio = np.outer(1.0 / sd, sd)           # sqrt(var_j / var_i)
+            rho = np.nansum(np.diag(pi) * np.diag(weights)) + r_bar * np.nansum((ratio * theta * weights)[off])
+            gamma = np.sum((sample - prior) ** 2)
+            intensity = float(np.clip((pi_sum - rho) / gamma, 0.0, 1.0)) if gamma > 0 else 1.0
+
+        shrunk = _nearest_psd(intensity * prior + (1.0 - intensity) * sample)
+        codes = [code for code, kept in zip(self.codes, keep) if kept]
+        frame = pd.DataFrame(shrunk * (TRADING_DAYS if annualise else 1.0),
+                             index=pd.Index(codes, name='scheme_code'), columns=codes)
+        return frame, intensity
+
+    def shrunk_correlation(self, min_periods: int = MIN_PERIODS):
+        """
+        Correlation implied by shrunk_covariance(); returns (DataFrame, intensity)
+        """
+        cov, intensity = self.shrunk_covariance(min_periods)
+        sd = np.sqrt(np.diag(cov.to_numpy()))
+        return cov / np.outer(sd, sd), intensity
+
+    def _frame(self, values: np.ndarray) -> pd.DataFrame:
+        return pd.DataFrame(values, index=pd.Index(self.codes, name='scheme_code'), columns=self.codes)
@@ -0,0 +1,311 @@
+"""
+Analysis Export
+
+Writes named tables (holdings, summary, allocation, NAV history, screener
+results...) to Excel, Parquet or CSV in fixed-size row chunks, so memory
+stays flat however large the tables are:
+- xlsx: a write-only workbook streamed straight into the zip archive. Each
+  chunk's sheet XML is built with vectorised string operations, and no
+  workbook object is kept in memory. Tables longer than Excel's row limit
+  continue on further sheets
+- parquet: one file per table, one row group per chunk (pyarrow)
+- csv: one file per table, appended chunk by chunk
+
+Each table's write is timed and reported. Files are written to a temporary
+name and moved into place, so a failed export never leaves half a file.
+
+    python export.py --format parquet --output data/exports --funds 200 --years 10
+"""
+
+import argparse
+import os
+import re
+import time
+import zipfile
+from pathlib import Path
+from typing import Dict, Optional
+from xml.sax.saxutils import escape
+
+import numpy as np
+import pandas as pd
+
+FORMATS = ('xlsx', 'parquet', 'csv')
+
+# Rows formatted and written per step (xlsx chunks are also capped at XLSX_CHUNK_CELLS cells)
+CHUNK_ROWS = 50000
+XLSX_CHUNK_CELLS = 100000
+
+# Rows per Excel sheet, including the header row
+EXCEL_MAX_ROWS = 1048576
+
+DEFAULT_EXPORT_DIR = Path(__file__).resolve().parent / 'data' / 'exports'
+
+_EXCEL_EPOCH = np.datetime64('1899-12-30', 'ns')
+_ILLEGAL_XML = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+_SHEET_NAME = re.compile(r'[\[\]:*?/\\]')
+_QUOTE = {'"': '&quot;'}
+
+# Cell styles in _STYLES: 0 general, 1 date, 2 date and time
+_STYLES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">
+<numFmts count="2"><numFmt numFmtId="164" formatCode="yyyy-mm-dd"/><numFmt numFmtId="165" formatCode="yyyy-mm-dd hh:mm:ss"/></numFmts>
+<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>
+<fills count="2"><fill><patternFill patternType="none"/></fill><fill><patternFill patternType="gray125"/></fill></fills>
+<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>
+<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>
+<cellXfs count="3"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/><xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/><xf numFmtId="165" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/></cellXfs>
+<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>
+</styleSheet>"""
+
+_SHEET_HEAD = ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+               '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>')
+_SHEET_TAIL = '</sheetData></worksheet>'
+
+
+def _with_index(df: pd.DataFrame) -> pd.DataFrame:
+    # A meaningful index (dates, categories) is written as leading column(s)
+    if isinstance(df.index, pd.RangeIndex) and df.index.name is None:
+        return df
+    return df.reset_index()
+
+
+def _strings(values: pd.Series) -> np.ndarray:
+    text = values.astype(str).str.replace(_ILLEGAL_XML, '', regex=True)
+    text = text.str.replace('&', '&amp;', regex=False).str.replace('<', '&lt;', regex=False)
+    text = text.str.replace('>', '&gt;', regex=False)
+    return ('<c t="inlineStr"><is><t xml:space="preserve">' + text + '</t></is></c>').to_numpy(dtype=object)
+
+
+def _numbers(values: np.ndarray, style: str = '') -> np.ndarray:
+    values = np.asarray(values, dtype=np.float64)
+    cells = np.full(len(values), '<c/>', dtype=object)
+    finite = np.isfinite(values)
+    cells[finite] = (f'<c{style}><v>' + pd.Series(values[finite]).astype(str) + '</v></c>').to_numpy(dtype=object)
+    return cells
+
+
+def _cells(values: pd.Series, date_style: str) -> np.ndarray:
+    """
+    Sheet XML for one column chunk, one string per cell (missing values as empty cells)
+    """
+    if pd.api.types.is_bool_dtype(values):
+        return np.where(values.to_numpy(), '<c t="b"><v>1</v></c>', '<c t="b"><v>0</v></c>').astype(object)
+    if pd.api.types.is_integer_dtype(values) and not values.hasnans:
+        return ('<c><v>' + values.astype(str) + '</v></c>').to_numpy(dtype=object)
+    if pd.api.types.is_numeric_dtype(values):
+        return _numbers(values.to_numpy(dtype=np.float64, na_value=np.nan))
+    if pd.api.types.is_datetime64_any_dtype(values):
+        stamps = pd.DatetimeIndex(values)
+        if stamps.tz is not None:
+            stamps = stamps.tz_localize(None)
+        serial = (stamps.values.astype('datetime64[ns]') - _EXCEL_EPOCH) / np.timedelta64(1, 'D')
+        return _numbers(np.where(stamps.isna(), np.nan, serial), date_style)
+
+    cells = np.full(len(values), '<c/>', dtype=object)
+    present = values.notna().to_numpy()
+    numeric = present & values.map(lambda v: isinstance(v, (int, float, np.number))
+                                   and not isinstance(v, (bool, np.bool_))).to_numpy()
+    if numeric.any():
+        cells[numeric] = _numbers(values[numeric].astype(np.float64).to_numpy())
+    text = present & ~numeric
+    if text.any():
+        cells[text] = _strings(values[text])
+    return cells
+
+
+def _date_style(values: pd.Series) -> str:
+    if not pd.api.types.is_datetime64_any_dtype(values):
+        return ''
+    stamps = pd.DatetimeIndex(values)
+    return ' s="1"' if (stamps[stamps.notna()] == stamps[stamps.notna()].normalize()).all() else ' s="2"'
+
+
+def _sheet_names(name: str, n_rows: int) -> list:
+    base = _SHEET_NAME.sub('_', str(name))[:31] or 'Sheet'
+    n_sheets = max(1, -(-n_rows // (EXCEL_MAX_ROWS - 1)))
+    return [base] + [f"{base[:27]} ({i + 1})" for i in range(1, n_sheets)]
+
+
+def write_xlsx(tables: Dict[str, pd.DataFrame], path, chunk_rows: int = CHUNK_ROWS) -> Dict[str, float]:
+    """
+    Write each table to its own sheet of a write-only .xlsx; returns {table: seconds}
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    timings, sheets = {}, []
+    try:
+        with zipfile.ZipFile(tmp_path, 'w', compression=zipfile.ZIP_DEFLATED, compresslevel=1) as archive:
+            for name, df in tables.items():
+                start = time.perf_counter()
+                df = _with_index(df)
+                styles = [_date_style(df.iloc[:, i]) for i in range(df.shape[1])]
+                header = ''.join(_strings(pd.Series([str(column) for column in df.columns])))
+                per_sheet = EXCEL_MAX_ROWS - 1
+                step = max(1, min(chunk_rows, XLSX_CHUNK_CELLS // max(1, len(df.columns))))
+                for part, sheet_name in enumerate(_sheet_names(name, len(df))):
+                    sheets.append(sheet_name)
+                    rows = df.iloc[part * per_sheet:(part + 1) * per_sheet]
+                    with archive.open(f'xl/worksheets/sheet{len(sheets)}.xml', 'w', force_zip64=True) as sheet:
+                        sheet.write((_SHEET_HEAD + f'<row>{header}</row>').encode())
+                        for offset in range(0, len(rows), step):
+                            chunk = rows.iloc[offset:offset + step]
+                            columns = [_cells(chunk.iloc[:, i], style) for i, style in enumerate(styles)]
+                            grid = np.column_stack(columns) if columns else np.empty((len(chunk), 0), dtype=object)
+                            sheet.write(''.join(f"<row>{''.join(cells)}</row>" for cells in grid.tolist()).encode())
+                        sheet.write(_SHEET_TAIL.encode())
+                timings[name] = time.perf_counter() - start
+
+            entries = ''.join(f'<sheet name="{escape(sheet, _QUOTE)}" sheetId="{i}" r:id="rId{i}"/>'
+                              for i, sheet in enumerate(sheets, 1))
+            archive.writestr('[Content_Types].xml', (
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+                '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+                '<Default Extension="xml" ContentType="application/xml"/>'
+                '<Override PartName="/xl/workbook.xml" '
+                'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+                '<Override PartName="/xl/styles.xml" '
+                'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+                + ''.join(f'<Override PartName="/xl/worksheets/sheet{i}.xml" ContentType="application/'
+                          f'vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+                          for i in range(1, len(sheets) + 1))
+                + '</Types>'))
+            archive.writestr('_rels/.rels', (
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+                '<Relationship Id="rId1" Target="xl/workbook.xml" Type="http://schemas.openxmlformats.org/'
+                'officeDocument/2006/relationships/officeDocument"/></Relationships>'))
+            archive.writestr('xl/workbook.xml', (
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+                'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+                f'<sheets>{entries}</sheets></workbook>'))
+            archive.writestr('xl/_rels/workbook.xml.rels', (
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+                + ''.join(f'<Relationship Id="rId{i}" Target="worksheets/sheet{i}.xml" '
+                          f'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet"/>'
+                          for i in range(1, len(sheets) + 1))
+                + f'<Relationship Id="rId{len(sheets) + 1}" Target="styles.xml" '
+                'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles"/>'
+                '</Relationships>'))
+            archive.writestr('xl/styles.xml', _STYLES)
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+    return timings
+
+
+def _table_path(directory: Path, name: str, suffix: str) -> Path:
+    return directory / f"{re.sub(r'[^A-Za-z0-9_.-]+', '_', str(name)).strip('_') or 'table'}.{suffix}"
+
+
+def write_parquet(tables: Dict[str, pd.DataFrame], directory, chunk_rows: int = CHUNK_ROWS) -> Dict[str, float]:
+    """
+    Write each table to ``directory``/<name>.parquet, one row group per chunk; returns {table: seconds}
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    timings = {}
+    for name, df in tables.items():
+        start = time.perf_counter()
+        df = _with_index(df)
+        df.columns = [str(column) for column in df.columns]
+        # Arrow needs one type per column: mixed object columns (e.g. a summary's values) become text
+        mixed = [column for column in df.columns if df[column].dtype == object
+                 and pd.api.types.infer_dtype(df[column], skipna=True).startswith('mixed')]
+        if mixed:
+            df = df.astype({column: str for column in mixed})
+        path = _table_path(directory, name, 'parquet')
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        schema = pa.Schema.from_pandas(df.iloc[:chunk_rows], preserve_index=False)
+        try:
+            with pq.ParquetWriter(tmp_path, schema) as writer:
+                for offset in range(0, max(len(df), 1), chunk_rows):
+                    chunk = df.iloc[offset:offset + chunk_rows]
+                    writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+            os.replace(tmp_path, path)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+        timings[name] = time.perf_counter() - start
+    return timings
+
+
+def write_csv(tables: Dict[str, pd.DataFrame], directory, chunk_rows: int = CHUNK_ROWS) -> Dict[str, float]:
+    """
+    Write each table to ``directory``/<name>.csv, appending chunk by chunk; returns {table: seconds}
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    timings = {}
+    for name, df in tables.items():
+        start = time.perf_counter()
+        df = _with_index(df)
+        path = _table_path(directory, name, 'csv')
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        try:
+            with open(tmp_path, 'w', newline='', encoding='utf-8') as handle:
+                for offset in range(0, max(len(df), 1), chunk_rows):
+                    df.iloc[offset:offset + chunk_rows].to_csv(handle, header=offset == 0, index=False)
+            os.replace(tmp_path, path)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+        timings[name] = time.perf_counter() - start
+    return timings
+
+
+def export_tables(tables: Dict[str, pd.DataFrame], path, fmt: Optional[str] = None,
+                  chunk_rows: int = CHUNK_ROWS, verbose: bool = True) -> pd.DataFrame:
+    """
+    Export {name: DataFrame} as one .xlsx (a sheet per table) or a directory of parquet/csv files
+
+    ``fmt`` defaults to 'xlsx' for paths ending in .xlsx; parquet and csv
+    need it given. Returns rows, columns and seconds per table.
+    """
+    path = Path(path)
+    fmt = fmt or path.suffix.lstrip('.').lower()
+    writers = {'xlsx': write_xlsx, 'parquet': write_parquet, 'csv': write_csv}
+    if fmt not in writers:
+        raise ValueError(f"Unknown export format '{fmt}' (choose from {', '.join(FORMATS)})")
+
+    start = time.perf_counter()
+    timings = writers[fmt](tables, path, chunk_rows)
+    result = pd.DataFrame({'rows': [len(df) for df in tables.values()],
+                           'columns': [len(_with_index(df).columns) for df in tables.values()],
+                           'seconds': [timings[name] for name in tables]},
+                          index=pd.Index(list(tables), name='table'))
+    if verbose:
+        for name, rows, columns, seconds in result.itertuples():
+            print(f"⏱️ {name}: {rows:,} rows x {columns} columns in {seconds:.2f} s")
+        print(f"✅ Exported {len(tables)} table(s) to {path} ({fmt}) in {time.perf_counter() - start:.2f} s")
+    return result
+
+
+def main() -> None:
+    from mf_analyzer import MFPortfolioAnalyzer
+    from synthetic_data import synthetic_nav_history, synthetic_portfolio, synthetic_transactions
+
+    parser = argparse.ArgumentParser(description="Export a synthetic portfolio analysis with its NAV history")
+    parser.add_argument("--format", choices=FORMATS, default='xlsx', help="Output format (default: xlsx)")
+    parser.add_argument("--output", type=Path, default=DEFAULT_EXPORT_DIR, help="Output directory")
+    parser.add_argument("--funds", type=int, default=200, help="Funds in the portfolio (default: 200)")
+    parser.add_argument("--years", type=float, default=10, help="Years of NAV history (default: 10)")
+    args = parser.parse_args()
+
+    history, benchmark = synthetic_nav_history(args.funds, args.years, late_start_share=0.0)
+    analyzer = MFPortfolioAnalyzer()
+    analyzer.holdings = synthetic_portfolio(history, synthetic_transactions(history, args.funds * 2))
+    analyzer.load_nav_history(history.select(analyzer.holdings['scheme_code']), benchmark)
+    target = args.output / 'mf_portfolio_analysis.xlsx' if args.format == 'xlsx' else args.output
+    analyzer.export_analysis(target, fmt=args.format, include_history=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+"""
+Kite Connect Client
+
+HTTP client for the Kite Connect v3 mutual fund endpoints (holdings,
+orders, instruments), shared by ZerodhaMFIntegration and the benchmarks:
+- One pooled requests.Session, so concurrent calls reuse keep-alive connections
+- Requests are spaced to stay under Kite's rate limit (10 requests/second)
+- GETs that hit 429s, 5xx responses, NetworkExceptions or dropped connections
+  are retried with exponential backoff and jitter, honouring Retry-After up to MAX_BACKOFF.
+  POSTs (the single-use session token exchange) are not
+- fetch() pulls several endpoints concurrently
+
+Responses are normalised into the DataFrame layouts used by the rest of the
+package: holdings as ZerodhaMFIntegration always returned them, orders as
+CAS-style transactions (purchases positive, redemptions negative).
+kite_mock.MockKiteServer serves the same endpoints locally for offline runs.
+"""
+
+import hashlib
+import io
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+KITE_URL = 'https://api.kite.trade'
+KITE_VERSION = '3'
+
+# Kite allows 10 requests/second per API key on most endpoints
+RATE_LIMIT = 10.0
+
+MAX_RETRIES = 4
+BACKOFF = 0.5
+MAX_BACKOFF = 8.0
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+HOLDINGS_COLUMNS = ['folio', 'fund', 'isin', 'quantity', 'average_price', 'last_price', 'pnl',
+                    'invested_value', 'current_value', 'returns_pct']
+ORDERS_COLUMNS = ['order_id', 'date', 'folio', 'fund', 'isin', 'transaction_type', 'status',
+                  'amount', 'units', 'nav']
+
+
+class KiteError(RuntimeError):
+    """
+    Error response from Kite (error_type as in Kite's docs, e.g. TokenException)
+    """
+
+    def __init__(self, message: str, error_type: str = 'GeneralException', status: Optional[int] = None):
+        super().__init__(message)
+        self.error_type = error_type
+        self.status = status
+
+
+def holdings_frame(records: List[dict]) -> pd.DataFrame:
+    """
+    Kite MF holdings -> folio, fund, isin, quantity, prices, pnl, invested/current value, returns_pct
+    """
+    df = pd.DataFrame(records).rename(columns={'tradingsymbol': 'isin'})
+    if df.empty:
+        return pd.DataFrame(columns=HOLDINGS_COLUMNS)
+    df['folio'] = df['folio'].astype(str)
+    for column in ('quantity', 'average_price', 'last_price', 'pnl'):
+        df[column] = pd.to_numeric(df[column], errors='coerce')
+    df['invested_value'] = df['quantity'] * df['average_price']
+    df['current_value'] = df['quantity'] * df['last_price']
+    df['returns_pct'] = (df['current_value'] - df['invested_value']) / df['invested_value'] * 100
+    return df[HOLDINGS_COLUMNS]
+
+
+def orders_frame(records: List[dict]) -> pd.DataFrame:
+    """
+    Kite MF orders -> CAS-style rows (date, folio, isin, amount, units, nav)
+
+    Purchases are positive and redemptions negative; units and NAV are only
+    set once an order is COMPLETE.
+    """
+    df = pd.DataFrame(records).rename(columns={'tradingsymbol': 'isin'})
+    if df.empty:
+        return pd.DataFrame(columns=ORDERS_COLUMNS)
+    sign = np.where(df['transaction_type'] == 'SELL', -1.0, 1.0)
+    complete = df['status'] == 'COMPLETE'
+    nav = pd.to_numeric(df['average_price'], errors='coerce')
+    units = pd.to_numeric(df['quantity'], errors='coerce')
+    stamp = df['order_timestamp']
+    if 'exchange_timestamp' in df.columns:
+        stamp = df['exchange_timestamp'].fillna(stamp)
+    df['date'] = pd.to_datetime(stamp, format='mixed').dt.normalize()
+    df['folio'] = df['folio'].astype(str)
+    df['units'] = np.where(complete, sign * units, np.nan)
+    df['nav'] = nav.where(complete)
+    df['amount'] = np.where(complete, df['units'] * nav, sign * pd.to_numeric(df['amount'], errors='coerce'))
+    return df[ORDERS_COLUMNS].sort_values('date', kind='stable').reset_index(drop=True)
+
+
+def instruments_frame(text: str) -> pd.DataFrame:
+    """
+    Kite's MF instruments CSV, with tradingsymbol as isin and name as fund
+    """
+    df = pd.read_csv(io.StringIO(text), dtype={'tradingsymbol': str})
+    return df.rename(columns={'tradingsymbol': 'isin', 'name': 'fund'})
+
+
+class KiteClient:
+    """
+    Pooled, rate-limited Kite Connect client with retries
+    """
+
+    def __init__(self, api_key: str, access_token: Optional[str] = None, base_url: str = KITE_URL,
+                 timeout: float = 10.0, pool_size: int = 8, rate_limit: Optional[float] = RATE_LIMIT,
+                 max_retries: int = MAX_RETRIES, backoff: float = BACKOFF):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.api_key = api_key
+        self.access_token = access_token
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.rate_limit = rate_limit
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers['X-Kite-Version'] = KITE_VERSION
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+        self.requests = 0
+        self.retries = 0
+
+    def close(self) -> None:
+        self.session.close()
+
+    def _throttle(self) -> None:
+        if not self.rate_limit:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + 1.0 / self.rate_limit
+        if slot > now:
+            time.sleep(slot - now)
+
+    def _delay(self, attempt: int, retry_after: Optional[str]) -> float:
+        try:
+            # Capped, so a bogus or hostile Retry-After can't stall the client
+            return min(MAX_BACKOFF, max(0.0, float(retry_after)))
+        except (TypeError, ValueError):
+            return min(MAX_BACKOFF, self.backoff * 2 ** attempt) * random.uniform(0.5, 1.0)
+
+    @staticmethod
+    def _error(response) -> KiteError:
+        try:
+            body = response.json()
+            return KiteError(body.get('message', response.reason), body.get('error_type', 'GeneralException'),
+                             response.status_code)
+        except ValueError:
+            return KiteError(f"HTTP {response.status_code}: {response.reason}", 'NetworkException',
+                             response.status_code)
+
+    def _request(self, method: str, path: str, raw: bool = False, **kwargs):
+        import requests
+
+        headers = {}
+        if self.access_token:
+            headers['Authorization'] = f"token {self.api_key}:{self.access_token}"
+        # Only idempotent requests are retried: a POST may already have taken effect
+        max_retries = self.max_retries if method == 'GET' else 0
+        for attempt in range(max_retries + 1):
+            self._throttle()
+            retry_after = None
+            try:
+                with self._lock:
+                    self.requests += 1
+                response = self.session.request(method, self.base_url + path, headers=headers,
+                                                timeout=self.timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = KiteError(str(e), 'NetworkException')
+            else:
+                if response.ok:
+                    if raw:
+                        return response.text
+                    try:
+                        return response.json()['data']
+                    except (ValueError, KeyError, TypeError):
+                        raise KiteError(f"Malformed response from {path}: {response.text[:200]!r}",
+                                        'DataException', response.status_code) from None
+                error = self._error(response)
+                retry_after = response.headers.get('Retry-After')
+                if response.status_code not in RETRY_STATUSES:
+                    raise error
+            if attempt == max_retries:
+                raise error
+            with self._lock:
+                self.retries += 1
+            time.sleep(self._delay(attempt, retry_after))
+
+    def generate_session(self, request_token: str, api_secret: str) -> dict:
+        """
+        Exchange a login request_token for an access token (kept on the client)
+
+        Never retried (only GETs are): a request_token can be used only once, so a retry after
+        the server has consumed it would fail with a TokenException instead
+        of the real error.
+        """
+        checksum = hashlib.sha256(f"{self.api_key}{request_token}{api_secret}".encode()).hexdigest()
+        data = self._request('POST', '/session/token', data={'api_key': self.api_key,
+                                                               'request_token': request_token,
+                                                               'checksum': checksum})
+        self.access_token = data['access_token']
+        return data
+
+    def profile(self) -> dict:
+        return self._request('GET', '/user/profile')
+
+    def mf_holdings(self) -> pd.DataFrame:
+        return holdings_frame(self._request('GET', '/mf/holdings'))
+
+    def mf_orders(self) -> pd.DataFrame:
+        return orders_frame(self._request('GET', '/mf/orders'))
+
+    def mf_instruments(self) -> pd.DataFrame:
+        return instruments_frame(self._request('GET', '/mf/instruments', raw=True))
+
+    def fetch(self, endpoints: Iterable[str] = ('holdings', 'orders', 'instruments'),
+              workers: int = 3) -> Dict[str, pd.DataFrame]:
+        """
+        Fetch several endpoints concurrently; returns {endpoint: DataFrame}
+        """
+        calls = {'holdings': self.mf_holdings, 'orders': self.mf_orders, 'instruments': self.mf_instruments}
+        endpoints = list(endpoints)
+        unknown = [name for name in endpoints if name not in calls]
+        if unknown:
+            raise ValueError(f"Unknown endpoint(s): {', '.join(unknown)}")
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            futures = {name: pool.submit(calls[name]) for name in endpoints}
+            return {name: future.result() for name, future in futures.items()}
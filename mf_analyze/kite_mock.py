@@ -0,0 +1,155 @@
+"""
+Mock Kite Server
+
+A local stand-in for the Kite Connect MF endpoints, so the Zerodha
+integration and KiteClient run (and can be timed) with no account or
+network:
+- GET /user/profile, /mf/holdings, /mf/orders (JSON) and /mf/instruments (CSV)
+- POST /session/token, checked against the api_key/api_secret it was given
+- Optional latency per request, and failure injection: every n-th request
+  answers 429 (with Retry-After) or a 5xx, to exercise retries
+- HTTP/1.1 keep-alive, with a count of connections opened, to show pooling
+
+    with MockKiteServer(holdings, orders, instruments, latency_ms=30) as server:
+        client = KiteClient(server.api_key, server.access_token, base_url=server.url)
+"""
+
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional, Union
+from urllib.parse import parse_qs, urlsplit
+
+import pandas as pd
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        with self.server.mock.lock:
+            self.server.mock.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: str, content_type: str = 'application/json', headers: Optional[dict] = None):
+        payload = body.encode()
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _error(self, status: int, message: str, error_type: str, headers: Optional[dict] = None):
+        self._send(status, json.dumps({'status': 'error', 'message': message, 'error_type': error_type}),
+                   headers=headers)
+
+    def _handle(self, method: str):
+        mock = self.server.mock
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0) or 0)).decode()
+        with mock.lock:
+            mock.requests += 1
+            count = mock.requests
+        if mock.latency_ms:
+            time.sleep(mock.latency_ms / 1000)
+        if mock.fail_every and count % mock.fail_every == 0:
+            with mock.lock:
+                mock.failures += 1
+            if mock.fail_status == 429:
+                return self._error(429, 'Too many requests', 'NetworkException',
+                                   {'Retry-After': f'{mock.retry_after:g}'})
+            return self._error(mock.fail_status, 'Upstream unavailable', 'NetworkException')
+
+        path = urlsplit(self.path).path
+        if method == 'POST' and path == '/session/token':
+            form = {key: values[0] for key, values in parse_qs(body).items()}
+            expected = hashlib.sha256(f"{mock.api_key}{form.get('request_token', '')}{mock.api_secret}"
+                                      .encode()).hexdigest()
+            if form.get('api_key') != mock.api_key or form.get('checksum') != expected:
+                return self._error(403, 'Invalid `checksum`.', 'TokenException')
+            return self._send(200, json.dumps({'status': 'success', 'data': {
+                'user_id': 'AB1234', 'user_name': 'Mock User', 'api_key': mock.api_key,
+                'access_token': mock.access_token}}))
+
+        if self.headers.get('Authorization') != f"token {mock.api_key}:{mock.access_token}":
+            return self._error(403, 'Incorrect `api_key` or `access_token`.', 'TokenException')
+        if method == 'GET' and path == '/mf/instruments':
+            return self._send(200, mock.instruments_csv, content_type='text/csv')
+        routes = {'/user/profile': mock.profile, '/mf/holdings': mock.holdings, '/mf/orders': mock.orders}
+        if method != 'GET' or path not in routes:
+            return self._error(404, 'Route not found', 'GeneralException')
+        self._send(200, json.dumps({'status': 'success', 'data': routes[path]}))
+
+    def do_GET(self):
+        self._handle('GET')
+
+    def do_POST(self):
+        self._handle('POST')
+
+
+class MockKiteServer:
+    """
+    Threaded local HTTP server answering like Kite Connect, from fixture records
+    """
+
+    def __init__(self, holdings: List[dict], orders: Optional[List[dict]] = None,
+                 instruments: Optional[Union[pd.DataFrame, str]] = None, api_key: str = 'mock_api_key',
+                 api_secret: str = 'mock_api_secret', access_token: str = 'mock_access_token',
+                 latency_ms: float = 0.0, fail_every: int = 0, fail_status: int = 429,
+                 retry_after: float = 0.05, port: int = 0):
+        self.holdings = holdings
+        self.orders = orders or []
+        if isinstance(instruments, pd.DataFrame):
+            instruments = instruments.to_csv(index=False)
+        self.instruments_csv = instruments or 'tradingsymbol,amc,name\n'
+        self.profile = {'user_id': 'AB1234', 'user_name': 'Mock User', 'email': 'mock@example.com'}
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.access_token = access_token
+        self.latency_ms = latency_ms
+        self.fail_every = fail_every
+        self.fail_status = fail_status
+        self.retry_after = retry_after
+        self.port = port
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.failures = 0
+        self.connections = 0
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'MockKiteServer':
+        self._server = ThreadingHTTPServer(('127.0.0.1', self.port), _Handler)
+        self._server.daemon_threads = True
+        self._server.mock = self
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread.join()
+            self._server = None
+
+    def reset_counts(self) -> None:
+        with self.lock:
+            self.requests = self.failures = self.connections = 0
+
+    def __enter__(self) -> 'MockKiteServer':
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
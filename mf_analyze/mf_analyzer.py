@@ -1,10 +1,18 @@
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from datetime import datetime, timedelta
-import yfinance as yf
 import warnings
+from nav_history import NAVHistory, RISK_FREE_RATE, TRADING_DAYS
+from benchmarks import DEFAULT_BENCHMARK, align_levels, assign, benchmark_for, levels_for, load_levels
+from correlation import CovarianceState
+from export import CHUNK_ROWS, export_tables
+from nav_cache import MFApiSource, NAVCache, YFinanceSource
+from projection import portfolio_returns, project_sip
+from rebalance import rebalance, stress_test
+from report import DEFAULT_REPORT_DIR, draw_allocation, draw_performance, write_report
+from rolling import rolling_summary
+from snapshots import SnapshotStore
+from tax_lots import TaxLots
+from xirr import CashFlowLedger
 warnings.filterwarnings('ignore')
 
 class MFPortfolioAnalyzer:
@@ -15,6 +23,12 @@ class MFPortfolioAnalyzer:
     def __init__(self):
         self.holdings = None
         self.performance_data = {}
+        self.nav_history = None
+        self.benchmark_levels = None
+        self.benchmarks = None
+        self.covariance_state = None
+        self.cash_flows = None
+        self.tax_lots = None
         
     def load_sample_data(self):
         """Load sample MF portfolio data for demonstration.
@@ -73,6 +87,9 @@ class MFPortfolioAnalyzer:
             'Overall Return %': f"{overall_return_pct:.2f}%",
             'Number of Funds': len(self.holdings)
         }
+        if self.cash_flows is not None:
+            portfolio_xirr = self._valued_cash_flows().xirr(None)
+            summary['Portfolio XIRR'] = f"{portfolio_xirr * 100:.2f}%" if np.isfinite(portfolio_xirr) else "n/a"
         
         return summary
         
@@ -91,67 +108,342 @@ class MFPortfolioAnalyzer:
         """Create portfolio allocation pie chart"""
         if self.holdings is None:
             return None
-            
-        plt.figure(figsize=(10, 6))
-        
-        # Allocation by category
-        plt.subplot(1, 2, 1)
-        category_allocation = self.holdings.groupby('category')['current_value'].sum()
-        plt.pie(category_allocation.values, labels=category_allocation.index, autopct='%1.1f%%')
-        plt.title('Portfolio Allocation by Category')
-        
-        # Top funds by value
-        plt.subplot(1, 2, 2)
-        top_funds = self.holdings.nlargest(5, 'current_value')
-        plt.pie(top_funds['current_value'], labels=top_funds['scheme_name'].str[:20], autopct='%1.1f%%')
-        plt.title('Top 5 Funds by Value')
-        
-        plt.tight_layout()
+
+        import matplotlib.pyplot as plt
+
+        fig = plt.figure(figsize=(10, 6))
+        draw_allocation(fig, self.holdings)
+        fig.tight_layout()
         plt.show()
-        
+
     def plot_performance_chart(self):
         """Create performance visualization"""
         if self.holdings is None:
             return None
-            
-        plt.figure(figsize=(12, 8))
-        
-        # Returns by fund
-        plt.subplot(2, 2, 1)
-        funds = self.holdings['scheme_name'].str[:15]  # Truncate names
-        returns = self.holdings['return_percentage']
-        colors = ['green' if r > 0 else 'red' for r in returns]
-        plt.bar(range(len(funds)), returns, color=colors, alpha=0.7)
-        plt.title('Returns by Fund (%)')
-        plt.xticks(range(len(funds)), funds, rotation=45, ha='right')
-        plt.ylabel('Return %')
-        
-        # Investment vs Current Value
-        plt.subplot(2, 2, 2)
-        x = np.arange(len(funds))
-        width = 0.35
-        plt.bar(x - width/2, self.holdings['invested_amount']/1000, width, label='Invested', alpha=0.7)
-        plt.bar(x + width/2, self.holdings['current_value']/1000, width, label='Current', alpha=0.7)
-        plt.title('Invested vs Current Value (₹000s)')
-        plt.xticks(x, funds, rotation=45, ha='right')
-        plt.legend()
-        
-        # Portfolio composition
-        plt.subplot(2, 2, 3)
-        category_allocation = self.holdings.groupby('category')['current_value'].sum()
-        plt.pie(category_allocation.values, labels=category_allocation.index, autopct='%1.1f%%')
-        plt.title('Asset Allocation')
-        
-        # Performance distribution
-        plt.subplot(2, 2, 4)
-        plt.hist(self.holdings['return_percentage'], bins=10, alpha=0.7, edgecolor='black')
-        plt.title('Return Distribution')
-        plt.xlabel('Return %')
-        plt.ylabel('Number of Funds')
-        
-        plt.tight_layout()
+
+        import matplotlib.pyplot as plt
+
+        fig = plt.figure(figsize=(12, 8))
+        draw_performance(fig, self.holdings)
+        fig.tight_layout()
         plt.show()
-        
+
+    def generate_report(self, output_dir=DEFAULT_REPORT_DIR, jobs=4):
+        """Render all charts to image files (headless, cached) and write report.md"""
+        if self.holdings is None:
+            print("❌ No portfolio data found. Please load data first.")
+            return None
+
+        return write_report(self, output_dir, jobs)
+
+    def load_nav_history(self, nav_history: NAVHistory, benchmark_levels=None):
+        """Attach daily NAV history for the held schemes.
+
+        benchmark_levels: optional benchmark index levels on the same dates,
+        used for beta.
+        """
+        self.nav_history = nav_history
+        self.benchmark_levels = None if benchmark_levels is None else np.asarray(benchmark_levels, dtype=float)
+        missing = set(self.holdings['scheme_code'].astype(str)) - set(nav_history.codes) if self.holdings is not None else set()
+        print(f"✅ NAV history loaded: {len(nav_history)} schemes x {len(nav_history.dates)} days")
+        if missing:
+            print(f"⚠️ No NAV history for scheme codes: {', '.join(sorted(missing))}")
+        return self.nav_history
+
+    def load_cached_nav_history(self, benchmark_ticker=None, cache=None, offline=False):
+        """Load NAV history for the held schemes from the local NAV cache.
+
+        Unless offline, the cache is first topped up with the dates since
+        its last update (mfapi.in for NAVs, yfinance for the benchmark).
+        """
+        if self.holdings is None:
+            print("❌ No portfolio data found. Please load data first.")
+            return None
+
+        cache = cache or NAVCache()
+        codes = self.holdings['scheme_code'].astype(str).tolist()
+        if not offline:
+            added = cache.refresh(codes, MFApiSource())
+            if benchmark_ticker:
+                added.update(cache.refresh([benchmark_ticker], YFinanceSource()))
+            print(f"🔄 NAV cache refreshed: {sum(added.values())} new rows")
+
+        history = cache.load_history(codes)
+        benchmark = cache.load_series(benchmark_ticker, history.dates) if benchmark_ticker else None
+        return self.load_nav_history(history, benchmark)
+
+    def load_benchmarks(self, levels=None, cache=None, source=None):
+        """Load TRI levels for the held funds' category benchmarks, aligned to the NAV history.
+
+        levels: optional table of index levels (date index, one column per
+        index), e.g. from benchmarks.read_tri_csv() or a fixture; otherwise
+        the indices are read from the NAV cache, first topped up from
+        `source` when one is given. Once loaded, beta, rolling figures and
+        get_benchmark_metrics measure each fund against its category's index.
+        """
+        if self.holdings is None or self.nav_history is None:
+            print("❌ Holdings and NAV history are both needed. Please load them first.")
+            return None
+
+        categories = self.holdings['category'] if 'category' in self.holdings.columns else [None]
+        names = sorted({benchmark_for(category) for category in categories} | {DEFAULT_BENCHMARK})
+        if levels is not None:
+            benchmarks = align_levels(levels, self.nav_history.dates)
+        else:
+            cache = cache or NAVCache()
+            if source is not None:
+                added = cache.refresh(names, source)
+                print(f"🔄 Benchmark cache refreshed: {sum(added.values())} new rows")
+            benchmarks = load_levels(cache, names, self.nav_history.dates)
+        self.benchmarks = benchmarks
+        print(f"✅ Benchmarks loaded: {', '.join(benchmarks.codes)} on {len(benchmarks.dates)} days")
+        return benchmarks
+
+    def _held_benchmarks(self, codes):
+        """Benchmark index names and (days, funds) levels for the held funds, or the single benchmark"""
+        if self.benchmarks is None:
+            return None, self.benchmark_levels
+        categories = (dict(zip(self.holdings['scheme_code'].astype(str), self.holdings['category']))
+                      if 'category' in self.holdings.columns else {})
+        names = assign(self.benchmarks, [categories.get(code) for code in codes])
+        return names, levels_for(self.benchmarks, names)
+
+    def get_benchmark_metrics(self, risk_free=RISK_FREE_RATE):
+        """Alpha, beta and up/down capture of each held fund against its category benchmark"""
+        if self.holdings is None or self.nav_history is None or self.benchmarks is None:
+            print("❌ Holdings, NAV history and benchmarks are needed. Please load them first.")
+            return None
+
+        codes = [code for code in self.holdings['scheme_code'].astype(str) if code in self.nav_history]
+        names, levels = self._held_benchmarks(codes)
+        metrics = self.nav_history.select(codes).relative_metrics(levels, risk_free)
+        metrics.insert(0, 'benchmark', names)
+        columns = [column for column in ('scheme_code', 'scheme_name', 'category') if column in self.holdings.columns]
+        funds = self.holdings[columns].astype({'scheme_code': str})
+        return funds.merge(metrics, left_on='scheme_code', right_index=True)
+
+    def get_risk_metrics(self, risk_free=RISK_FREE_RATE):
+        """Time-series risk metrics per held fund, computed from NAV history"""
+        if self.holdings is None or self.nav_history is None:
+            print("❌ Holdings and NAV history are both needed. Please load them first.")
+            return None
+
+        codes = [code for code in self.holdings['scheme_code'].astype(str) if code in self.nav_history]
+        _, levels = self._held_benchmarks(codes)
+        metrics = self.nav_history.select(codes).metrics(levels, risk_free)
+        funds = self.holdings[['scheme_code', 'scheme_name']].astype({'scheme_code': str})
+        return funds.merge(metrics, left_on='scheme_code', right_index=True)
+
+    def get_rolling_cagr(self, years=3):
+        """Trailing CAGR (%) of each held fund at every date"""
+        if self.holdings is None or self.nav_history is None:
+            return None
+
+        codes = [code for code in self.holdings['scheme_code'].astype(str) if code in self.nav_history]
+        history = self.nav_history.select(codes)
+        rolling = pd.DataFrame(history.rolling_cagr(years) * 100, index=history.dates, columns=codes)
+        return rolling.dropna(how='all')
+
+    def get_rolling_summary(self, years=3, risk_free=RISK_FREE_RATE):
+        """Rolling-window consistency per held fund: alpha, Sharpe stability, beat % and capture"""
+        if self.holdings is None or self.nav_history is None or (self.benchmark_levels is None
+                                                                 and self.benchmarks is None):
+            print("❌ Holdings, NAV history and benchmark levels are needed. Please load them first.")
+            return None
+
+        codes = [code for code in self.holdings['scheme_code'].astype(str) if code in self.nav_history]
+        history = self.nav_history.select(codes)
+        window = int(round(years * TRADING_DAYS))
+        _, levels = self._held_benchmarks(codes)
+        summary = pd.DataFrame(rolling_summary(history.navs, levels, window, risk_free),
+                               index=pd.Index(codes, name='scheme_code'))
+        funds = self.holdings[['scheme_code', 'scheme_name']].astype({'scheme_code': str})
+        return funds.merge(summary, left_on='scheme_code', right_index=True)
+
+    def _update_covariance_state(self, state_path=None):
+        """Return sums for the held funds, adding only days not seen yet"""
+        codes = [code for code in self.holdings['scheme_code'].astype(str) if code in self.nav_history]
+        state = self.covariance_state
+        if (state is None or state.codes != codes) and state_path is not None:
+            state = CovarianceState.load(state_path)
+        if state is None or state.codes != codes:
+            state = CovarianceState.from_history(self.nav_history.select(codes))
+        else:
+            state.update(self.nav_history)
+        if state_path is not None:
+            state.save(state_path)
+        self.covariance_state = state
+        return state
+
+    def _label_funds(self, frame):
+        names = self.holdings.set_index(self.holdings['scheme_code'].astype(str))['scheme_name']
+        return frame.rename(index=names, columns=names).rename_axis(None)
+
+    def get_correlation_matrix(self, shrink=False, state_path=None):
+        """Correlation of daily returns between held funds, from NAV history
+
+        Each pair uses the days both funds have NAVs. shrink=True applies
+        Ledoit-Wolf shrinkage; state_path keeps the running sums on disk so
+        later calls only add new days.
+        """
+        if self.holdings is None or self.nav_history is None:
+            print("❌ Holdings and NAV history are both needed. Please load them first.")
+            return None
+
+        state = self._update_covariance_state(state_path)
+        if shrink:
+            correlation, intensity = state.shrunk_correlation()
+            print(f"📐 Ledoit-Wolf shrinkage intensity: {intensity:.2f}")
+        else:
+            correlation = state.correlation()
+        return self._label_funds(correlation)
+
+    def get_covariance_matrix(self, shrink=False, annualise=True, state_path=None):
+        """Covariance of daily returns between held funds (annualised by default)"""
+        if self.holdings is None or self.nav_history is None:
+            print("❌ Holdings and NAV history are both needed. Please load them first.")
+            return None
+
+        state = self._update_covariance_state(state_path)
+        if shrink:
+            covariance, _ = state.shrunk_covariance(annualise=annualise)
+        else:
+            covariance = state.covariance(annualise=annualise)
+        return self._label_funds(covariance)
+
+    def get_holdings_overlap(self, holdings_matrix, top=10):
+        """Pairwise overlap (%) between held funds, on each fund's top holdings (top=None: all)"""
+        if self.holdings is None:
+            return None
+
+        codes = [code for code in self.holdings['scheme_code'].astype(str) if code in holdings_matrix]
+        matrix = holdings_matrix.select(codes)
+        overlap = (matrix.top_n(top) if top else matrix).overlap()
+        return self._label_funds(overlap)
+
+    def get_look_through_exposure(self, holdings_matrix, by='sector'):
+        """Underlying stock or sector exposure of the whole portfolio, weighted by current value"""
+        if self.holdings is None:
+            return None
+
+        allocation = self.holdings.groupby(self.holdings['scheme_code'].astype(str))['current_value'].sum()
+        return holdings_matrix.look_through(allocation, by=by)
+
+    def load_transactions(self, transactions):
+        """Load CAS-style transactions (a DataFrame or CSV path) for XIRR and tax lots.
+
+        Columns: date, folio, scheme_code, amount, with purchases positive
+        and redemptions negative as on the statement. With a units column
+        (same signs) every purchase also becomes a FIFO tax lot.
+        """
+        if not isinstance(transactions, pd.DataFrame):
+            transactions = pd.read_csv(transactions, dtype={'scheme_code': str, 'folio': str})
+        self.cash_flows = CashFlowLedger.from_transactions(transactions)
+        self.tax_lots = TaxLots(transactions) if 'units' in transactions.columns else None
+        lots = f", {len(self.tax_lots.buy_units)} tax lots" if self.tax_lots is not None else ""
+        print(f"✅ Transactions loaded: {len(self.cash_flows)} cash flows{lots}")
+        return self.cash_flows
+
+    def _valued_cash_flows(self, as_of=None):
+        """Transactions plus each holding's current value as the final inflow"""
+        values = self.holdings.groupby(self.holdings['scheme_code'].astype(str))['current_value'].sum()
+        return self.cash_flows.with_valuations(values, as_of)
+
+    def get_xirr(self, as_of=None):
+        """Annualised money-weighted return (XIRR %) per held fund, valued as of today by default"""
+        if self.holdings is None or self.cash_flows is None:
+            print("❌ Holdings and transactions are both needed. Please load them first.")
+            return None
+
+        rates = self._valued_cash_flows(as_of).xirr('scheme_code') * 100
+        funds = self.holdings[['scheme_code', 'scheme_name', 'invested_amount', 'current_value']].astype({'scheme_code': str})
+        return funds.merge(rates.rename('xirr_percentage'), left_on='scheme_code', right_index=True, how='left')
+
+    def _current_navs(self):
+        return self.holdings.groupby(self.holdings['scheme_code'].astype(str))['current_nav'].last()
+
+    def get_capital_gains(self, as_of=None):
+        """Unrealised STCG/LTCG per folio if every open lot were sold at the current NAV"""
+        if self.holdings is None or self.tax_lots is None:
+            print("❌ Holdings and transactions with units are both needed. Please load them first.")
+            return None
+
+        gains = self.tax_lots.unrealised_summary(self._current_navs(), as_of)
+        funds = self.holdings[['scheme_code', 'scheme_name']].astype({'scheme_code': str})
+        return funds.merge(gains, on='scheme_code')
+
+    def get_realised_gains(self):
+        """Realised STCG/LTCG and estimated tax per financial year, from FIFO lots"""
+        if self.tax_lots is None:
+            print("❌ No transactions with units found. Please load them first.")
+            return None
+
+        return self.tax_lots.realised_summary()
+
+    def plan_redemption(self, amount, as_of=None):
+        """Units to redeem from each folio to raise `amount` for the least capital-gains tax"""
+        if self.holdings is None or self.tax_lots is None:
+            print("❌ Holdings and transactions with units are both needed. Please load them first.")
+            return None
+
+        return self.tax_lots.redemption_plan(amount, self._current_navs(), as_of)
+
+    def rebalance_portfolio(self, targets, by='category', **kwargs):
+        """Least-cost trades to reach target weights ({category or scheme_code: weight})
+
+        Selling costs use the FIFO tax lots when transactions with units are
+        loaded. Keyword arguments go to rebalance.rebalance (min_trade,
+        exit_loads, cash, tolerance, ...). Returns (trades, allocation).
+        """
+        if self.holdings is None:
+            print("❌ No portfolio data found. Please load data first.")
+            return None
+
+        trades, allocation = rebalance(self.holdings, targets, by=by, tax_lots=self.tax_lots, **kwargs)
+        print(f"🔁 {(trades['buy'] > 0).sum()} buys, {(trades['sell'] > 0).sum()} sells; "
+              f"estimated tax ₹{trades['tax'].sum():,.0f}, exit loads ₹{trades['exit_load'].sum():,.0f}")
+        return trades, allocation
+
+    def stress_test_rebalance(self, trades, targets=None, by='category', n_scenarios=10000, years=1,
+                              tolerance=0.05, seed=42):
+        """Simulated one-year outcomes of the current vs rebalanced portfolio
+
+        Fund return means and (Ledoit-Wolf shrunk) covariances come from NAV
+        history; drift_breach is the share of scenarios where an allocation
+        ends more than `tolerance` away from `targets`.
+        """
+        if self.holdings is None or self.nav_history is None:
+            print("❌ Holdings and NAV history are both needed. Please load them first.")
+            return None
+
+        state = self._update_covariance_state()
+        covariance, _ = state.shrunk_covariance()
+        codes = list(covariance.index)
+        current = self.holdings.groupby(self.holdings['scheme_code'].astype(str))['current_value'].sum()
+        rebalanced = trades.groupby(trades['scheme_code'].astype(str))['new_value'].sum()
+        groups = self.holdings.set_index(self.holdings['scheme_code'].astype(str))[by] if targets is not None else None
+        return stress_test({'current': current[codes], 'rebalanced': rebalanced.reindex(codes)},
+                           state.mean()[codes], covariance, groups, targets, n_scenarios=n_scenarios,
+                           horizon_days=int(round(years * TRADING_DAYS)), tolerance=tolerance, seed=seed)
+
+    def project_sip(self, monthly, years=15, initial=None, step_up=0.0, n_paths=100000, goal=None, seed=42, jobs=1):
+        """Percentile bands of a monthly SIP into the current portfolio, by block bootstrap
+
+        The SIP is invested at the current weights, on top of `initial`
+        (default: the current portfolio value). Returns (bands per year, summary).
+        """
+        if self.holdings is None or self.nav_history is None:
+            print("❌ Holdings and NAV history are both needed. Please load them first.")
+            return None
+
+        weights = self.holdings.groupby(self.holdings['scheme_code'].astype(str))['current_value'].sum()
+        initial = weights.sum() if initial is None else initial
+        bands, summary = project_sip(portfolio_returns(self.nav_history, weights), monthly, years, initial,
+                                     step_up, n_paths, goal=goal, seed=seed, jobs=jobs)
+        print(f"📈 {n_paths:,} paths over {years} years: median ₹{summary['p50']:,.0f} "
+              f"(5-95%: ₹{summary['p5']:,.0f} - ₹{summary['p95']:,.0f}) on ₹{summary['invested']:,.0f} invested")
+        return bands, summary
+
     def get_top_performers(self, n=3):
         """Get top performing funds"""
         if self.holdings is None:
@@ -174,25 +466,49 @@ class MFPortfolioAnalyzer:
         
         return underperformers
         
-    def export_analysis(self, filename='mf_portfolio_analysis.xlsx'):
-        """Export analysis to Excel file"""
+    def record_snapshot(self, store=None, date=None):
+        """Append today's (or `date`'s) holdings to the snapshot store
+
+        Unchanged holdings add no rows, so this can run every day. Returns
+        counts of positions opened, closed and unchanged.
+        """
         if self.holdings is None:
+            print("❌ No portfolio data found. Please load data first.")
             return None
-            
-        with pd.ExcelWriter(filename, engine='openpyxl') as writer:
-            # Holdings details
-            self.holdings.to_excel(writer, sheet_name='Holdings', index=False)
-            
-            # Summary
-            summary_df = pd.DataFrame(list(self.get_portfolio_summary().items()), 
-                                    columns=['Metric', 'Value'])
-            summary_df.to_excel(writer, sheet_name='Summary', index=False)
-            
-            # Allocation
-            allocation_df = self.analyze_allocation()
-            allocation_df.to_excel(writer, sheet_name='Allocation')
-            
-        print(f"✅ Analysis exported to {filename}")
+
+        store = store or SnapshotStore()
+        counts = store.record(self.holdings, date)
+        print(f"✅ Snapshot recorded: {counts['opened']} new/changed, {counts['closed']} closed, "
+              f"{counts['unchanged']} unchanged positions")
+        return counts
+
+    def get_value_history(self, store=None, start=None, end=None):
+        """Portfolio value and amount invested on every recorded snapshot date"""
+        return (store or SnapshotStore()).value_history(start, end)
+
+    def export_analysis(self, filename='mf_portfolio_analysis.xlsx', fmt=None, include_history=False,
+                        tables=None, chunk_rows=CHUNK_ROWS):
+        """Export analysis to Excel (one sheet per table), or Parquet/CSV files in a directory
+
+        Tables are written in chunks through a streaming writer, with the
+        time per table printed. include_history adds the NAV history and
+        risk metrics; `tables` adds any other {name: DataFrame}, e.g.
+        screener results. fmt ('xlsx', 'parquet', 'csv') defaults to the
+        filename's suffix.
+        """
+        if self.holdings is None:
+            return None
+
+        export = {
+            'Holdings': self.holdings,
+            'Summary': pd.DataFrame(list(self.get_portfolio_summary().items()), columns=['Metric', 'Value']),
+            'Allocation': self.analyze_allocation(),
+        }
+        if include_history and self.nav_history is not None:
+            export['NAV History'] = self.nav_history.to_frame().rename_axis('date')
+            export['Risk Metrics'] = self.get_risk_metrics()
+        export.update(tables or {})
+        return export_tables(export, filename, fmt, chunk_rows)
 
 # Example usage
 if __name__ == "__main__":
@@ -0,0 +1,203 @@
+"""
+Local NAV Cache
+
+On-disk columnar cache of NAV and benchmark series, one Feather (Arrow IPC)
+file per scheme code or index ticker under data/nav_cache/. Files are written
+uncompressed so reads are memory-mapped, and a refresh only fetches the dates
+after the last cached one. With offline=True nothing is fetched at all, so
+notebooks and tests run from the cache (or a synthetic fixture) alone.
+
+Sources:
+- MFApiSource:    daily NAVs by AMFI scheme code from api.mfapi.in
+- YFinanceSource: index/ETF closes by ticker (e.g. ^NSEI) via yfinance
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+from urllib.parse import quote, unquote
+
+import numpy as np
+import pandas as pd
+
+from nav_history import NAVHistory
+
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parent / 'data' / 'nav_cache'
+
+# fetch(key, start) -> Series of values indexed by date, for dates >= start (all history if None)
+Source = Callable[[str, Optional[pd.Timestamp]], pd.Series]
+
+
+class MFApiSource:
+    """
+    Daily NAVs from api.mfapi.in, keyed by AMFI scheme code
+    """
+
+    URL = 'https://api.mfapi.in/mf/{code}'
+
+    def __init__(self, timeout: float = 30.0):
+        import requests
+
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def __call__(self, code: str, start: Optional[pd.Timestamp] = None) -> pd.Series:
+        response = self.session.get(self.URL.format(code=code), timeout=self.timeout)
+        response.raise_for_status()
+        rows = response.json().get('data', [])
+        series = pd.Series(
+            pd.to_numeric([row['nav'] for row in rows], errors='coerce'),
+            index=pd.to_datetime([row['date'] for row in rows], format='%d-%m-%Y'),
+        ).sort_index()
+        return series if start is None else series[series.index >= start]
+
+
+class YFinanceSource:
+    """
+    Daily closes from Yahoo Finance, keyed by ticker (e.g. ^NSEI, ^BSESN)
+    """
+
+    def __call__(self, ticker: str, start: Optional[pd.Timestamp] = None) -> pd.Series:
+        import yfinance as yf
+
+        ticker_data = yf.Ticker(ticker)
+        if start is None:
+            data = ticker_data.history(period='max', auto_adjust=False)
+        else:
+            data = ticker_data.history(start=start, auto_adjust=False)
+        closes = data['Close']
+        closes.index = pd.DatetimeIndex(closes.index).tz_localize(None).normalize()
+        return closes
+
+
+class NAVCache:
+    """
+    Feather-per-series cache with incremental refresh and memory-mapped reads
+    """
+
+    def __init__(self, cache_dir: Path = DEFAULT_CACHE_DIR, workers: int = 8):
+        self.cache_dir = Path(cache_dir)
+        self.workers = workers
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def path_for(self, key: str) -> Path:
+        return self.cache_dir / f"{quote(str(key), safe='')}.feather"
+
+    def keys(self) -> List[str]:
+        return sorted(unquote(path.stem) for path in self.cache_dir.glob('*.feather'))
+
+    def __contains__(self, key) -> bool:
+        return self.path_for(key).exists()
+
+    def read(self, key: str) -> pd.Series:
+        """
+        Cached series for ``key`` (empty if not cached), read through a memory map
+        """
+        import pyarrow.feather as feather
+
+        path = self.path_for(key)
+        if not path.exists():
+            return pd.Series(dtype=np.float64, index=pd.DatetimeIndex([], name='date'), name=str(key))
+        table = feather.read_table(path, memory_map=True)
+        dates = table.column('date').to_numpy()
+        values = table.column('value').to_numpy()
+        return pd.Series(values, index=pd.DatetimeIndex(dates, name='date'), name=str(key))
+
+    def last_date(self, key: str) -> Optional[pd.Timestamp]:
+        import pyarrow.feather as feather
+
+        path = self.path_for(key)
+        if not path.exists():
+            return None
+        dates = feather.read_table(path, columns=['date'], memory_map=True).column('date')
+        return pd.Timestamp(dates[len(dates) - 1].as_py()) if len(dates) else None
+
+    def write(self, key: str, series: pd.Series) -> None:
+        """
+        Replace the cached series for ``key`` (atomically)
+        """
+        series = series[~series.index.duplicated(keep='last')].sort_index().dropna()
+        frame = pd.DataFrame({
+            'date': pd.DatetimeIndex(series.index).astype('datetime64[ns]'),
+            'value': series.to_numpy(dtype=np.float64),
+        })
+        path = self.path_for(key)
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            # Uncompressed so reads can memory-map the columns
+            frame.to_feather(tmp_path, compression='uncompressed')
+            os.replace(tmp_path, path)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+
+    def append(self, key: str, new: pd.Series) -> int:
+        """
+        Add dates after the last cached one; returns the number of new rows
+        """
+        cached = self.read(key)
+        if len(cached):
+            new = new[new.index > cached.index[-1]]
+        new = new.dropna()
+        if len(new) == 0:
+            return 0
+        self.write(key, pd.concat([cached, new]) if len(cached) else new)
+        return len(new)
+
+    def refresh(self, keys: Iterable[str], source: Source, offline: bool = False) -> Dict[str, int]:
+        """
+        Fetch only dates after the last cached date for each key, concurrently
+
+        Returns {key: rows added}. Keys that fail to fetch are reported and
+        keep their cached data. With ``offline`` nothing is fetched.
+        """
+        keys = [str(key) for key in keys]
+        if offline:
+            return {key: 0 for key in keys}
+
+        def refresh_one(key: str) -> int:
+            last = self.last_date(key)
+            fetched = source(key, None if last is None else last + pd.Timedelta(days=1))
+            return self.append(key, fetched)
+
+        added: Dict[str, int] = {}
+        with ThreadPoolExecutor(max_workers=max(1, self.workers)) as pool:
+            futures = {key: pool.submit(refresh_one, key) for key in keys}
+            for key, future in futures.items():
+                try:
+                    added[key] = future.result()
+                except Exception as e:
+                    print(f"⚠️ Could not refresh {key}: {e}")
+                    added[key] = 0
+        return added
+
+    def load_history(self, codes: Iterable[str]) -> NAVHistory:
+        """
+        Date-aligned NAVHistory for the given cached codes (missing codes are skipped)
+        """
+        series = [self.read(code) for code in codes]
+        series = [s for s in series if len(s)]
+        if not series:
+            return NAVHistory([], [], np.empty((0, 0)))
+        # Place every series on the union calendar in one array
+        dates = np.unique(np.concatenate([s.index.values for s in series]))
+        navs = np.full((len(dates), len(series)), np.nan)
+        for i, s in enumerate(series):
+            navs[np.searchsorted(dates, s.index.values), i] = s.to_numpy()
+        return NAVHistory(dates, [s.name for s in series], navs)
+
+    def load_series(self, key: str, dates: pd.DatetimeIndex) -> np.ndarray:
+        """
+        Cached series (e.g. a benchmark) aligned to ``dates``, carrying the last value forward
+        """
+        series = self.read(key)
+        return series.reindex(series.index.union(dates)).ffill().reindex(dates).to_numpy()
+
+    def store_history(self, history: NAVHistory) -> None:
+        """
+        Write every scheme in a NAVHistory to the cache, e.g. to build an offline fixture
+        """
+        for i, code in enumerate(history.codes):
+            self.write(code, pd.Series(history.navs[:, i], index=history.dates))
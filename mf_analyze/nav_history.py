@@ -0,0 +1,311 @@
+"""
+NAV History Engine
+
+Daily NAVs for many schemes held in one date-aligned 2-D array
+(rows = trading days, columns = scheme codes), with vectorised
+return and risk metrics computed across all schemes at once:
+- Daily returns, CAGR and rolling CAGR
+- Annualised volatility, Sharpe and Sortino ratios
+- Maximum drawdown
+- Beta, alpha and up/down capture against a benchmark, either one index
+  for every scheme or each scheme's own (e.g. its category index)
+"""
+
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+TRADING_DAYS = 252
+DAYS_PER_YEAR = 365.25
+
+# Annual risk-free rate used for Sharpe/Sortino (approx. Indian 91-day T-bill yield)
+RISK_FREE_RATE = 0.065
+
+
+def forward_fill(values: np.ndarray) -> np.ndarray:
+    """
+    Forward-fill NaNs down each column between its first and last value
+
+    Leading NaNs (before inception) and trailing NaNs (after a closed or
+    merged scheme's last NAV) stay NaN.
+    """
+    if values.shape[0] == 0:
+        return values.copy()
+    valid = ~np.isnan(values)
+    days = np.arange(values.shape[0])[:, None]
+    rows = np.where(valid, days, 0)
+    np.maximum.accumulate(rows, axis=0, out=rows)
+    filled = values[rows, np.arange(values.shape[1])]
+    # argmax is 0 for an all-NaN column too, so those get no last day at all
+    last = np.where(valid.any(axis=0), values.shape[0] - 1 - valid[::-1].argmax(axis=0), -1)
+    filled[days > last] = np.nan
+    return filled
+
+
+class NAVHistory:
+    """
+    Date-aligned NAV matrix for a set of schemes
+    """
+
+    def __init__(self, dates: Iterable, codes: Sequence, navs: np.ndarray):
+        self.dates = pd.DatetimeIndex(dates)
+        self.codes: List[str] = [str(code) for code in codes]
+        navs = np.asarray(navs, dtype=np.float64)
+        if navs.shape != (len(self.dates), len(self.codes)):
+            raise ValueError(
+                f"NAV array shape {navs.shape} does not match {len(self.dates)} dates x {len(self.codes)} schemes"
+            )
+        if not self.dates.is_monotonic_increasing:
+            order = np.argsort(self.dates.values, kind="stable")
+            self.dates = self.dates[order]
+            navs = navs[order]
+        # Holidays/missing days inside a scheme's history carry the last NAV; none after it ends
+        self.navs = forward_fill(navs)
+        self._columns: Dict[str, int] = {code: i for i, code in enumerate(self.codes)}
+
+    @classmethod
+    def from_long(cls, df: pd.DataFrame, date_col: str = 'date',
+                  code_col: str = 'scheme_code', nav_col: str = 'nav') -> 'NAVHistory':
+        """
+        Build from long rows of (date, scheme_code, nav), e.g. an mfapi.in dump
+        """
+        wide = df.pivot_table(index=pd.to_datetime(df[date_col]), columns=df[code_col].astype(str),
+                              values=nav_col, aggfunc='last')
+        return cls.from_wide(wide)
+
+    @classmethod
+    def from_wide(cls, df: pd.DataFrame) -> 'NAVHistory':
+        """
+        Build from a DataFrame indexed by date with one NAV column per scheme
+        """
+        return cls(pd.to_datetime(df.index), df.columns, df.to_numpy(dtype=np.float64, na_value=np.nan))
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(self.navs, index=self.dates, columns=self.codes)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __contains__(self, code) -> bool:
+        return str(code) in self._columns
+
+    def column(self, code) -> np.ndarray:
+        return self.navs[:, self._columns[str(code)]]
+
+    def select(self, codes: Iterable) -> 'NAVHistory':
+        """
+        Sub-history for the given scheme codes, in that order
+        """
+        idx = [self._columns[str(code)] for code in codes]
+        return NAVHistory(self.dates, [self.codes[i] for i in idx], self.navs[:, idx])
+
+    def slice(self, start=None, end=None) -> 'NAVHistory':
+        """
+        Sub-history between two dates (inclusive)
+        """
+        lo = 0 if start is None else self.dates.searchsorted(pd.Timestamp(start), side='left')
+        hi = len(self.dates) if end is None else self.dates.searchsorted(pd.Timestamp(end), side='right')
+        return NAVHistory(self.dates[lo:hi], self.codes, self.navs[lo:hi])
+
+    # ---- vectorised metrics -------------------------------------------------
+
+    def returns(self, log: bool = False) -> np.ndarray:
+        """
+        Daily returns, shape (days - 1, schemes); NaN before each scheme's inception
+        """
+        if log:
+            return np.diff(np.log(self.navs), axis=0)
+        return self.navs[1:] / self.navs[:-1] - 1.0
+
+    def _first_last(self):
+        valid = ~np.isnan(self.navs)
+        has_data = valid.any(axis=0)
+        first = valid.argmax(axis=0)
+        last = len(self.dates) - 1 - valid[::-1].argmax(axis=0)
+        return first, last, has_data
+
+    def cagr(self) -> np.ndarray:
+        """
+        Compound annual growth from each scheme's first to last NAV
+        """
+        first, last, has_data = self._first_last()
+        cols = np.arange(len(self.codes))
+        years = (self.dates.values[last] - self.dates.values[first]) / np.timedelta64(1, 'D') / DAYS_PER_YEAR
+        with np.errstate(divide='ignore', invalid='ignore'):
+            growth = self.navs[last, cols] / self.navs[first, cols]
+            result = np.where((years > 0) & has_data, growth ** (1.0 / years) - 1.0, np.nan)
+        return result
+
+    def rolling_cagr(self, years: float = 3.0) -> np.ndarray:
+        """
+        CAGR over the trailing ``years`` at every date, shape (days, schemes)
+
+        Each date is compared with the last trading day on or before the date
+        ``years`` earlier; dates without a full window are NaN.
+        """
+        offset = pd.Timedelta(days=round(years * DAYS_PER_YEAR))
+        start_rows = self.dates.searchsorted(self.dates - offset, side='right') - 1
+        has_window = start_rows >= 0
+        start_rows = np.clip(start_rows, 0, None)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            growth = self.navs / self.navs[start_rows]
+            result = growth ** (1.0 / years) - 1.0
+        result[~has_window] = np.nan
+        return result
+
+    def volatility(self, returns: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Annualised standard deviation of daily returns
+        """
+        r = self.returns() if returns is None else returns
+        with np.errstate(invalid='ignore'):
+            return _nanstd(r) * np.sqrt(TRADING_DAYS)
+
+    def sharpe(self, risk_free: float = RISK_FREE_RATE, returns: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Annualised mean excess return divided by annualised volatility
+        """
+        excess = (self.returns() if returns is None else returns) - _daily_rate(risk_free)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return _nanmean(excess) / _nanstd(excess) * np.sqrt(TRADING_DAYS)
+
+    def sortino(self, risk_free: float = RISK_FREE_RATE, returns: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Annualised mean excess return divided by annualised downside deviation
+        """
+        excess = (self.returns() if returns is None else returns) - _daily_rate(risk_free)
+        downside = np.minimum(excess, 0.0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            downside_dev = np.sqrt(_nanmean(downside * downside))
+            return _nanmean(excess) / downside_dev * np.sqrt(TRADING_DAYS)
+
+    def max_drawdown(self) -> np.ndarray:
+        """
+        Largest peak-to-trough fall, as a negative fraction (e.g. -0.35)
+        """
+        return np.fmin.reduce(self.drawdowns(), axis=0)
+
+    def drawdowns(self) -> np.ndarray:
+        """
+        Drawdown from the running peak at every date, shape (days, schemes)
+        """
+        peaks = np.fmax.accumulate(self.navs, axis=0)
+        return self.navs / peaks - 1.0
+
+    def beta(self, benchmark: np.ndarray, returns: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Beta of each scheme against benchmark daily returns (same length as ``returns``)
+
+        ``benchmark`` is one series for every scheme, or one column per scheme
+        (e.g. each fund's category index). Uses only the days where both the
+        scheme and its benchmark have a return.
+        """
+        r = self.returns() if returns is None else returns
+        _, _, beta = _regression(r, benchmark)
+        return beta
+
+    def alpha_beta(self, benchmark: np.ndarray, risk_free: float = RISK_FREE_RATE,
+                   returns: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Annualised alpha and beta of each scheme's excess returns on its benchmark's
+
+        ``benchmark`` is shaped as for beta(); alpha is annualised as in
+        rolling.rolling_alpha_beta (daily intercept x TRADING_DAYS).
+        """
+        r = self.returns() if returns is None else returns
+        mean_r, mean_b, beta = _regression(r, benchmark)
+        rf = _daily_rate(risk_free)
+        return ((mean_r - rf) - beta * (mean_b - rf)) * TRADING_DAYS, beta
+
+    def capture(self, benchmark: np.ndarray, returns: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Up- and down-market capture ratios (%) over the whole history
+
+        The scheme's returns summed over the days its benchmark rose (fell),
+        divided by the benchmark's, as in rolling.rolling_capture.
+        """
+        r = self.returns() if returns is None else returns
+        r0, b0, _ = _paired(r, benchmark)
+        up, down = b0 > 0, b0 < 0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            up_capture = np.where(up, r0, 0.0).sum(axis=0) / np.where(up, b0, 0.0).sum(axis=0) * 100.0
+            down_capture = np.where(down, r0, 0.0).sum(axis=0) / np.where(down, b0, 0.0).sum(axis=0) * 100.0
+        return up_capture, down_capture
+
+    def relative_metrics(self, benchmark: np.ndarray, risk_free: float = RISK_FREE_RATE) -> pd.DataFrame:
+        """
+        Alpha, beta and capture ratios for every scheme in one pass, indexed by scheme code
+
+        ``benchmark`` is benchmark levels on ``self.dates``: 1-D for one index,
+        or (days, schemes) with each scheme's own index (see benchmarks.py).
+        """
+        r = self.returns()
+        b = _level_returns(benchmark)
+        alpha, beta = self.alpha_beta(b, risk_free, r)
+        up, down = self.capture(b, r)
+        return pd.DataFrame({'alpha': alpha, 'beta': beta, 'up_capture': up, 'down_capture': down},
+                            index=pd.Index(self.codes, name='scheme_code'))
+
+    def metrics(self, benchmark: Optional[np.ndarray] = None,
+                risk_free: float = RISK_FREE_RATE) -> pd.DataFrame:
+        """
+        All summary metrics in one table indexed by scheme code
+
+        ``benchmark`` is an array of benchmark NAVs/index levels on ``self.dates``
+        (or one column per scheme); when given a ``beta`` column is added.
+        """
+        r = self.returns()
+        table = pd.DataFrame({
+            'cagr': self.cagr(),
+            'volatility': self.volatility(r),
+            'sharpe': self.sharpe(risk_free, r),
+            'sortino': self.sortino(risk_free, r),
+            'max_drawdown': self.max_drawdown(),
+        }, index=pd.Index(self.codes, name='scheme_code'))
+        if benchmark is not None:
+            table['beta'] = self.beta(_level_returns(benchmark), r)
+        return table
+
+
+def _level_returns(levels) -> np.ndarray:
+    levels = np.asarray(levels, dtype=np.float64)
+    return levels[1:] / levels[:-1] - 1.0
+
+
+def _paired(returns: np.ndarray, benchmark) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # Scheme and benchmark returns zeroed wherever either is missing, and the days left per scheme
+    b = np.asarray(benchmark, dtype=np.float64)
+    b = np.broadcast_to(b.reshape(-1, 1) if b.ndim == 1 else b, returns.shape)
+    mask = ~np.isnan(returns) & ~np.isnan(b)
+    return np.where(mask, returns, 0.0), np.where(mask, b, 0.0), mask.sum(axis=0)
+
+
+def _regression(returns: np.ndarray, benchmark) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # Means of both sides over the shared days, and the OLS slope (beta)
+    r0, b0, n = _paired(returns, benchmark)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean_r = r0.sum(axis=0) / n
+        mean_b = b0.sum(axis=0) / n
+        cov = (r0 * b0).sum(axis=0) / n - mean_r * mean_b
+        var_b = (b0 * b0).sum(axis=0) / n - mean_b * mean_b
+        return mean_r, mean_b, np.where(n > 1, cov / var_b, np.nan)
+
+
+def _daily_rate(annual_rate: float) -> float:
+    return (1.0 + annual_rate) ** (1.0 / TRADING_DAYS) - 1.0
+
+
+def _nanmean(values: np.ndarray) -> np.ndarray:
+    # Column means ignoring NaN; NaN (without a warning) for all-NaN columns
+    n = (~np.isnan(values)).sum(axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(n > 0, np.nansum(values, axis=0) / n, np.nan)
+
+
+def _nanstd(values: np.ndarray) -> np.ndarray:
+    # Column sample standard deviation (ddof=1) ignoring NaN
+    n = (~np.isnan(values)).sum(axis=0)
+    sq = np.nansum((values - _nanmean(values)) ** 2, axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(n > 1, np.sqrt(sq / (n - 1)), np.nan)
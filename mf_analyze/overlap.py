@@ -0,0 +1,218 @@
+"""
+Holdings Overlap Engine
+
+Monthly portfolio disclosures for many schemes, held as one sparse
+scheme x security weight matrix (CSR, weights as fractions of the scheme's
+assets). On top of it:
+- Overlap between schemes: sum over shared securities of the smaller
+  weight (the usual "portfolio overlap %"), optionally top-10 holdings only
+- Sector overlap, from scheme x sector weights (weights @ sector indicator)
+- Look-through exposure of a portfolio (allocation @ weights) and its
+  overlap with every scheme at once
+
+Overlap is computed for a block of query schemes against all schemes in
+one pass: each stored (scheme, security) weight is clipped to the query's
+weight in that security and the clipped values are summed per scheme with
+a sparse product, so a query costs O(stored holdings) rather than a merge
+per pair.
+"""
+
+from typing import Dict, Iterable, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+# Upper bound on query x holdings values materialised at once in min_overlap
+MAX_BLOCK_ELEMENTS = 1 << 22
+
+UNCLASSIFIED = 'Unclassified'
+
+
+def min_overlap(queries, weights: sparse.csr_matrix, max_elements: int = MAX_BLOCK_ELEMENTS) -> np.ndarray:
+    """
+    Sum of element-wise minimum weights of each query row against each row of ``weights``
+
+    ``queries`` is (k, securities), dense or sparse; returns a dense (k, schemes) array.
+    """
+    weights = sparse.csr_matrix(weights)
+    n, nnz = weights.shape[0], weights.nnz
+    # (schemes, stored entries) indicator: row i sums the entries stored in row i of weights
+    collect = sparse.csr_matrix((np.ones(nnz), np.arange(nnz), weights.indptr), shape=(n, nnz))
+    result = np.zeros((queries.shape[0], n))
+    if nnz == 0:
+        return result
+    block = max(1, max_elements // nnz)
+    for start in range(0, queries.shape[0], block):
+        chunk = queries[start:start + block]
+        dense = chunk.toarray() if sparse.issparse(chunk) else np.asarray(chunk, dtype=np.float64)
+        clipped = np.minimum(dense[:, weights.indices], weights.data)
+        result[start:start + block] = (collect @ clipped.T).T
+    return result
+
+
+class HoldingsMatrix:
+    """
+    Sparse scheme x security weight matrix with overlap and exposure queries
+    """
+
+    def __init__(self, weights, codes: Iterable, securities: Iterable,
+                 sectors: Optional[Iterable] = None, security_names: Optional[Iterable] = None):
+        self.weights = sparse.csr_matrix(weights, dtype=np.float64)
+        self.weights.sum_duplicates()
+        self.codes: List[str] = [str(code) for code in codes]
+        self.securities = np.asarray(list(securities), dtype=str)
+        if self.weights.shape != (len(self.codes), len(self.securities)):
+            raise ValueError(
+                f"Weight matrix shape {self.weights.shape} does not match "
+                f"{len(self.codes)} schemes x {len(self.securities)} securities"
+            )
+        self.sectors = (np.asarray(list(sectors), dtype=str) if sectors is not None
+                        else np.full(len(self.securities), UNCLASSIFIED))
+        self.security_names = (np.asarray(list(security_names), dtype=str) if security_names is not None
+                               else self.securities)
+        self._rows: Dict[str, int] = {code: i for i, code in enumerate(self.codes)}
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, code_col: str = 'scheme_code', security_col: str = 'isin',
+                   weight_col: str = 'weight', sector_col: str = 'sector', name_col: str = 'security_name',
+                   percent: bool = True) -> 'HoldingsMatrix':
+        """
+        Build from long disclosure rows of (scheme_code, isin, weight[, sector, security_name])
+
+        Weights are % of the scheme's assets unless ``percent`` is False.
+        Repeated rows for the same scheme and security are added together.
+        """
+        code_ids, codes = pd.factorize(df[code_col].astype(str).str.strip())
+        security_ids, securities = pd.factorize(df[security_col].astype(str).str.strip().str.upper())
+        weights = pd.to_numeric(df[weight_col], errors='coerce').fillna(0.0).to_numpy(dtype=np.float64)
+        if percent:
+            weights = weights / 100.0
+        matrix = sparse.csr_matrix((weights, (code_ids, security_ids)), shape=(len(codes), len(securities)))
+
+        def per_security(column: str) -> Optional[pd.Series]:
+            if column not in df.columns:
+                return None
+            # First non-empty value per security
+            return df[column].groupby(security_ids).first().reindex(range(len(securities)))
+
+        sectors = per_security(sector_col)
+        names = per_security(name_col)
+        return cls(matrix, codes, securities,
+                   None if sectors is None else sectors.fillna(UNCLASSIFIED).astype(str),
+                   None if names is None else np.where(names.isna(), securities, names.astype(str)))
+
+    @classmethod
+    def from_csv(cls, path, **kwargs) -> 'HoldingsMatrix':
+        return cls.from_frame(pd.read_csv(path, dtype={'scheme_code': str}), **kwargs)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __contains__(self, code) -> bool:
+        return str(code) in self._rows
+
+    def _row_ids(self, codes: Optional[Iterable]) -> np.ndarray:
+        if codes is None:
+            return np.arange(len(self.codes))
+        return np.array([self._rows[str(code)] for code in codes], dtype=np.int64)
+
+    def select(self, codes: Iterable) -> 'HoldingsMatrix':
+        """
+        Sub-matrix for the given scheme codes, in that order
+        """
+        rows = self._row_ids(codes)
+        return HoldingsMatrix(self.weights[rows], [self.codes[i] for i in rows], self.securities,
+                              self.sectors, self.security_names)
+
+    def top_n(self, n: int = 10) -> 'HoldingsMatrix':
+        """
+        Only each scheme's ``n`` largest holdings (weights are not renormalised)
+        """
+        w = self.weights
+        rows = np.repeat(np.arange(w.shape[0]), np.diff(w.indptr))
+        order = np.lexsort((-w.data, rows))
+        rank = np.arange(w.nnz) - w.indptr[rows[order]]
+        keep = np.sort(order[rank < n])
+        top = sparse.csr_matrix((w.data[keep], (rows[keep], w.indices[keep])), shape=w.shape)
+        return HoldingsMatrix(top, self.codes, self.securities, self.sectors, self.security_names)
+
+    # ---- overlap ------------------------------------------------------------
+
+    def overlap(self, codes: Optional[Iterable] = None) -> pd.DataFrame:
+        """
+        Overlap (%) of the given schemes (default: all) with every scheme
+
+        Rows are the query schemes, columns all schemes in the matrix.
+        """
+        rows = self._row_ids(codes)
+        values = min_overlap(self.weights[rows], self.weights) * 100.0
+        return pd.DataFrame(values, index=pd.Index([self.codes[i] for i in rows], name='scheme_code'),
+                            columns=self.codes)
+
+    def sector_weights(self) -> pd.DataFrame:
+        """
+        Scheme x sector weights (fractions), summed over each sector's securities
+        """
+        sector_ids, labels = pd.factorize(self.sectors, sort=True)
+        indicator = sparse.csr_matrix((np.ones(len(sector_ids)), (np.arange(len(sector_ids)), sector_ids)),
+                                      shape=(len(self.securities), len(labels)))
+        return pd.DataFrame((self.weights @ indicator).toarray(),
+                            index=pd.Index(self.codes, name='scheme_code'), columns=labels)
+
+    def sector_overlap(self, codes: Optional[Iterable] = None) -> pd.DataFrame:
+        """
+        Sector overlap (%) of the given schemes (default: all) with every scheme
+        """
+        sectors = self.sector_weights()
+        rows = self._row_ids(codes)
+        values = min_overlap(sectors.to_numpy()[rows], sparse.csr_matrix(sectors.to_numpy())) * 100.0
+        return pd.DataFrame(values, index=sectors.index[rows], columns=self.codes)
+
+    # ---- portfolio look-through ---------------------------------------------
+
+    def _allocation(self, allocation: Union[Dict, pd.Series]) -> np.ndarray:
+        allocation = pd.Series(allocation, dtype=np.float64)
+        allocation.index = allocation.index.astype(str)
+        missing = [code for code in allocation.index if code not in self._rows]
+        if missing:
+            print(f"⚠️ No holdings disclosed for {len(missing)} scheme(s): {', '.join(missing)}")
+        known = allocation.drop(missing)
+        fractions = np.zeros(len(self.codes))
+        fractions[self._row_ids(known.index)] = known.to_numpy()
+        total = allocation.sum()
+        return fractions / total if total else fractions
+
+    def exposure_vector(self, allocation: Union[Dict, pd.Series]) -> np.ndarray:
+        """
+        Portfolio weight in each security given scheme code -> amount invested
+        """
+        return self.weights.T @ self._allocation(allocation)
+
+    def look_through(self, allocation: Union[Dict, pd.Series], by: str = 'security') -> pd.DataFrame:
+        """
+        Underlying exposure of a portfolio (scheme code -> amount), by 'security' or 'sector'
+
+        ``weight`` is the % of the whole portfolio; ``amount`` uses the same
+        currency as the allocation.
+        """
+        total = float(pd.Series(allocation, dtype=np.float64).sum())
+        exposure = self.exposure_vector(allocation)
+        frame = pd.DataFrame({'isin': self.securities, 'security_name': self.security_names,
+                              'sector': self.sectors, 'weight': exposure * 100.0, 'amount': exposure * total})
+        frame = frame[frame['weight'] > 0]
+        if by == 'sector':
+            frame = frame.groupby('sector', as_index=False)[['weight', 'amount']].sum()
+        elif by != 'security':
+            raise ValueError(f"by must be 'security' or 'sector', not {by!r}")
+        return frame.sort_values('weight', ascending=False).reset_index(drop=True)
+
+    def portfolio_overlap(self, allocation: Union[Dict, pd.Series], top: Optional[int] = None) -> pd.Series:
+        """
+        Overlap (%) of a portfolio's look-through holdings with every scheme, highest first
+        """
+        exposure = self.exposure_vector(allocation)
+        weights = self.top_n(top).weights if top else self.weights
+        values = min_overlap(exposure.reshape(1, -1), weights)[0] * 100.0
+        return pd.Series(values, index=pd.Index(self.codes, name='scheme_code'),
+                         name='overlap').sort_values(ascending=False)
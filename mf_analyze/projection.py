@@ -0,0 +1,154 @@
+"""
+SIP Projection Engine
+
+Monte Carlo projections of a SIP plan's value over 10-20 years, built by
+block-bootstrapping the held funds' own daily returns:
+- The portfolio is held at its current weights; each simulated path strings
+  together randomly chosen blocks of consecutive historical trading days,
+  which keeps the funds' co-movement and short-run volatility clustering
+- Paths are simulated in fixed-size chunks, and only cumulative block sums
+  are drawn (never a daily path), so memory stays at chunk x blocks floats
+  whatever the horizon or number of paths
+- Every chunk has its own seed spawned from one SeedSequence, so results
+  are the same whether the chunks run in one process or across a pool
+
+A month is TRADING_DAYS / 12 trading days; contributions go in at the start
+of each month and grow with that month's return.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from nav_history import NAVHistory, TRADING_DAYS
+
+MONTH_DAYS = TRADING_DAYS // 12
+
+# Default bootstrap block: one month of consecutive trading days
+BLOCK_DAYS = MONTH_DAYS
+
+# Paths simulated per batch (memory: a few chunk x months float arrays)
+PATH_CHUNK = 5000
+
+PERCENTILES = (5, 25, 50, 75, 95)
+
+
+def portfolio_returns(history: NAVHistory, weights: Union[pd.Series, dict]) -> np.ndarray:
+    """
+    Daily log returns of ``history``'s funds held at constant ``weights`` {scheme_code: value}
+
+    On days before a fund's inception its weight is spread over the funds
+    that do have a return; days with no return at all are dropped.
+    """
+    weights = pd.Series(weights, dtype=np.float64).rename(index=str)
+    weights = weights[weights > 0]
+    codes = [code for code in weights.index if code in history]
+    missing = sorted(set(weights.index) - set(codes))
+    if missing:
+        print(f"⚠️ No NAV history for scheme codes: {', '.join(missing)}")
+    if not codes:
+        raise ValueError("None of the weighted schemes are in the NAV history")
+
+    returns = history.select(codes).returns()
+    w = weights[codes].to_numpy()
+    valid = ~np.isnan(returns)
+    held = valid @ w
+    daily = np.nansum(returns * w, axis=1)
+    keep = held > 0
+    return np.log1p(daily[keep] / held[keep])
+
+
+def contributions(monthly: float, n_months: int, initial: float = 0.0, step_up: float = 0.0) -> np.ndarray:
+    """
+    Amount invested at the start of each month: ``monthly`` raised by ``step_up`` every year, plus ``initial``
+    """
+    amounts = monthly * (1.0 + step_up) ** (np.arange(n_months) // 12)
+    amounts[0] += initial
+    return amounts
+
+
+def _simulate_chunk(cum: np.ndarray, n_paths: int, amounts: np.ndarray, block_days: int,
+                    record: np.ndarray, seed: np.random.SeedSequence) -> np.ndarray:
+    # cum[t] is the log growth over the first t historical days; a block
+    # starting at s grows by cum[s + block_days] - cum[s]
+    rng = np.random.default_rng(seed)
+    n_months = len(amounts)
+    n_blocks = -(-n_months * MONTH_DAYS // block_days)
+    starts = rng.integers(0, len(cum) - block_days, size=(n_paths, n_blocks))
+    block_growth = cum[starts + block_days] - cum[starts]
+    before = np.cumsum(block_growth, axis=1) - block_growth
+
+    # Log growth from day 0 to each month end: whole blocks plus part of the current one
+    ends = np.arange(1, n_months + 1) * MONTH_DAYS
+    block = (ends - 1) // block_days
+    offset = ends - block * block_days
+    current = starts[:, block]
+    level = before[:, block] + cum[current + offset] - cum[current]
+
+    # Value at month m: sum over k <= m of amount_k * growth from the start of month k
+    previous = np.concatenate([np.zeros((n_paths, 1)), level[:, :-1]], axis=1)
+    invested = np.cumsum(amounts * np.exp(-previous), axis=1)
+    return np.exp(level[:, record]) * invested[:, record]
+
+
+def simulate(log_returns: np.ndarray, amounts: np.ndarray, n_paths: int = 100000, block_days: int = BLOCK_DAYS,
+             seed: int = 42, chunk_size: int = PATH_CHUNK, jobs: int = 1,
+             record: Optional[Sequence[int]] = None) -> np.ndarray:
+    """
+    Simulated values at the end of the months in ``record`` (default: every year end), shape (n_paths, len(record))
+
+    ``amounts`` is the contribution at the start of each month (see
+    contributions()); its length sets the horizon.
+    """
+    log_returns = np.asarray(log_returns, dtype=np.float64)
+    if len(log_returns) <= block_days:
+        raise ValueError(f"Need more than {block_days} days of returns to bootstrap, got {len(log_returns)}")
+    amounts = np.asarray(amounts, dtype=np.float64)
+    if record is None:
+        record = np.arange(11, len(amounts), 12)
+    record = np.asarray(record, dtype=np.int64)
+    cum = np.concatenate([[0.0], np.cumsum(log_returns)])
+
+    sizes = [min(chunk_size, n_paths - start) for start in range(0, n_paths, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    args = [(cum, size, amounts, block_days, record, chunk_seed) for size, chunk_seed in zip(sizes, seeds)]
+    if jobs > 1 and len(args) > 1:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(args))) as pool:
+            chunks = list(pool.map(_simulate_chunk, *zip(*args)))
+    else:
+        chunks = [_simulate_chunk(*arg) for arg in args]
+    return np.concatenate(chunks) if chunks else np.empty((0, len(record)))
+
+
+def project_sip(log_returns: np.ndarray, monthly: float, years: int = 15, initial: float = 0.0,
+                step_up: float = 0.0, n_paths: int = 100000, block_days: int = BLOCK_DAYS,
+                percentiles: Sequence[float] = PERCENTILES, goal: Optional[float] = None, seed: int = 42,
+                chunk_size: int = PATH_CHUNK, jobs: int = 1) -> Tuple[pd.DataFrame, pd.Series]:
+    """
+    Percentile bands of a SIP plan's value at each year end, and a summary of the final year
+
+    ``log_returns`` are the portfolio's daily log returns (see
+    portfolio_returns()). Returns (bands indexed by year with the amount
+    invested so far and one column per percentile, summary with the final
+    invested amount, mean and percentile values, probability of ending
+    below the amount invested and, with a ``goal``, of reaching it).
+    """
+    amounts = contributions(monthly, int(round(years * 12)), initial, step_up)
+    record = np.arange(11, len(amounts), 12)
+    values = simulate(log_returns, amounts, n_paths, block_days, seed, chunk_size, jobs, record)
+
+    invested = np.cumsum(amounts)[record]
+    bands = pd.DataFrame(np.percentile(values, percentiles, axis=0).T,
+                         index=pd.Index(np.arange(1, len(record) + 1), name='year'),
+                         columns=[f'p{p:g}' for p in percentiles])
+    bands.insert(0, 'invested', invested)
+
+    final = values[:, -1]
+    summary = pd.Series({'invested': invested[-1], 'mean': final.mean(),
+                         **{f'p{p:g}': value for p, value in zip(percentiles, np.percentile(final, percentiles))},
+                         'prob_below_invested': (final < invested[-1]).mean()})
+    if goal is not None:
+        summary['prob_goal'] = (final >= goal).mean()
+    return bands, summary
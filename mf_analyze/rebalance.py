@@ -0,0 +1,267 @@
+"""
+Rebalancing Optimiser
+
+Trades that bring a portfolio back to its target allocation (by category or
+by scheme) for the least cost, solved as one mixed-integer linear programme
+(scipy.optimize.milp, HiGHS):
+- Selling costs tax plus exit load. Each folio's FIFO lots give a convex
+  cost-per-rupee curve (TaxLots.cost_curves), so cheap lots go first;
+  holdings without lots count as one long-term lot at their average cost
+- Every trade is either zero or at least the minimum trade size, and no
+  scheme is bought and sold at the same time
+- Deviation from target beyond a tolerance band costs ``penalty`` per
+  rupee, so drift that is dearer to fix than to keep is left alone
+
+stress_test() replays thousands of simulated market paths in batched NumPy
+(correlated normal log-returns, processed in fixed-size chunks) and
+compares portfolios: return distribution, VaR/CVaR, drawdowns and how often
+the allocation drifts out of band again.
+"""
+
+from typing import Dict, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from nav_history import TRADING_DAYS
+from tax_lots import DEFAULT_EXIT_LOAD, ExitLoads, TaxLots, tax_rates
+
+# Stamp duty on mutual fund purchases
+STAMP_DUTY = 0.00005
+
+DEFAULT_MIN_TRADE = 1000.0
+
+# Selling-cost stretches within this cost per rupee (0.05%) are merged
+COST_RESOLUTION = 0.0005
+
+# Fixed cost per trade (rupees). Above zero it favours fewer trades, but
+# fixed charges make the MILP much harder to solve, so it is off by default
+TRADE_COST = 0.0
+
+# Relative optimality gap at which the MILP solver stops (0.1% of the plan's cost)
+MIP_GAP = 1e-3
+
+# Scenarios simulated per batch in stress_test (memory: chunk x steps x funds floats)
+STRESS_CHUNK = 2000
+
+
+def _targets(targets: Union[Dict, pd.Series], groups: pd.Index) -> pd.Series:
+    targets = pd.Series(targets, dtype=np.float64)
+    targets.index = targets.index.astype(str)
+    unheld = [group for group in targets.index if group not in groups and targets[group] > 0]
+    if unheld:
+        print(f"⚠️ Nothing held to buy for target(s): {', '.join(unheld)}")
+    return targets.reindex(groups.union(targets.index), fill_value=0.0) / targets.sum()
+
+
+def selling_costs(holdings: pd.DataFrame, tax_lots: Optional[TaxLots] = None, as_of=None,
+                  exit_loads: ExitLoads = DEFAULT_EXIT_LOAD, resolution: float = COST_RESOLUTION) -> pd.DataFrame:
+    """
+    Convex selling-cost stretches per scheme: scheme_code, proceeds, tax, exit_load, cost_per_rupee
+
+    Schemes with tax lots use their folios' FIFO cost curves at current_nav;
+    the rest are one long-term lot of current_value at invested_amount.
+    Stretches of a scheme whose cost per rupee rounds to the same multiple
+    of ``resolution`` are merged, across folios too.
+    """
+    codes = holdings['scheme_code'].astype(str)
+    curves = pd.DataFrame(columns=['scheme_code', 'proceeds', 'tax', 'exit_load', 'cost_per_rupee'])
+    if tax_lots is not None:
+        navs = holdings.groupby(codes)['current_nav'].last()
+        curves = tax_lots.cost_curves(navs, as_of, exit_loads, codes=codes.tolist()).drop(columns='folio')
+    rest = holdings[~codes.isin(curves['scheme_code'])]
+    if len(rest):
+        as_of = pd.Timestamp(as_of if as_of is not None else pd.Timestamp.today()).normalize()
+        gain = (rest['current_value'] - rest['invested_amount']).to_numpy(np.float64)
+        tax = gain * tax_rates(np.full(len(rest), as_of.to_datetime64()), np.ones(len(rest), dtype=bool))
+        single = pd.DataFrame({'scheme_code': rest['scheme_code'].astype(str).to_numpy(),
+                               'proceeds': rest['current_value'].to_numpy(np.float64), 'tax': tax,
+                               'exit_load': 0.0})
+        single['cost_per_rupee'] = single['tax'] / single['proceeds']
+        curves = single if curves.empty else pd.concat([curves, single], ignore_index=True)
+    curves = curves[curves['proceeds'] > 0]
+    # One stretch per scheme and cost bucket: the solver takes cheap stretches first anyway
+    bucket = np.round(curves['cost_per_rupee'].to_numpy(np.float64) / resolution)
+    curves = curves.groupby([curves['scheme_code'], bucket], sort=True)[['proceeds', 'tax', 'exit_load']].sum()
+    curves['cost_per_rupee'] = (curves['tax'] + curves['exit_load']) / curves['proceeds']
+    return curves.reset_index(level=0).reset_index(drop=True)
+
+
+def rebalance(holdings: pd.DataFrame, targets: Union[Dict, pd.Series], by: str = 'category',
+              tax_lots: Optional[TaxLots] = None, exit_loads: ExitLoads = DEFAULT_EXIT_LOAD,
+              min_trade: float = DEFAULT_MIN_TRADE, cash: float = 0.0, tolerance: float = 0.0,
+              penalty: float = 1.0, harvest_losses: bool = False, trade_cost: float = TRADE_COST,
+              as_of=None, time_limit: float = 10.0, mip_gap: float = MIP_GAP):
+    """
+    Least-cost trades towards ``targets`` ({category or scheme_code: weight})
+
+    ``holdings`` needs scheme_code, ``by``, current_value, invested_amount
+    and (with tax lots) current_nav. ``cash`` is new money to invest
+    (negative: to withdraw). Groups within ``tolerance`` (fraction of the
+    portfolio) of target cost nothing; beyond it every rupee of deviation
+    costs ``penalty``. Realised losses only count as a saving with
+    ``harvest_losses`` (they are worth something only against other gains).
+    A ``trade_cost`` per trade favours plans with fewer trades, at the price
+    of a slower solve. No scheme is bought beyond its group's target (plus band).
+    Returns (trades per scheme, allocation before/after).
+    """
+    # scipy.optimize is slow to import; only load it when a plan is solved
+    from scipy import sparse
+    from scipy.optimize import Bounds, LinearConstraint, milp
+
+    holdings = holdings.reset_index(drop=True)
+    codes = holdings['scheme_code'].astype(str).to_numpy()
+    group_of = holdings[by].astype(str).to_numpy()
+    group_ids, groups = pd.factorize(group_of, sort=True)
+    targets = _targets(targets, pd.Index(groups))
+    groups = targets.index
+    group_ids = groups.get_indexer(group_of)
+    n, n_groups = len(holdings), len(groups)
+
+    values = holdings['current_value'].to_numpy(np.float64)
+    total = values.sum() + cash
+    if total <= 0:
+        raise ValueError("Nothing left to allocate after the cash withdrawal")
+    current = np.bincount(group_ids, weights=values, minlength=n_groups)
+    target_values = targets.to_numpy() * total
+
+    curves = selling_costs(holdings, tax_lots, as_of, exit_loads)
+    segment_holding = pd.Index(codes).get_indexer(curves['scheme_code'])
+    curves, segment_holding = curves[segment_holding >= 0], segment_holding[segment_holding >= 0]
+    m = len(curves)
+    capacity = np.bincount(segment_holding, weights=curves['proceeds'], minlength=n)
+
+    # Variables: buys b (n), sells per cost stretch s (m), buy/sell switches zb, zs (n each), deviations d
+    ib, is_, izb, izs, idv = 0, n, n + m, 2 * n + m, 3 * n + m
+    n_vars = 3 * n + m + n_groups
+    slopes = curves['cost_per_rupee'].to_numpy(np.float64)
+    if not harvest_losses:
+        slopes = np.maximum(slopes, curves['exit_load'].to_numpy(np.float64) / curves['proceeds'].to_numpy(np.float64))
+    cost = np.concatenate([np.full(n, STAMP_DUTY), slopes, np.full(2 * n, trade_cost), np.full(n_groups, penalty)])
+    band = tolerance * total
+    max_buy = np.maximum(target_values[group_ids] + band, min_trade)
+    lower = np.zeros(n_vars)
+    upper = np.concatenate([max_buy, curves['proceeds'].to_numpy(np.float64),
+                            np.ones(2 * n), np.full(n_groups, np.inf)])
+    integrality = np.zeros(n_vars)
+    integrality[izb:idv] = 1
+
+    rows, cols, data, lb, ub = [], [], [], [], []
+
+    def add(row_cols, row_data, low, high):
+        row = len(lb)
+        rows.extend([row] * len(row_cols))
+        cols.extend(row_cols)
+        data.extend(row_data)
+        lb.append(low)
+        ub.append(high)
+
+    # Money in equals money out plus new cash
+    add(list(range(ib, ib + n)) + list(range(is_, is_ + m)), [1.0] * n + [-1.0] * m, cash, cash)
+    # |value after - target| - tolerance <= d, per group
+    for g in range(n_groups):
+        buys = [ib + i for i in np.flatnonzero(group_ids == g)]
+        sells = [is_ + k for k in np.flatnonzero(group_ids[segment_holding] == g)]
+        trade_cols = buys + sells + [idv + g]
+        add(trade_cols, [1.0] * len(buys) + [-1.0] * len(sells) + [-1.0], -np.inf,
+            target_values[g] + band - current[g])
+        add(trade_cols, [-1.0] * len(buys) + [1.0] * len(sells) + [-1.0], -np.inf,
+            current[g] - target_values[g] + band)
+    # Trades are zero or at least min_trade (a holding smaller than that may be sold whole)
+    for i in range(n):
+        add([ib + i, izb + i], [1.0, -max_buy[i]], -np.inf, 0.0)
+        add([ib + i, izb + i], [1.0, -min_trade], 0.0, np.inf)
+        sells = [is_ + k for k in np.flatnonzero(segment_holding == i)]
+        add(sells + [izs + i], [1.0] * len(sells) + [-capacity[i]], -np.inf, 0.0)
+        add(sells + [izs + i], [1.0] * len(sells) + [-min(min_trade, capacity[i])], 0.0, np.inf)
+        add([izb + i, izs + i], [1.0, 1.0], -np.inf, 1.0)
+
+    matrix = sparse.csr_matrix((data, (rows, cols)), shape=(len(lb), n_vars))
+    result = milp(cost, constraints=LinearConstraint(matrix, lb, ub), integrality=integrality,
+                  bounds=Bounds(lower, upper), options={'time_limit': time_limit, 'mip_rel_gap': mip_gap})
+    if result.x is None:
+        raise ValueError(f"No feasible rebalance: {result.message}")
+
+    x = result.x
+    buy = np.where(x[izb:izb + n] > 0.5, x[ib:ib + n], 0.0)
+    sold = x[is_:is_ + m]
+    share = np.divide(sold, curves['proceeds'].to_numpy(), out=np.zeros(m), where=curves['proceeds'].to_numpy() > 0)
+    sell = np.bincount(segment_holding, weights=sold, minlength=n)
+    trades = holdings[[column for column in ('scheme_code', 'scheme_name', by) if column in holdings.columns]].copy()
+    trades['current_value'] = values
+    trades['buy'] = np.round(buy, 2)
+    trades['sell'] = np.round(sell, 2)
+    trades['new_value'] = values + trades['buy'] - trades['sell']
+    trades['tax'] = np.bincount(segment_holding, weights=curves['tax'].to_numpy() * share, minlength=n)
+    trades['exit_load'] = np.bincount(segment_holding, weights=curves['exit_load'].to_numpy() * share, minlength=n)
+
+    after = np.bincount(group_ids, weights=trades['new_value'].to_numpy(), minlength=n_groups)
+    allocation = pd.DataFrame({'current_pct': current / values.sum() * 100, 'target_pct': targets.to_numpy() * 100,
+                               'new_pct': after / total * 100}, index=pd.Index(groups, name=by))
+    return trades, allocation
+
+
+def stress_test(portfolios: Dict[str, pd.Series], mean: pd.Series, cov: pd.DataFrame,
+                groups: Optional[pd.Series] = None, targets: Optional[Union[Dict, pd.Series]] = None,
+                n_scenarios: int = 10000, horizon_days: int = TRADING_DAYS, steps: int = 12,
+                tolerance: float = 0.05, seed: int = 42, chunk_size: int = STRESS_CHUNK) -> pd.DataFrame:
+    """
+    Simulated outcomes over ``horizon_days`` for each portfolio {name: value per scheme_code}
+
+    ``mean`` and ``cov`` are daily simple-return moments per scheme (e.g.
+    from CovarianceState). Every portfolio sees the same scenarios. With
+    ``groups`` (scheme_code -> category) and ``targets``, drift_breach is
+    the share of scenarios ending with some group more than ``tolerance``
+    away from target.
+    """
+    codes = [str(code) for code in mean.index]
+    weights = np.column_stack([pd.Series(values, dtype=np.float64).rename(index=str).reindex(codes, fill_value=0.0)
+                               .to_numpy() for values in portfolios.values()])
+    start_values = weights.sum(axis=0)
+
+    # Log-return moments per step
+    sigma = cov.loc[codes, codes].to_numpy(np.float64)
+    mu_log = mean.to_numpy(np.float64) - np.diag(sigma) / 2.0
+    dt = horizon_days / steps
+    eigenvalues, vectors = np.linalg.eigh(sigma * dt)
+    root = vectors * np.sqrt(np.clip(eigenvalues, 0.0, None))
+
+    indicator = None
+    if groups is not None and targets is not None:
+        group_of = pd.Series(groups).rename(index=str).reindex(codes).astype(str)
+        group_ids, labels = pd.factorize(group_of, sort=True)
+        indicator = np.zeros((len(codes), len(labels)))
+        indicator[np.arange(len(codes)), group_ids] = 1.0
+        target = _targets(targets, pd.Index(labels)).reindex(labels).to_numpy()
+
+    rng = np.random.default_rng(seed)
+    returns = np.empty((n_scenarios, weights.shape[1]))
+    drawdowns = np.empty_like(returns)
+    drift = np.full_like(returns, np.nan)
+    for start in range(0, n_scenarios, chunk_size):
+        size = min(chunk_size, n_scenarios - start)
+        shocks = rng.standard_normal((size, steps, len(codes))) @ root.T + mu_log * dt
+        growth = np.exp(np.cumsum(shocks, axis=1))                   # (scenarios, steps, funds)
+        paths = growth @ weights                                      # (scenarios, steps, portfolios)
+        peaks = np.maximum(np.maximum.accumulate(paths, axis=1), start_values)
+        chunk = slice(start, start + size)
+        returns[chunk] = paths[:, -1] / start_values - 1.0
+        drawdowns[chunk] = (paths / peaks - 1.0).min(axis=1)
+        if indicator is not None:
+            for p in range(weights.shape[1]):
+                grouped = (growth[:, -1] * weights[:, p]) @ indicator / paths[:, -1, p:p + 1]
+                drift[chunk, p] = np.abs(grouped - target).max(axis=1)
+
+    var_cut = np.quantile(returns, 0.05, axis=0)
+    summary = pd.DataFrame({
+        'mean_return': returns.mean(axis=0),
+        'median_return': np.median(returns, axis=0),
+        'var_95': -var_cut,
+        'cvar_95': -np.array([returns[returns[:, p] <= var_cut[p], p].mean() for p in range(returns.shape[1])]),
+        'prob_loss': (returns < 0).mean(axis=0),
+        'median_max_drawdown': np.median(drawdowns, axis=0),
+        'worst_5pct_drawdown': np.quantile(drawdowns, 0.05, axis=0),
+    }, index=pd.Index(list(portfolios), name='portfolio'))
+    if indicator is not None:
+        summary['drift_breach'] = (drift > tolerance).mean(axis=0)
+    return summary
@@ -0,0 +1,265 @@
+"""
+Report Pipeline
+
+Renders the portfolio charts to image files without a display and writes a
+Markdown report linking them:
+- Charts are drawn on bare matplotlib Figures with the Agg canvas (no pyplot,
+  no GUI backend), so it runs headless and from cron
+- matplotlib/seaborn are only imported when a chart is actually drawn
+- Independent charts render in parallel worker processes
+- Each image is named after a hash of its input data, so charts whose
+  data has not changed are reused instead of redrawn
+
+    python report.py --output data/reports --jobs 4
+"""
+
+import argparse
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_REPORT_DIR = Path(__file__).resolve().parent / 'data' / 'reports'
+
+# Bump when any drawing code changes, so cached images are redrawn
+CHART_VERSION = 1
+
+DEFAULT_DPI = 110
+
+
+# ---- chart drawing (onto a bare Figure) ------------------------------------
+
+def draw_allocation(fig, holdings: pd.DataFrame) -> None:
+    """Allocation by category and the top 5 funds by value"""
+    ax = fig.add_subplot(1, 2, 1)
+    category_allocation = holdings.groupby('category')['current_value'].sum()
+    ax.pie(category_allocation.values, labels=category_allocation.index, autopct='%1.1f%%')
+    ax.set_title('Portfolio Allocation by Category')
+
+    ax = fig.add_subplot(1, 2, 2)
+    top_funds = holdings.nlargest(5, 'current_value')
+    ax.pie(top_funds['current_value'], labels=top_funds['scheme_name'].str[:20], autopct='%1.1f%%')
+    ax.set_title('Top 5 Funds by Value')
+
+
+def draw_performance(fig, holdings: pd.DataFrame) -> None:
+    """Returns by fund, invested vs current value, allocation and return distribution"""
+    funds = holdings['scheme_name'].str[:15]  # Truncate names
+    x = np.arange(len(funds))
+
+    ax = fig.add_subplot(2, 2, 1)
+    returns = holdings['return_percentage']
+    colors = ['green' if r > 0 else 'red' for r in returns]
+    ax.bar(x, returns, color=colors, alpha=0.7)
+    ax.set_title('Returns by Fund (%)')
+    ax.set_xticks(x, funds, rotation=45, ha='right')
+    ax.set_ylabel('Return %')
+
+    ax = fig.add_subplot(2, 2, 2)
+    width = 0.35
+    ax.bar(x - width / 2, holdings['invested_amount'] / 1000, width, label='Invested', alpha=0.7)
+    ax.bar(x + width / 2, holdings['current_value'] / 1000, width, label='Current', alpha=0.7)
+    ax.set_title('Invested vs Current Value (₹000s)')
+    ax.set_xticks(x, funds, rotation=45, ha='right')
+    ax.legend()
+
+    ax = fig.add_subplot(2, 2, 3)
+    category_allocation = holdings.groupby('category')['current_value'].sum()
+    ax.pie(category_allocation.values, labels=category_allocation.index, autopct='%1.1f%%')
+    ax.set_title('Asset Allocation')
+
+    ax = fig.add_subplot(2, 2, 4)
+    ax.hist(holdings['return_percentage'], bins=10, alpha=0.7, edgecolor='black')
+    ax.set_title('Return Distribution')
+    ax.set_xlabel('Return %')
+    ax.set_ylabel('Number of Funds')
+
+
+def draw_drawdowns(fig, drawdowns: pd.DataFrame) -> None:
+    """Drawdown from the running peak (%) per fund"""
+    ax = fig.add_subplot(1, 1, 1)
+    for column in drawdowns.columns:
+        ax.plot(drawdowns.index, drawdowns[column] * 100, linewidth=0.8, label=str(column)[:25])
+    ax.set_title('Drawdown from Peak (%)')
+    ax.set_ylabel('Drawdown %')
+    ax.legend(fontsize=7, loc='lower left')
+
+
+def draw_rolling_cagr(fig, rolling: pd.DataFrame) -> None:
+    """Trailing CAGR (%) per fund"""
+    ax = fig.add_subplot(1, 1, 1)
+    for column in rolling.columns:
+        ax.plot(rolling.index, rolling[column], linewidth=0.8, label=str(column)[:25])
+    ax.axhline(0, color='grey', linewidth=0.5)
+    ax.set_title('Rolling CAGR (%)')
+    ax.set_ylabel('CAGR %')
+    ax.legend(fontsize=7, loc='upper left')
+
+
+def draw_correlation(fig, correlation: pd.DataFrame) -> None:
+    """Heatmap of fund return correlations"""
+    import seaborn as sns
+
+    ax = fig.add_subplot(1, 1, 1)
+    labels = [str(name)[:15] for name in correlation.index]
+    sns.heatmap(correlation.to_numpy(), annot=len(labels) <= 12, fmt='.2f', cmap='coolwarm', center=0,
+                square=True, xticklabels=labels, yticklabels=labels, ax=ax)
+    ax.set_title('Fund Correlation Heatmap')
+
+
+# name -> (draw function, figure size in inches)
+CHARTS: Dict[str, Tuple[Callable, Tuple[float, float]]] = {
+    'allocation': (draw_allocation, (10, 6)),
+    'performance': (draw_performance, (12, 8)),
+    'drawdowns': (draw_drawdowns, (12, 5)),
+    'rolling_cagr': (draw_rolling_cagr, (12, 5)),
+    'correlation': (draw_correlation, (9, 7)),
+}
+
+
+# ---- rendering and caching -------------------------------------------------
+
+def chart_key(name: str, data: pd.DataFrame, dpi: int = DEFAULT_DPI) -> str:
+    """Hash of everything a chart image depends on"""
+    digest = hashlib.sha256(f"{name}|{CHART_VERSION}|{dpi}|{list(data.columns)}".encode())
+    digest.update(pd.util.hash_pandas_object(data, index=True).to_numpy().tobytes())
+    return digest.hexdigest()[:16]
+
+
+def render_chart(name: str, data: pd.DataFrame, path: Path, dpi: int = DEFAULT_DPI) -> Path:
+    """Draw one chart to ``path`` on an Agg canvas (safe in worker processes)"""
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    draw, figsize = CHARTS[name]
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    draw(fig, data)
+    fig.tight_layout()
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        fig.savefig(tmp_path, dpi=dpi, format=path.suffix.lstrip('.'))
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+    return path
+
+
+class ReportRenderer:
+    """
+    Renders named charts to files, reusing images whose input data is unchanged
+    """
+
+    def __init__(self, output_dir: Path = DEFAULT_REPORT_DIR, jobs: int = 4,
+                 dpi: int = DEFAULT_DPI, image_format: str = 'png'):
+        self.output_dir = Path(output_dir)
+        self.jobs = jobs
+        self.dpi = dpi
+        self.image_format = image_format
+        self.rendered = 0
+        self.reused = 0
+
+    def render(self, charts: Dict[str, pd.DataFrame]) -> Dict[str, Path]:
+        """
+        Render {chart name: data}; returns {chart name: image path}
+        """
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        paths = {name: self.output_dir / f"{name}-{chart_key(name, data, self.dpi)}.{self.image_format}"
+                 for name, data in charts.items()}
+        pending = [name for name, path in paths.items() if not path.exists()]
+        self.reused += len(paths) - len(pending)
+
+        if self.jobs > 1 and len(pending) > 1:
+            with ProcessPoolExecutor(max_workers=min(self.jobs, len(pending))) as pool:
+                futures = [pool.submit(render_chart, name, charts[name], paths[name], self.dpi) for name in pending]
+                for future in futures:
+                    future.result()
+        else:
+            for name in pending:
+                render_chart(name, charts[name], paths[name], self.dpi)
+        self.rendered += len(pending)
+
+        # Drop images of earlier data for the same charts
+        for name, path in paths.items():
+            for old in self.output_dir.glob(f"{name}-*.{self.image_format}"):
+                if old != path:
+                    old.unlink()
+        return paths
+
+
+def _markdown_table(df: pd.DataFrame, float_format: str = '{:,.2f}') -> str:
+    def cell(value) -> str:
+        if isinstance(value, (float, np.floating)):
+            return float_format.format(value)
+        return f"{value:,}" if isinstance(value, (int, np.integer)) else str(value)
+
+    header = [str(df.index.name or '')] + [str(column) for column in df.columns]
+    lines = ['| ' + ' | '.join(header) + ' |', '|' + '---|' * len(header)]
+    for index, *values in df.itertuples():
+        lines.append('| ' + ' | '.join([str(index)] + [cell(value) for value in values]) + ' |')
+    return '\n'.join(lines)
+
+
+def write_report(analyzer, output_dir: Path = DEFAULT_REPORT_DIR, jobs: int = 4,
+                 renderer: ReportRenderer = None) -> Path:
+    """
+    Render the analyzer's charts and write report.md next to them; returns its path
+
+    NAV-history charts (drawdowns, rolling CAGR, correlation) are included
+    when the analyzer has NAV history loaded.
+    """
+    renderer = renderer or ReportRenderer(output_dir, jobs)
+    holdings = analyzer.holdings
+    charts = {'allocation': holdings, 'performance': holdings}
+    history = analyzer.nav_history
+    codes = [code for code in holdings['scheme_code'].astype(str) if history is not None and code in history]
+    if codes:
+        names = holdings.set_index(holdings['scheme_code'].astype(str))['scheme_name']
+        history = history.select(codes)
+        charts['drawdowns'] = pd.DataFrame(history.drawdowns(), index=history.dates,
+                                           columns=names[codes].tolist())
+        charts['rolling_cagr'] = analyzer.get_rolling_cagr(3).rename(columns=names)
+        charts['correlation'] = analyzer.get_correlation_matrix()
+    paths = renderer.render(charts)
+
+    sections = ['# Mutual Fund Portfolio Report', '']
+    sections += [f"- **{key}:** {value}" for key, value in analyzer.get_portfolio_summary().items()]
+    sections += ['', '## Allocation by Category', '', _markdown_table(analyzer.analyze_allocation()), '']
+    titles = {'allocation': 'Allocation', 'performance': 'Performance', 'drawdowns': 'Drawdowns',
+              'rolling_cagr': 'Rolling 3Y CAGR', 'correlation': 'Correlation'}
+    for name, path in paths.items():
+        sections += [f"## {titles[name]}", '', f"![{titles[name]}]({path.name})", '']
+    if codes:
+        risk = analyzer.get_risk_metrics()
+        sections += ['## Risk Metrics', '', _markdown_table(risk.set_index('scheme_name').drop(columns='scheme_code')), '']
+
+    report_path = renderer.output_dir / 'report.md'
+    report_path.write_text('\n'.join(sections), encoding='utf-8')
+    print(f"✅ Report written to {report_path} ({renderer.rendered} charts drawn, {renderer.reused} reused)")
+    return report_path
+
+
+def main() -> None:
+    from mf_analyzer import MFPortfolioAnalyzer
+
+    parser = argparse.ArgumentParser(description="Render the portfolio report (headless)")
+    parser.add_argument("--output", type=Path, default=DEFAULT_REPORT_DIR, help="Output directory")
+    parser.add_argument("--jobs", type=int, default=4, help="Charts rendered in parallel (default: 4)")
+    parser.add_argument("--nav-history", action="store_true",
+                        help="Include NAV-history charts from the local NAV cache (no network)")
+    args = parser.parse_args()
+
+    analyzer = MFPortfolioAnalyzer()
+    analyzer.load_sample_data()
+    if args.nav_history:
+        analyzer.load_cached_nav_history(offline=True)
+    write_report(analyzer, args.output, args.jobs)
+
+
+if __name__ == "__main__":
+    main()
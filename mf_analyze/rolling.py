@@ -0,0 +1,262 @@
+"""
+Rolling-Window Metric Kernels
+
+Trailing-window metrics for many funds at once, on (days, funds) arrays.
+Sums over windows come from cumulative sums, and window maxima and
+drawdowns from prefix/suffix scans over window-sized blocks (van Herk /
+Gil-Werman), so every kernel is O(days) per fund whatever the window
+length. Rolling 3Y figures for a whole SEBI category take milliseconds
+instead of a pandas .rolling().apply() loop per fund.
+
+Every function returns an array the same shape as its input, aligned so
+row t covers the window ending at t; rows without a full window of data
+are NaN. ``benchmark`` arguments may be 1-D (one series for all funds).
+"""
+
+import warnings
+from typing import Dict, Tuple
+
+import numpy as np
+
+from nav_history import RISK_FREE_RATE, TRADING_DAYS, _daily_rate, _nanmean
+
+
+def _as_2d(values) -> np.ndarray:
+    values = np.asarray(values, dtype=np.float64)
+    return values.reshape(-1, 1) if values.ndim == 1 else values
+
+
+def _window_sums(values: np.ndarray, window: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Sums and counts of non-NaN values over each trailing window, shape (days, funds)
+    """
+    valid = ~np.isnan(values)
+    padded = np.zeros((values.shape[0] + 1,) + values.shape[1:])
+    np.cumsum(np.where(valid, values, 0.0), axis=0, out=padded[1:])
+    counts = np.zeros(padded.shape, dtype=np.int64)
+    np.cumsum(valid, axis=0, out=counts[1:])
+
+    sums = np.full(values.shape, np.nan)
+    n = np.zeros(values.shape, dtype=np.int64)
+    sums[window - 1:] = padded[window:] - padded[:-window]
+    n[window - 1:] = counts[window:] - counts[:-window]
+    return sums, n
+
+
+def _block_scans(navs: np.ndarray, window: int):
+    """
+    Prefix and suffix scans within consecutive blocks of ``window`` rows
+
+    A trailing window starting at row s either is one whole block or spans
+    the suffix of s's block and the prefix of the next, so any window
+    aggregate is a combination of one suffix and one prefix value.
+    Returns (prefix max, prefix min, prefix max drawdown, suffix max,
+    suffix max drawdown), each shaped like a padded copy of ``navs``.
+    """
+    days, funds = navs.shape
+    n_blocks = -(-days // window)
+    padded = np.full((n_blocks * window, funds), np.nan)
+    padded[:days] = navs
+    blocks = padded.reshape(n_blocks, window, funds)
+
+    with np.errstate(invalid='ignore'):
+        prefix_max = np.maximum.accumulate(blocks, axis=1)
+        prefix_min = np.minimum.accumulate(blocks, axis=1)
+        prefix_mdd = np.minimum.accumulate(blocks / prefix_max - 1.0, axis=1)
+
+        # Suffix max drawdown: worst fall from any row p to the lowest NAV after it
+        rev = blocks[:, ::-1]
+        suffix_max = np.maximum.accumulate(rev, axis=1)[:, ::-1]
+        suffix_mdd = np.minimum.accumulate(np.minimum.accumulate(rev, axis=1) / rev - 1.0, axis=1)[:, ::-1]
+
+    shape = padded.shape
+    return (prefix_max.reshape(shape), prefix_min.reshape(shape), prefix_mdd.reshape(shape),
+            suffix_max.reshape(shape), suffix_mdd.reshape(shape))
+
+
+def _full(values: np.ndarray, n: np.ndarray, window: int) -> np.ndarray:
+    values[n < window] = np.nan
+    return values
+
+
+def _centred(values: np.ndarray) -> np.ndarray:
+    # Shifting by the column mean keeps cumulative sums of squares accurate
+    return values - np.nan_to_num(_nanmean(values))
+
+
+def rolling_mean(values, window: int) -> np.ndarray:
+    values = _as_2d(values)
+    sums, n = _window_sums(values, window)
+    return _full(sums / window, n, window)
+
+
+def rolling_std(values, window: int) -> np.ndarray:
+    """Sample standard deviation (ddof=1) over each window"""
+    values = _centred(_as_2d(values))
+    sums, n = _window_sums(values, window)
+    squares, _ = _window_sums(values * values, window)
+    with np.errstate(invalid='ignore'):
+        variance = np.maximum(squares - sums * sums / window, 0.0) / (window - 1)
+    return _full(np.sqrt(variance), n, window)
+
+
+def rolling_return(navs, window: int, annualise: bool = False) -> np.ndarray:
+    """Return over each window of ``window`` trading days (optionally annualised)"""
+    navs = _as_2d(navs)
+    result = np.full(navs.shape, np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        growth = navs[window:] / navs[:-window]
+        result[window:] = growth ** (TRADING_DAYS / window) - 1.0 if annualise else growth - 1.0
+    return result
+
+
+def rolling_volatility(returns, window: int) -> np.ndarray:
+    """Annualised volatility of daily returns over each window"""
+    return rolling_std(returns, window) * np.sqrt(TRADING_DAYS)
+
+
+def rolling_sharpe(returns, window: int, risk_free: float = RISK_FREE_RATE) -> np.ndarray:
+    excess = _as_2d(returns) - _daily_rate(risk_free)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return rolling_mean(excess, window) / rolling_std(excess, window) * np.sqrt(TRADING_DAYS)
+
+
+def rolling_alpha_beta(returns, benchmark, window: int,
+                       risk_free: float = RISK_FREE_RATE) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    OLS regression of fund excess returns on benchmark excess returns per window
+
+    Returns (annualised alpha, beta). Days where either side is NaN are
+    dropped from the fund's windows, and such windows count as incomplete.
+    """
+    rf = _daily_rate(risk_free)
+    r = _as_2d(returns) - rf
+    b = np.broadcast_to(_as_2d(benchmark) - rf, r.shape)
+    mask = np.isnan(r) | np.isnan(b)
+    r = np.where(mask, np.nan, r)
+    b = np.where(mask, np.nan, b)
+    # Centre both sides; slope is unchanged and the intercept is corrected below
+    r_shift = np.nan_to_num(_nanmean(r))
+    b_shift = np.nan_to_num(_nanmean(b))
+    rc, bc = r - r_shift, b - b_shift
+
+    sum_r, n = _window_sums(rc, window)
+    sum_b, _ = _window_sums(bc, window)
+    sum_rb, _ = _window_sums(rc * bc, window)
+    sum_bb, _ = _window_sums(bc * bc, window)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cov = sum_rb - sum_r * sum_b / window
+        var = sum_bb - sum_b * sum_b / window
+        beta = cov / var
+        alpha = (sum_r / window + r_shift) - beta * (sum_b / window + b_shift)
+    return _full(alpha * TRADING_DAYS, n, window), _full(beta, n, window)
+
+
+def rolling_capture(returns, benchmark, window: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Up- and down-market capture ratios (%) over each window
+
+    Ratio of the fund's summed returns to the benchmark's on the days the
+    benchmark rose (up capture) or fell (down capture).
+    """
+    r = _as_2d(returns)
+    b = np.broadcast_to(_as_2d(benchmark), r.shape)
+    # Fund NaNs are kept so windows before inception stay incomplete
+    missing = np.isnan(r)
+    up = b > 0
+    down = b < 0
+    fund_up, n = _window_sums(np.where(up | missing, r, 0.0), window)
+    bench_up, _ = _window_sums(np.where(up, b, 0.0), window)
+    fund_down, _ = _window_sums(np.where(down | missing, r, 0.0), window)
+    bench_down, _ = _window_sums(np.where(down, b, 0.0), window)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        up_capture = fund_up / bench_up * 100.0
+        down_capture = fund_down / bench_down * 100.0
+    return _full(up_capture, n, window), _full(down_capture, n, window)
+
+
+def _window_rows(days: int, window: int):
+    ends = np.arange(window - 1, days)
+    starts = ends - window + 1
+    return starts, ends, (starts % window == 0)[:, None]
+
+
+def rolling_drawdown(navs, window: int) -> np.ndarray:
+    """Drawdown at each date from the highest NAV in the trailing window"""
+    navs = _as_2d(navs)
+    result = np.full(navs.shape, np.nan)
+    if len(navs) < window:
+        return result
+    prefix_max, _, _, suffix_max, _ = _block_scans(navs, window)
+    starts, ends, whole_block = _window_rows(len(navs), window)
+    peaks = np.where(whole_block, prefix_max[ends], np.maximum(suffix_max[starts], prefix_max[ends]))
+    result[window - 1:] = navs[window - 1:] / peaks - 1.0
+    return result
+
+
+def rolling_max_drawdown(navs, window: int) -> np.ndarray:
+    """
+    Worst peak-to-trough fall inside each trailing window (negative fraction)
+
+    Combines the suffix part of the window (its own worst fall and its
+    peak) with the prefix part (its own worst fall and its trough).
+    """
+    navs = _as_2d(navs)
+    result = np.full(navs.shape, np.nan)
+    if len(navs) < window:
+        return result
+    prefix_max, prefix_min, prefix_mdd, suffix_max, suffix_mdd = _block_scans(navs, window)
+    starts, ends, whole_block = _window_rows(len(navs), window)
+    with np.errstate(invalid='ignore'):
+        across = prefix_min[ends] / suffix_max[starts] - 1.0
+        spanning = np.minimum(np.minimum(suffix_mdd[starts], prefix_mdd[ends]), across)
+    result[window - 1:] = np.where(whole_block, prefix_mdd[ends], spanning)
+    return result
+
+
+def beat_percentage(fund_values, benchmark_values) -> np.ndarray:
+    """
+    Share (%) of dates where the fund's rolling figure beat the benchmark's
+
+    Only dates where both are defined count.
+    """
+    f = _as_2d(fund_values)
+    b = np.broadcast_to(_as_2d(benchmark_values), f.shape)
+    valid = ~np.isnan(f) & ~np.isnan(b)
+    n = valid.sum(axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(n > 0, (valid & (f > b)).sum(axis=0) / n * 100.0, np.nan)
+
+
+def rolling_summary(navs, benchmark_levels, window: int,
+                    risk_free: float = RISK_FREE_RATE) -> Dict[str, np.ndarray]:
+    """
+    Per-fund consistency figures over rolling windows, one value per fund
+
+    - median_rolling_alpha: median annualised rolling alpha (%)
+    - mean_rolling_sharpe / rolling_sharpe_std: level and stability of rolling Sharpe
+    - beat_percentage: share of windows where the fund's return beat the benchmark's
+    - up_capture / down_capture: capture ratios (%) over the latest window
+    """
+    navs = _as_2d(navs)
+    bench = np.asarray(benchmark_levels, dtype=np.float64)
+    # Returns aligned to dates (first row NaN) so every kernel shares the calendar
+    returns = np.full(navs.shape, np.nan)
+    returns[1:] = navs[1:] / navs[:-1] - 1.0
+    bench_returns = np.full(bench.shape, np.nan)
+    bench_returns[1:] = bench[1:] / bench[:-1] - 1.0
+
+    alpha, _ = rolling_alpha_beta(returns, bench_returns, window, risk_free)
+    sharpe = rolling_sharpe(returns, window, risk_free)
+    up, down = rolling_capture(returns, bench_returns, window)
+    with warnings.catch_warnings():
+        # Funds younger than one window have no rolling values at all
+        warnings.simplefilter('ignore', RuntimeWarning)
+        return {
+            'median_rolling_alpha': np.nanmedian(alpha, axis=0) * 100,
+            'mean_rolling_sharpe': np.nanmean(sharpe, axis=0),
+            'rolling_sharpe_std': np.nanstd(sharpe, axis=0),
+            'beat_percentage': beat_percentage(rolling_return(navs, window), rolling_return(bench, window)),
+            'up_capture': up[-1],
+            'down_capture': down[-1],
+        }
@@ -0,0 +1,190 @@
+"""
+Category Screener
+
+Evaluates every scheme in a SEBI category, not just the ones held:
+1. Scheme codes for the category come from the AMFI master (amfi_master.py)
+2. Their NAV histories are topped up in the local cache by a bounded pool
+   of fetch workers (nav_cache.py) and loaded as one date-aligned array
+3. Summary and rolling metrics are computed for all schemes in one
+   vectorised pass, then ranked against peers into 0-100 percentiles
+
+Finished screens are saved under data/screens/ per category, benchmark,
+window and as-of date, so repeating a screen on the same day is a file read.
+
+    python screener.py "Flexi Cap" --benchmark ^CRSLDX --top 20
+"""
+
+import argparse
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+from urllib.parse import quote
+
+import numpy as np
+import pandas as pd
+
+from amfi_master import SchemeMaster, normalize_name
+from nav_cache import MFApiSource, NAVCache, Source, YFinanceSource
+from nav_history import DAYS_PER_YEAR, NAVHistory, RISK_FREE_RATE, TRADING_DAYS
+from rolling import rolling_summary
+
+DEFAULT_SCREEN_DIR = Path(__file__).resolve().parent / 'data' / 'screens'
+
+# Compare like with like: one plan/option per fund
+DEFAULT_PLAN = ('direct', 'growth')
+
+# Metric -> True if a higher value is better; each gets a <metric>_pct column
+RANKED_METRICS: Dict[str, bool] = {
+    'cagr': True,
+    'volatility': False,
+    'sharpe': True,
+    'sortino': True,
+    'max_drawdown': True,       # negative fractions, so closer to zero is better
+    'median_rolling_alpha': True,
+    'rolling_sharpe_std': False,
+    'beat_percentage': True,
+    'down_capture': False,
+}
+
+
+def percentile_ranks(table: pd.DataFrame, higher_is_better: Dict[str, bool] = RANKED_METRICS) -> pd.DataFrame:
+    """
+    Peer percentile (0 = worst, 100 = best) of each metric present in ``table``
+
+    Ties share the average rank; schemes without a value stay NaN and are
+    left out of everyone else's ranking.
+    """
+    metrics = [metric for metric in higher_is_better if metric in table.columns]
+    signs = np.array([1.0 if higher_is_better[metric] else -1.0 for metric in metrics])
+    signed = table[metrics].astype(np.float64) * signs
+    ranks = signed.rank(method='average')
+    peers = signed.count()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pct = (ranks - 1.0) / (peers - 1.0).replace(0.0, np.nan) * 100.0
+    # A scheme with no peers is trivially the best of its category
+    pct = pct.where(signed.isna() | (peers > 1), 100.0)
+    return pct.add_suffix('_pct')
+
+
+def screen_metrics(history: NAVHistory, benchmark: Optional[np.ndarray] = None, years: float = 3.0,
+                   risk_free: float = RISK_FREE_RATE) -> pd.DataFrame:
+    """
+    Summary metrics (plus rolling metrics when a benchmark is given) for every scheme
+    """
+    table = history.metrics(benchmark, risk_free)
+    first, last, _ = history._first_last()
+    table.insert(0, 'history_years', (history.dates.values[last] - history.dates.values[first])
+                 / np.timedelta64(1, 'D') / DAYS_PER_YEAR)
+    if benchmark is not None:
+        window = int(round(years * TRADING_DAYS))
+        rolling = rolling_summary(history.navs, benchmark, window, risk_free)
+        for name, values in rolling.items():
+            table[name] = values
+    return table
+
+
+class CategoryScreener:
+    """
+    Screens and ranks every scheme in a SEBI category
+    """
+
+    def __init__(self, master: SchemeMaster, cache: Optional[NAVCache] = None,
+                 source: Optional[Source] = None, benchmark_source: Optional[Source] = None,
+                 screen_dir: Path = DEFAULT_SCREEN_DIR, workers: int = 8):
+        self.master = master
+        self.cache = cache if cache is not None else NAVCache(workers=workers)
+        self.source = source
+        self.benchmark_source = benchmark_source
+        self.screen_dir = Path(screen_dir)
+
+    def schemes(self, category: str, plan: Optional[Iterable[str]] = DEFAULT_PLAN) -> pd.DataFrame:
+        """
+        Schemes in ``category`` whose names contain every word in ``plan`` (None: all plans)
+        """
+        schemes = self.master.category_schemes(category)
+        if plan:
+            words = [word.lower() for word in plan]
+            names = schemes['scheme_name'].map(lambda name: set(normalize_name(name).split()))
+            schemes = schemes[names.map(lambda found: all(word in found for word in words))]
+        return schemes.reset_index(drop=True)
+
+    def screen_path(self, category: str, benchmark: Optional[str], years: float, as_of: pd.Timestamp,
+                    plan: Optional[Iterable[str]] = DEFAULT_PLAN, risk_free: float = RISK_FREE_RATE) -> Path:
+        # Every parameter that changes the result is part of the key
+        plan_key = '-'.join(sorted(str(word) for word in plan)) if plan is not None else 'all'
+        key = (f"{category}_{benchmark or 'none'}_{years:g}y_{as_of:%Y-%m-%d}_{plan_key}_rf{risk_free:g}").lower()
+        return self.screen_dir / f"{quote(key, safe='')}.feather"
+
+    def screen(self, category: str, benchmark: Optional[str] = None, years: float = 3.0,
+               as_of=None, plan: Optional[Iterable[str]] = DEFAULT_PLAN, offline: bool = False,
+               use_cache: bool = True, risk_free: float = RISK_FREE_RATE) -> pd.DataFrame:
+        """
+        Metrics and peer percentiles for every scheme in ``category``, best Sharpe first
+
+        ``benchmark`` is a cached key (e.g. '^NSEI'); without one the rolling
+        alpha, beat-% and capture columns are skipped. NAVs are used up to
+        ``as_of`` (default: today).
+        """
+        as_of = pd.Timestamp(as_of if as_of is not None else pd.Timestamp.today()).normalize()
+        path = self.screen_path(category, benchmark, years, as_of, plan, risk_free)
+        if use_cache and path.exists():
+            return pd.read_feather(path)
+
+        schemes = self.schemes(category, plan)
+        if schemes.empty:
+            raise ValueError(f"No schemes found in category '{category}'")
+        codes = schemes['scheme_code'].tolist()
+
+        if not offline:
+            self.cache.refresh(codes, self.source or MFApiSource())
+            if benchmark:
+                self.cache.refresh([benchmark], self.benchmark_source or YFinanceSource())
+
+        history = self.cache.load_history(codes).slice(end=as_of)
+        if len(history) == 0:
+            raise ValueError(f"No cached NAV history for category '{category}'")
+        levels = self.cache.load_series(benchmark, history.dates) if benchmark else None
+
+        table = screen_metrics(history, levels, years, risk_free)
+        table = table.join(percentile_ranks(table))
+        result = schemes.merge(table, left_on='scheme_code', right_index=True)
+        result = result.sort_values('sharpe', ascending=False, na_position='last').reset_index(drop=True)
+        self._save(path, result)
+        return result
+
+    def _save(self, path: Path, result: pd.DataFrame) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            result.to_feather(tmp_path)
+            os.replace(tmp_path, path)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Screen and rank every scheme in a SEBI category")
+    parser.add_argument("category", help="Category, short ('Flexi Cap') or full AMFI label")
+    parser.add_argument("--benchmark", help="Benchmark ticker for rolling alpha/capture (e.g. ^NSEI)")
+    parser.add_argument("--years", type=float, default=3.0, help="Rolling window in years (default: 3)")
+    parser.add_argument("--as-of", help="Screen date, YYYY-MM-DD (default: today)")
+    parser.add_argument("--all-plans", action="store_true", help="Include regular plans and IDCW options")
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent NAV downloads (default: 8)")
+    parser.add_argument("--offline", action="store_true", help="Use cached NAVs only")
+    parser.add_argument("--refresh", action="store_true", help="Ignore a saved screen for the same day")
+    parser.add_argument("--top", type=int, default=20, help="Rows to print (default: 20)")
+    args = parser.parse_args()
+
+    screener = CategoryScreener(SchemeMaster.load(), workers=args.workers)
+    result = screener.screen(args.category, args.benchmark, args.years, args.as_of,
+                             plan=None if args.all_plans else DEFAULT_PLAN,
+                             offline=args.offline, use_cache=not args.refresh)
+    columns = ['scheme_name', 'cagr', 'sharpe', 'max_drawdown'] + [c for c in result.columns if c.endswith('_pct')]
+    print(f"📊 {args.category}: {len(result)} schemes")
+    print(result[columns].head(args.top).round(3).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+"""
+Holdings Snapshot Store
+
+Append-only history of portfolio holdings in one SQLite file
+(data/snapshots.sqlite), so every day's snapshot is kept rather than
+overwritten:
+- Positions are stored as validity intervals (valid_from, valid_to): a
+  holding whose units, cost, name and category are unchanged since the
+  last snapshot adds no row; a changed one closes the old row and opens a
+  new one
+- NAVs are stored per scheme only when they differ from the last stored NAV
+- One summary row per snapshot date (value, invested, number of holdings)
+
+History queries are answered from the indexes: value over time reads the
+summary rows, "when did fund X enter" is a MIN over the (scheme_code,
+valid_from) index, and holdings on any date join the positions valid then
+with the NAV in force on that date. Snapshots must be recorded in date
+order; recording a date again replaces that day's snapshot.
+"""
+
+import sqlite3
+from pathlib import Path
+from typing import Dict, Optional
+
+import pandas as pd
+
+DEFAULT_SNAPSHOT_PATH = Path(__file__).resolve().parent / 'data' / 'snapshots.sqlite'
+
+# valid_to of a position that is still held
+OPEN = '9999-12-31'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    date TEXT PRIMARY KEY,
+    n_holdings INTEGER NOT NULL,
+    total_value REAL NOT NULL,
+    total_invested REAL NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS positions (
+    id INTEGER PRIMARY KEY,
+    scheme_code TEXT NOT NULL,
+    folio TEXT NOT NULL,
+    scheme_name TEXT,
+    category TEXT,
+    units REAL NOT NULL,
+    invested_amount REAL NOT NULL,
+    valid_from TEXT NOT NULL,
+    valid_to TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS positions_scheme ON positions (scheme_code, valid_from);
+CREATE INDEX IF NOT EXISTS positions_valid ON positions (valid_to, valid_from);
+CREATE TABLE IF NOT EXISTS prices (
+    scheme_code TEXT NOT NULL,
+    date TEXT NOT NULL,
+    nav REAL NOT NULL,
+    PRIMARY KEY (scheme_code, date)
+) WITHOUT ROWID;
+"""
+
+KEY = ['scheme_code', 'folio']
+TRACKED = ['scheme_name', 'category', 'units', 'invested_amount']
+
+# Layout of ZerodhaMFIntegration holdings -> analyzer layout
+ZERODHA_COLUMNS = {'fund': 'scheme_name', 'quantity': 'units', 'last_price': 'current_nav',
+                   'invested_value': 'invested_amount'}
+
+
+def _day(date) -> str:
+    return pd.Timestamp(date if date is not None else pd.Timestamp.today()).strftime('%Y-%m-%d')
+
+
+def normalise_holdings(holdings: pd.DataFrame) -> pd.DataFrame:
+    """
+    Analyzer or Zerodha holdings -> scheme_code, folio, scheme_name, category, units, invested_amount, nav, value
+
+    Zerodha holdings without an AMFI scheme_code are keyed by ISIN. Units
+    are rounded to 3 decimals and amounts to paise, as statements show them.
+    """
+    df = holdings.rename(columns={k: v for k, v in ZERODHA_COLUMNS.items() if v not in holdings.columns})
+    if 'scheme_code' not in df.columns:
+        df['scheme_code'] = df['isin']
+    elif 'isin' in df.columns:
+        df['scheme_code'] = df['scheme_code'].where(df['scheme_code'].notna(), df['isin'])
+    units = pd.to_numeric(df['units'], errors='coerce').round(3)
+    if 'current_nav' in df.columns:
+        nav = pd.to_numeric(df['current_nav'], errors='coerce')
+    else:
+        nav = pd.to_numeric(df['current_value'], errors='coerce') / units
+    frame = pd.DataFrame({
+        'scheme_code': df['scheme_code'].astype(str),
+        'folio': df['folio'].astype(str) if 'folio' in df.columns else '',
+        'scheme_name': df['scheme_name'] if 'scheme_name' in df.columns else None,
+        'category': df['category'] if 'category' in df.columns else None,
+        'units': units,
+        'invested_amount': pd.to_numeric(df['invested_amount'], errors='coerce').round(2),
+        'nav': nav,
+    })
+    if 'current_value' in df.columns:
+        frame['value'] = pd.to_numeric(df['current_value'], errors='coerce').to_numpy()
+    else:
+        frame['value'] = frame['units'] * frame['nav']
+    if frame.duplicated(KEY).any():
+        raise ValueError("Holdings have more than one row per (scheme_code, folio)")
+    return frame.reset_index(drop=True)
+
+
+class SnapshotStore:
+    """
+    Interval-encoded holdings history with indexed point-in-time queries
+    """
+
+    def __init__(self, path: Path = DEFAULT_SNAPSHOT_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> 'SnapshotStore':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _query(self, sql: str, params=()) -> pd.DataFrame:
+        return pd.read_sql_query(sql, self.conn, params=params)
+
+    def dates(self) -> pd.DatetimeIndex:
+        rows = self.conn.execute('SELECT date FROM snapshots ORDER BY date').fetchall()
+        return pd.DatetimeIndex([row[0] for row in rows], name='date')
+
+    def _undo(self, day: str) -> None:
+        # Drop a day's snapshot so it can be recorded again
+        self.conn.execute('DELETE FROM positions WHERE valid_from = ?', (day,))
+        self.conn.execute('UPDATE positions SET valid_to = ? WHERE valid_to = ?', (OPEN, day))
+        self.conn.execute('DELETE FROM prices WHERE date = ?', (day,))
+        self.conn.execute('DELETE FROM snapshots WHERE date = ?', (day,))
+
+    def record(self, holdings: pd.DataFrame, date=None) -> Dict[str, int]:
+        """
+        Record the holdings as of ``date`` (default: today)
+
+        Returns counts of positions opened, closed and unchanged, and of NAVs stored.
+        """
+        day = _day(date)
+        frame = normalise_holdings(holdings)
+        with self.conn:
+            last = self.conn.execute('SELECT MAX(date) FROM snapshots').fetchone()[0]
+            if last is not None and day < last:
+                raise ValueError(f"Snapshots must be recorded in date order: {day} is before {last}")
+            if day == last:
+                self._undo(day)
+
+            current = {(code, folio): (i, tracked) for i, code, folio, *tracked in self.conn.execute(
+                'SELECT id, scheme_code, folio, scheme_name, category, units, invested_amount '
+                'FROM positions WHERE valid_to = ?', (OPEN,))}
+            rows = frame[KEY + TRACKED].astype(object)
+            rows = rows.where(rows.notna(), None).to_numpy().tolist()
+            incoming = {(code, folio): tracked for code, folio, *tracked in rows}
+            unchanged = [key for key, values in incoming.items() if key in current and current[key][1] == values]
+            for key in unchanged:
+                del current[key]
+                del incoming[key]
+
+            self.conn.executemany('UPDATE positions SET valid_to = ? WHERE id = ?',
+                                  [(day, i) for i, _ in current.values()])
+            self.conn.executemany(
+                'INSERT INTO positions (scheme_code, folio, scheme_name, category, units, invested_amount, '
+                'valid_from, valid_to) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                [(*key, *values, day, OPEN) for key, values in incoming.items()])
+
+            # Latest stored NAV per scheme, one index seek each
+            navs = frame.dropna(subset=['nav']).drop_duplicates('scheme_code')
+            new_navs = []
+            for code, nav in zip(navs['scheme_code'], navs['nav'].astype(float)):
+                stored = self.conn.execute('SELECT nav FROM prices WHERE scheme_code = ? ORDER BY date DESC LIMIT 1',
+                                           (code,)).fetchone()
+                if stored is None or stored[0] != nav:
+                    new_navs.append((code, day, nav))
+            self.conn.executemany('INSERT INTO prices (scheme_code, date, nav) VALUES (?, ?, ?)', new_navs)
+
+            self.conn.execute('INSERT INTO snapshots (date, n_holdings, total_value, total_invested) '
+                              'VALUES (?, ?, ?, ?)', (day, len(frame), float(frame['value'].sum()),
+                                                      float(frame['invested_amount'].sum())))
+        return {'opened': len(incoming), 'closed': len(current), 'unchanged': len(unchanged), 'prices': len(new_navs)}
+
+    def value_history(self, start=None, end=None) -> pd.DataFrame:
+        """
+        Portfolio value, amount invested and number of holdings on each snapshot date
+        """
+        df = self._query('SELECT date, total_value, total_invested, n_holdings FROM snapshots '
+                         'WHERE date BETWEEN ? AND ? ORDER BY date',
+                         (_day(start) if start is not None else '0000-01-01', _day(end) if end is not None else OPEN))
+        df['date'] = pd.to_datetime(df['date'])
+        return df.set_index('date')
+
+    def holdings_on(self, date=None) -> pd.DataFrame:
+        """
+        Positions held on ``date`` (default: the latest snapshot), valued at the NAV in force then
+        """
+        day = _day(date) if date is not None else self.conn.execute('SELECT MAX(date) FROM snapshots').fetchone()[0]
+        df = self._query(
+            'SELECT p.scheme_code, p.folio, p.scheme_name, p.category, p.units, p.invested_amount, '
+            '(SELECT nav FROM prices n WHERE n.scheme_code = p.scheme_code AND n.date <= :day '
+            ' ORDER BY n.date DESC LIMIT 1) AS nav, p.valid_from '
+            'FROM positions p WHERE p.valid_from <= :day AND p.valid_to > :day ORDER BY p.scheme_code, p.folio',
+            {'day': day})
+        df['current_value'] = df['units'] * df['nav']
+        df['valid_from'] = pd.to_datetime(df['valid_from'])
+        return df
+
+    def scheme_history(self, scheme_code) -> pd.DataFrame:
+        """
+        Units, NAV and value of one scheme on every snapshot date it was held
+        """
+        df = self._query(
+            'SELECT s.date, SUM(p.units) AS units, SUM(p.invested_amount) AS invested_amount, '
+            '(SELECT nav FROM prices n WHERE n.scheme_code = :code AND n.date <= s.date '
+            ' ORDER BY n.date DESC LIMIT 1) AS nav '
+            'FROM positions p JOIN snapshots s ON s.date >= p.valid_from AND s.date < p.valid_to '
+            'WHERE p.scheme_code = :code GROUP BY s.date ORDER BY s.date', {'code': str(scheme_code)})
+        df['date'] = pd.to_datetime(df['date'])
+        df['value'] = df['units'] * df['nav']
+        return df.set_index('date')
+
+    def first_held(self, scheme_code) -> Optional[pd.Timestamp]:
+        """
+        Date the scheme first appeared in a snapshot (None if never held)
+        """
+        row = self.conn.execute('SELECT MIN(valid_from) FROM positions WHERE scheme_code = ?',
+                                (str(scheme_code),)).fetchone()
+        return pd.Timestamp(row[0]) if row[0] else None
+
+    def entries(self) -> pd.DataFrame:
+        """
+        Per scheme: first and last date held, and whether it is still held
+        """
+        df = self._query('SELECT scheme_code, MIN(valid_from) AS first_held, MAX(valid_to) AS held_until '
+                         'FROM positions GROUP BY scheme_code ORDER BY first_held, scheme_code')
+        df['still_held'] = df['held_until'] == OPEN
+        df['first_held'] = pd.to_datetime(df['first_held'])
+        df['held_until'] = pd.to_datetime(df['held_until'].where(~df['still_held']))
+        return df.set_index('scheme_code')
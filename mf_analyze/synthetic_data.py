@@ -0,0 +1,272 @@
+"""
+Synthetic NAV Data
+
+Reproducible fake NAV histories for benchmarks and offline fixtures.
+Each fund follows a one-factor model on a simulated market index
+(beta * market return + alpha + idiosyncratic noise), and some funds
+start part-way through the period like newly launched schemes.
+synthetic_category() turns that into an offline category fixture: a NAV
+cache plus a matching AMFI master, so the screener runs with no network.
+synthetic_holdings() fakes monthly portfolio disclosures for the overlap engine,
+and synthetic_transactions() CAS-style SIP transactions for the XIRR and
+tax-lot engines; synthetic_portfolio() turns those into analyzer holdings.
+synthetic_kite_account() fakes raw Kite Connect MF payloads for the mock server.
+synthetic_benchmarks() fakes category TRI levels on an index calendar of its own.
+"""
+
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from amfi_master import SchemeMaster
+from benchmarks import CATEGORY_BENCHMARKS
+from nav_cache import NAVCache
+from nav_history import NAVHistory, TRADING_DAYS
+
+
+def trading_days(years: float, end: Optional[str] = None) -> pd.DatetimeIndex:
+    """
+    Weekday calendar covering ``years`` up to ``end`` (default: today)
+    """
+    end_ts = pd.Timestamp(end) if end else pd.Timestamp.today().normalize()
+    return pd.bdate_range(end=end_ts, periods=int(round(years * TRADING_DAYS)))
+
+
+def synthetic_nav_history(n_funds: int = 100, years: float = 10.0, seed: int = 42,
+                          end: Optional[str] = None, late_start_share: float = 0.3,
+                          first_code: int = 100000) -> Tuple[NAVHistory, np.ndarray]:
+    """
+    Generate (NAVHistory, benchmark index levels) on a shared weekday calendar
+
+    Scheme codes are consecutive integers from ``first_code`` as strings.
+    """
+    rng = np.random.default_rng(seed)
+    dates = trading_days(years, end)
+    n_days = len(dates)
+
+    market = rng.normal(0.12 / TRADING_DAYS, 0.15 / np.sqrt(TRADING_DAYS), n_days)
+    market[0] = 0.0
+    beta = rng.uniform(0.7, 1.2, n_funds)
+    alpha = rng.normal(0.0, 0.03, n_funds) / TRADING_DAYS
+    idio = rng.uniform(0.03, 0.10, n_funds) / np.sqrt(TRADING_DAYS)
+
+    returns = market[:, None] * beta + alpha + rng.standard_normal((n_days, n_funds)) * idio
+    returns[0] = 0.0
+    navs = rng.uniform(10.0, 200.0, n_funds) * np.cumprod(1.0 + returns, axis=0)
+
+    # Later launches: no NAV before the inception row
+    late = rng.random(n_funds) < late_start_share
+    inception = np.where(late, rng.integers(0, max(1, n_days * 3 // 4), n_funds), 0)
+    navs[np.arange(n_days)[:, None] < inception] = np.nan
+
+    benchmark = 1000.0 * np.cumprod(1.0 + market)
+    codes = [str(first_code + i) for i in range(n_funds)]
+    return NAVHistory(dates, codes, navs), benchmark
+
+
+def synthetic_category(cache: NAVCache, n_funds: int = 200, years: float = 10.0, seed: int = 42,
+                       category: str = 'Equity Scheme - Flexi Cap Fund', benchmark_key: str = '^SYNTH',
+                       end: Optional[str] = None) -> SchemeMaster:
+    """
+    Write a synthetic category (NAVs + benchmark) into ``cache``; returns its scheme master
+
+    Each fund is listed as a Direct Growth plan, with a Regular plan that has no NAVs.
+    """
+    history, benchmark = synthetic_nav_history(n_funds, years, seed=seed, end=end)
+    cache.store_history(history)
+    cache.write(benchmark_key, pd.Series(benchmark, index=history.dates))
+
+    rows = []
+    for i, code in enumerate(history.codes):
+        rows.append((int(code), f'Synthetic {i} Fund - Direct Plan - Growth', [f'INF{i:07d}A1']))
+        rows.append((int(code) + n_funds, f'Synthetic {i} Fund - Regular Plan - Growth', [f'INF{i:07d}B1']))
+    frame = pd.DataFrame(rows, columns=['scheme_code', 'scheme_name', 'isins'])
+    frame['category'] = category
+    return SchemeMaster.from_frame(frame)
+
+
+SECTORS = ['Financial Services', 'Information Technology', 'Oil Gas & Fuels', 'FMCG', 'Automobile',
+           'Healthcare', 'Capital Goods', 'Metals & Mining', 'Construction', 'Telecommunication',
+           'Consumer Services', 'Power', 'Chemicals', 'Realty', 'Textiles']
+
+
+def synthetic_holdings(n_funds: int = 1500, n_securities: int = 2500, seed: int = 42,
+                       min_holdings: int = 25, max_holdings: int = 90, first_code: int = 100000) -> pd.DataFrame:
+    """
+    Long disclosure rows (scheme_code, isin, security_name, sector, weight in %)
+
+    Popular large caps appear in most funds (Zipf-like popularity) and each
+    fund's weights add up to 100%.
+    """
+    rng = np.random.default_rng(seed)
+    popularity = 1.0 / np.arange(1, n_securities + 1) ** 1.1
+    popularity /= popularity.sum()
+    isins = np.array([f'INE{i:06d}01{i % 10}' for i in range(n_securities)])
+    sectors = np.array(SECTORS)[rng.integers(0, len(SECTORS), n_securities)]
+
+    counts = rng.integers(min_holdings, max_holdings + 1, n_funds)
+    rows = []
+    for i, count in enumerate(counts):
+        picks = rng.choice(n_securities, size=count, replace=False, p=popularity)
+        weights = rng.dirichlet(np.full(count, 0.8)) * 100.0
+        rows.append(pd.DataFrame({'scheme_code': str(first_code + i), 'isin': isins[picks],
+                                  'security_name': [f'Company {j}' for j in picks],
+                                  'sector': sectors[picks], 'weight': weights}))
+    return pd.concat(rows, ignore_index=True)
+
+
+def synthetic_transactions(history: NAVHistory, n_folios: int = 300, seed: int = 42,
+                           redeem_share: float = 0.1) -> pd.DataFrame:
+    """
+    CAS-style SIP transactions (date, folio, scheme_code, amount, units, nav) on ``history``
+
+    Each folio runs a monthly SIP in one fund from a random start, with the
+    odd lump sum; some folios make one partial redemption. Purchases have
+    positive amounts and units, redemptions negative.
+    """
+    rng = np.random.default_rng(seed)
+    dates = history.dates
+    first, _, _ = history._first_last()
+    rows = []
+    for i in range(n_folios):
+        fund = int(rng.integers(0, len(history)))
+        inception = dates[first[fund]]
+        start = inception + pd.Timedelta(days=int(rng.integers(0, max(1, (dates[-1] - inception).days * 3 // 5))))
+        sip_dates = pd.date_range(start, dates[-1], freq='MS') + pd.Timedelta(days=int(rng.integers(0, 28)))
+        sip_dates = sip_dates[sip_dates <= dates[-1]]
+        amounts = np.full(len(sip_dates), float(rng.integers(2, 51) * 500))
+        lump = rng.random(len(sip_dates)) < 0.03
+        amounts[lump] += rng.integers(1, 21, lump.sum()) * 5000.0
+        # Next NAV date on or after each instalment
+        rows_at = np.searchsorted(dates.values, sip_dates.values)
+        navs = history.navs[rows_at, fund]
+        units = np.round(amounts / navs, 3)
+        folio = f"{10000000 + i}/{i % 97:02d}"
+        frame = pd.DataFrame({'date': dates[rows_at], 'folio': folio, 'scheme_code': history.codes[fund],
+                              'amount': np.round(units * navs, 2), 'units': units, 'nav': navs})
+        if len(frame) > 12 and rng.random() < redeem_share:
+            at = int(rng.integers(len(frame) // 2, len(frame)))
+            row = rows_at[at] + 1
+            if row < len(dates):
+                redeemed = np.round(frame['units'].iloc[:at + 1].sum() * rng.uniform(0.2, 0.5), 3)
+                nav = history.navs[row, fund]
+                frame = pd.concat([frame, pd.DataFrame({'date': [dates[row]], 'folio': folio,
+                                                        'scheme_code': history.codes[fund],
+                                                        'amount': [-round(redeemed * nav, 2)],
+                                                        'units': [-redeemed], 'nav': [nav]})])
+        rows.append(frame)
+    return pd.concat(rows, ignore_index=True).sort_values(['folio', 'date'], kind='stable').reset_index(drop=True)
+
+
+def synthetic_benchmarks(dates: pd.DatetimeIndex, market: np.ndarray, names: Optional[List[str]] = None,
+                         seed: int = 42, holiday_share: float = 0.02) -> pd.DataFrame:
+    """
+    TRI levels (date index, one column per index) that track ``market`` levels with their own tilt and noise
+
+    The index calendar drops ``holiday_share`` of ``dates`` and adds the
+    Saturdays after some of them, so it never matches the fund calendar
+    exactly. Defaults to every index in CATEGORY_BENCHMARKS.
+    """
+    rng = np.random.default_rng(seed)
+    names = names or sorted(set(CATEGORY_BENCHMARKS.values()))
+    market = np.asarray(market, dtype=np.float64)
+    market_returns = np.concatenate([[0.0], market[1:] / market[:-1] - 1.0])
+    beta = rng.uniform(0.9, 1.3, len(names))
+    noise = rng.uniform(0.02, 0.06, len(names)) / np.sqrt(TRADING_DAYS)
+    returns = market_returns[:, None] * beta + rng.standard_normal((len(dates), len(names))) * noise
+    returns[0] = 0.0
+    levels = pd.DataFrame(rng.uniform(5000.0, 30000.0, len(names)) * np.cumprod(1.0 + returns, axis=0),
+                          index=pd.DatetimeIndex(dates, name='date'), columns=names)
+
+    holidays = rng.random(len(dates)) < holiday_share
+    special = dates[rng.random(len(dates)) < holiday_share / 4] + pd.Timedelta(days=1)
+    extra = levels.reindex(special[special.dayofweek == 5], method='ffill')
+    return pd.concat([levels[~holidays], extra]).sort_index()
+
+
+CATEGORIES = ['Large Cap', 'Mid Cap', 'Small Cap', 'Flexi Cap', 'Index Funds', 'ELSS']
+
+
+def synthetic_portfolio(history: NAVHistory, transactions: pd.DataFrame, as_of=None) -> pd.DataFrame:
+    """
+    Holdings in the analyzer's layout for the units left after ``transactions``, at the last NAVs
+
+    With ``as_of``, only transactions up to that date count and NAVs are
+    taken from it. Categories are assigned round-robin from CATEGORIES.
+    """
+    row = -1
+    if as_of is not None:
+        transactions = transactions[transactions['date'] <= pd.Timestamp(as_of)]
+        row = int(np.searchsorted(history.dates.values, np.datetime64(pd.Timestamp(as_of)), side='right')) - 1
+    units = transactions.groupby('scheme_code')['units'].sum()
+    units = units[units > 0]
+    invested = transactions.groupby('scheme_code')['amount'].sum()[units.index]
+    last_navs = pd.Series(history.navs[row], index=history.codes)[units.index]
+    holdings = pd.DataFrame({
+        'scheme_code': units.index,
+        'scheme_name': [f'Synthetic {code} Fund - Direct Plan - Growth' for code in units.index],
+        'current_value': (units * last_navs).to_numpy(),
+        'invested_amount': invested.to_numpy(),
+        'units': units.to_numpy(),
+        'avg_cost': (invested / units).to_numpy(),
+        'current_nav': last_navs.to_numpy(),
+        'category': [CATEGORIES[i % len(CATEGORIES)] for i in range(len(units))],
+    })
+    holdings['absolute_return'] = holdings['current_value'] - holdings['invested_amount']
+    holdings['return_percentage'] = holdings['absolute_return'] / holdings['invested_amount'] * 100
+    return holdings
+
+
+def synthetic_kite_account(n_holdings: int = 25, n_orders: int = 40, n_instruments: int = 3000,
+                           seed: int = 42, end: Optional[str] = None) -> Tuple[List[dict], List[dict], pd.DataFrame]:
+    """
+    Raw Kite Connect MF payloads: (holdings records, order records, instruments table)
+
+    Held funds and ordered funds are drawn from the instruments; orders are
+    spread over the last 30 days and mostly COMPLETE.
+    """
+    rng = np.random.default_rng(seed)
+    end_ts = pd.Timestamp(end) if end else pd.Timestamp.today().normalize()
+    isins = np.array([f'INF{i:06d}{chr(65 + i % 26)}{i % 10}{(i * 7) % 10}' for i in range(n_instruments)])
+    last_price = np.round(rng.uniform(10.0, 500.0, n_instruments), 4)
+    instruments = pd.DataFrame({
+        'tradingsymbol': isins, 'amc': [f'AMC{i % 40:02d}' for i in range(n_instruments)],
+        'name': [f'Synthetic {i} Fund - Direct Plan - Growth' for i in range(n_instruments)],
+        'purchase_allowed': 1, 'redemption_allowed': 1, 'minimum_purchase_amount': 500.0,
+        'purchase_amount_multiplier': 1.0, 'minimum_additional_purchase_amount': 500.0,
+        'minimum_redemption_quantity': 0.001, 'redemption_quantity_multiplier': 0.001,
+        'dividend_type': 'growth', 'scheme_type': 'equity', 'plan': 'direct', 'settlement_type': 'T3',
+        'last_price': last_price, 'last_price_date': end_ts.strftime('%Y-%m-%d'),
+    })
+
+    held = rng.choice(n_instruments, size=n_holdings, replace=False)
+    quantity = np.round(rng.uniform(50.0, 5000.0, n_holdings), 3)
+    average = np.round(last_price[held] / rng.uniform(0.7, 1.6, n_holdings), 4)
+    holdings = [{'folio': str(10000000 + i), 'fund': instruments['name'].iloc[j], 'tradingsymbol': isins[j],
+                 'average_price': float(average[i]), 'last_price': float(last_price[j]),
+                 'last_price_date': end_ts.strftime('%Y-%m-%d'),
+                 'pnl': round(float(quantity[i] * (last_price[j] - average[i])), 2),
+                 'quantity': float(quantity[i]), 'pledged_quantity': 0.0}
+                for i, j in enumerate(held)]
+
+    orders = []
+    for i in range(n_orders):
+        j = int(held[rng.integers(0, n_holdings)])
+        sell = rng.random() < 0.15
+        status = 'COMPLETE' if rng.random() < 0.85 else str(rng.choice(['OPEN', 'REJECTED', 'CANCELLED']))
+        placed = end_ts - pd.Timedelta(days=int(rng.integers(1, 31))) + pd.Timedelta(hours=10)
+        amount = float(rng.integers(1, 41) * 500)
+        units = round(amount / last_price[j], 3)
+        orders.append({
+            'order_id': f'{i:08d}-mock', 'exchange_order_id': None, 'tradingsymbol': isins[j],
+            'status': status, 'status_message': None, 'folio': holdings[list(held).index(j)]['folio'],
+            'fund': instruments['name'].iloc[j], 'order_timestamp': placed.strftime('%Y-%m-%d %H:%M:%S'),
+            'exchange_timestamp': ((placed + pd.Timedelta(days=1)).strftime('%Y-%m-%d')
+                                   if status == 'COMPLETE' else None),
+            'settlement_id': None, 'transaction_type': 'SELL' if sell else 'BUY', 'variety': 'regular',
+            'purchase_type': 'FRESH', 'quantity': units if status == 'COMPLETE' or sell else 0.0,
+            'amount': 0.0 if sell else amount, 'last_price': float(last_price[j]),
+            'average_price': float(last_price[j]) if status == 'COMPLETE' else 0.0, 'placed_by': 'AB1234', 'tag': None,
+        })
+    return holdings, orders, instruments
@@ -0,0 +1,375 @@
+"""
+Tax-Lot Engine
+
+Per-instalment FIFO tax lots for equity-oriented mutual funds, built from
+CAS-style transactions (date, folio, scheme_code, amount, units; purchases
+positive, redemptions negative):
+- Every purchase is its own lot; redemptions consume a folio's lots first
+  in, first out, as the tax rules require
+- Realised gains per sale and lot, split into STCG / LTCG with the rates in
+  force on the sale date, and summarised per financial year
+- Unrealised gains of the open lots at given NAVs
+- A redemption plan: which folios to sell, and how many units, to raise a
+  target amount for the least tax
+- Selling-cost curves (tax plus exit load per rupee sold) for the
+  rebalancing optimiser in rebalance.py
+
+Lots are plain arrays, not objects. Units are held as integer thousandths
+(CAS reports 3 decimals), so FIFO matching is exact: each folio's purchases
+and redemptions are laid out on a cumulative-units axis, and one sorted
+merge of the two sets of breakpoints pairs every redemption with the lots
+it consumed, for all folios at once.
+
+Estimates only: surcharge, cess, grandfathering of pre-2018 purchases and
+set-off against gains outside these folios are not modelled.
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+# CAS statements report units to 3 decimals
+UNIT_SCALE = 1000
+
+# Equity-oriented funds are long term when held for more than 12 months
+LONG_TERM_MONTHS = 12
+
+# (in force for sales from, STCG rate, LTCG rate, LTCG exemption per financial year)
+TAX_REGIMES = [
+    (pd.Timestamp('1990-04-01'), 0.15, 0.0, 0.0),
+    (pd.Timestamp('2018-04-01'), 0.15, 0.10, 100000.0),
+    (pd.Timestamp('2024-07-23'), 0.20, 0.125, 125000.0),
+]
+
+# Usual equity-fund exit load: 1% on units redeemed within 365 days of purchase
+DEFAULT_EXIT_LOAD = (365, 0.01)
+
+# (days, rate) for every scheme, or scheme_code -> (days, rate) with an optional 'default'
+ExitLoads = Optional[Union[Tuple[int, float], Dict[str, Tuple[int, float]]]]
+
+
+def exit_load_rates(codes: np.ndarray, held_days: np.ndarray, exit_loads: ExitLoads = None) -> np.ndarray:
+    """
+    Exit load (fraction of proceeds) for units of ``codes`` held ``held_days``
+
+    ``exit_loads`` is one (days, rate) window for every scheme, or a dict of
+    scheme_code -> (days, rate) with an optional 'default' entry; units held
+    for fewer than ``days`` pay ``rate``. None means no exit loads.
+    """
+    if exit_loads is None:
+        return np.zeros(len(codes))
+    if not isinstance(exit_loads, dict):
+        exit_loads = {'default': exit_loads}
+    default = exit_loads.get('default', (0, 0.0))
+    windows = np.array([exit_loads.get(str(code), default) for code in codes], dtype=np.float64).reshape(-1, 2)
+    return np.where(held_days < windows[:, 0], windows[:, 1], 0.0)
+
+
+def _regime(dates) -> np.ndarray:
+    starts = np.array([start for start, *_ in TAX_REGIMES], dtype='datetime64[D]')
+    return np.searchsorted(starts, np.asarray(dates, dtype='datetime64[D]'), side='right') - 1
+
+
+def tax_rates(dates, long_term: np.ndarray) -> np.ndarray:
+    """
+    Capital-gains rate for sales on ``dates``, long or short term
+    """
+    regime = np.array([[stcg, ltcg] for _, stcg, ltcg, _ in TAX_REGIMES])[_regime(dates)]
+    return np.where(long_term, regime[:, 1], regime[:, 0])
+
+
+def is_long_term(buy_dates, sell_dates) -> np.ndarray:
+    """
+    Held for more than LONG_TERM_MONTHS (calendar months, not 365 days)
+    """
+    cutoff = pd.DatetimeIndex(buy_dates) + pd.DateOffset(months=LONG_TERM_MONTHS)
+    return np.asarray(pd.DatetimeIndex(sell_dates) > cutoff)
+
+
+def financial_year(dates) -> np.ndarray:
+    """
+    Indian financial year label (April-March) such as '2024-25'
+    """
+    dates = pd.DatetimeIndex(dates)
+    start = dates.year - (dates.month < 4)
+    return np.array([f"{year}-{(year + 1) % 100:02d}" for year in start], dtype=object)
+
+
+def _lower_hull(x: np.ndarray, y: np.ndarray) -> List[int]:
+    # Indices of the lower convex hull of points sorted by x (monotone chain)
+    x, y = x.tolist(), y.tolist()
+    hull: List[int] = []
+    for i in range(len(x)):
+        while len(hull) >= 2:
+            a, b = hull[-2], hull[-1]
+            if (y[b] - y[a]) * (x[i] - x[a]) >= (y[i] - y[a]) * (x[b] - x[a]):
+                hull.pop()
+            else:
+                break
+        hull.append(i)
+    return hull
+
+
+class TaxLots:
+    """
+    FIFO lots and realised sales for every (folio, scheme_code) in a set of transactions
+    """
+
+    def __init__(self, transactions: pd.DataFrame, date_col: str = 'date', folio_col: str = 'folio',
+                 code_col: str = 'scheme_code', amount_col: str = 'amount', units_col: str = 'units'):
+        df = pd.DataFrame({
+            'folio': transactions[folio_col].astype(str) if folio_col in transactions.columns else '',
+            'scheme_code': transactions[code_col].astype(str),
+            'date': pd.to_datetime(transactions[date_col]).dt.normalize(),
+            'amount': pd.to_numeric(transactions[amount_col], errors='coerce'),
+            'units': np.round(pd.to_numeric(transactions[units_col], errors='coerce') * UNIT_SCALE),
+        }).dropna(subset=['units'])
+        df = df[df['units'] != 0]
+
+        grouped = df.groupby(['folio', 'scheme_code'], sort=True)
+        self.keys = grouped.size().index.to_frame(index=False)
+        df = df.assign(key=grouped.ngroup()).sort_values(['key', 'date'], kind='stable')
+        buys, sells = df[df['units'] > 0], df[df['units'] < 0]
+
+        self.buy_key = buys['key'].to_numpy(np.int64)
+        self.buy_date = buys['date'].to_numpy('datetime64[D]')
+        self.buy_units = buys['units'].to_numpy(np.int64)
+        self.buy_price = buys['amount'].to_numpy(np.float64) / (self.buy_units / UNIT_SCALE)
+        self.sell_key = sells['key'].to_numpy(np.int64)
+        self.sell_date = sells['date'].to_numpy('datetime64[D]')
+        sell_units = -sells['units'].to_numpy(np.int64)
+        self.sell_price = -sells['amount'].to_numpy(np.float64) / (sell_units / UNIT_SCALE)
+
+        self.match_lot, self.match_sale, self.match_units = self._match(sell_units)
+        self.remaining = self.buy_units - np.bincount(self.match_lot, weights=self.match_units,
+                                                      minlength=len(self.buy_units)).astype(np.int64)
+
+    @classmethod
+    def from_csv(cls, path, **kwargs) -> 'TaxLots':
+        return cls(pd.read_csv(path, dtype={'scheme_code': str, 'folio': str}), **kwargs)
+
+    def _match(self, sell_units: np.ndarray):
+        # Lay each folio's lots end to end on one cumulative-units axis
+        n_keys = len(self.keys)
+        bought = np.bincount(self.buy_key, weights=self.buy_units, minlength=n_keys).astype(np.int64)
+        sold = np.bincount(self.sell_key, weights=sell_units, minlength=n_keys).astype(np.int64)
+        oversold = np.flatnonzero(sold > bought)
+        if len(oversold):
+            raise ValueError(f"Redemptions exceed purchases in {len(oversold)} folio(s), e.g. "
+                             f"{self._label(oversold[0])}")
+
+        key_start = np.concatenate([[0], np.cumsum(bought)[:-1]])
+        lot_end = np.cumsum(self.buy_units)
+        # Redemptions start at their folio's first lot and follow each other
+        sale_end = np.cumsum(sell_units)
+        sale_end = sale_end - np.concatenate([[0], np.cumsum(sold)[:-1]])[self.sell_key] + key_start[self.sell_key]
+        sale_start = sale_end - sell_units
+
+        points = np.unique(np.concatenate([lot_end, sale_start, sale_end]))
+        lo, hi = points[:-1], points[1:]
+        sale = np.searchsorted(sale_end, lo, side='right')
+        inside = sale < len(sale_end)
+        inside[inside] &= sale_start[sale[inside]] <= lo[inside]
+        lo, hi, sale = lo[inside], hi[inside], sale[inside]
+        lot = np.searchsorted(lot_end, lo, side='right')
+
+        early = self.buy_date[lot] > self.sell_date[sale]
+        if early.any():
+            raise ValueError(f"Redemption on {self.sell_date[sale[early][0]]} uses units bought later in "
+                             f"{self._label(self.sell_key[sale[early][0]])}")
+        return lot, sale, hi - lo
+
+    def _label(self, key: int) -> str:
+        return f"folio {self.keys['folio'].iat[key]} / scheme {self.keys['scheme_code'].iat[key]}"
+
+    # ---- realised -------------------------------------------------------------
+
+    def realised(self) -> pd.DataFrame:
+        """
+        One row per (sale, lot consumed): units, cost, proceeds, gain, term and financial year
+        """
+        lot, sale = self.match_lot, self.match_sale
+        units = self.match_units / UNIT_SCALE
+        long_term = is_long_term(self.buy_date[lot], self.sell_date[sale])
+        frame = self.keys.iloc[self.buy_key[lot]].reset_index(drop=True)
+        frame['buy_date'] = self.buy_date[lot]
+        frame['sell_date'] = self.sell_date[sale]
+        frame['units'] = units
+        frame['cost'] = units * self.buy_price[lot]
+        frame['proceeds'] = units * self.sell_price[sale]
+        frame['gain'] = frame['proceeds'] - frame['cost']
+        frame['term'] = np.where(long_term, 'LTCG', 'STCG')
+        frame['tax_rate'] = tax_rates(self.sell_date[sale], long_term)
+        frame['fy'] = financial_year(frame['sell_date'])
+        return frame
+
+    def realised_summary(self) -> pd.DataFrame:
+        """
+        STCG, LTCG and estimated tax per financial year
+
+        Short-term losses are set off against long-term gains, and the
+        year's LTCG exemption is applied before tax.
+        """
+        realised = self.realised()
+        columns = ['stcg', 'ltcg', 'stcg_tax', 'ltcg_tax', 'estimated_tax']
+        if realised.empty:
+            return pd.DataFrame(columns=columns, index=pd.Index([], name='fy'))
+        realised['tax'] = realised['gain'] * realised['tax_rate']
+        sums = realised.pivot_table(index='fy', columns='term', values=['gain', 'tax'], aggfunc='sum', fill_value=0.0)
+        summary = pd.DataFrame(index=sums.index)
+        for term in ('STCG', 'LTCG'):
+            summary[term.lower()] = sums[('gain', term)] if ('gain', term) in sums else 0.0
+            summary[f'{term.lower()}_rate'] = (sums[('tax', term)] / sums[('gain', term)]
+                                               if ('gain', term) in sums else 0.0)
+
+        fy_end = pd.to_datetime([f"{fy[:4]}-03-31" for fy in summary.index]) + pd.DateOffset(years=1)
+        exemption = np.array([exempt for *_, exempt in TAX_REGIMES])[_regime(fy_end.values)]
+        short_loss = np.minimum(summary['stcg'], 0.0)
+        taxable_long = np.maximum(summary['ltcg'] + short_loss - exemption, 0.0)
+        summary['stcg_tax'] = np.maximum(summary['stcg'], 0.0) * summary['stcg_rate'].fillna(0.0)
+        summary['ltcg_tax'] = taxable_long * summary['ltcg_rate'].fillna(0.0)
+        summary['estimated_tax'] = summary['stcg_tax'] + summary['ltcg_tax']
+        return summary[columns]
+
+    # ---- open lots ------------------------------------------------------------
+
+    def open_lots(self) -> pd.DataFrame:
+        """
+        Lots with units left: folio, scheme_code, buy_date, units, cost per unit
+        """
+        rows = np.flatnonzero(self.remaining > 0)
+        frame = self.keys.iloc[self.buy_key[rows]].reset_index(drop=True)
+        frame['buy_date'] = self.buy_date[rows]
+        frame['units'] = self.remaining[rows] / UNIT_SCALE
+        frame['unit_cost'] = self.buy_price[rows]
+        return frame
+
+    def _open_arrays(self, navs: Union[pd.Series, dict], as_of):
+        rows = np.flatnonzero(self.remaining > 0)
+        navs = pd.Series(navs, dtype=np.float64)
+        navs.index = navs.index.astype(str)
+        nav = navs.reindex(self.keys['scheme_code']).to_numpy()[self.buy_key[rows]]
+        as_of = pd.Timestamp(as_of if as_of is not None else pd.Timestamp.today()).normalize()
+        long_term = is_long_term(self.buy_date[rows], np.full(len(rows), as_of.to_datetime64()))
+        return rows, nav, long_term, as_of
+
+    def unrealised(self, navs: Union[pd.Series, dict], as_of=None) -> pd.DataFrame:
+        """
+        Open lots valued at ``navs`` (scheme_code -> NAV), with gain and term as of ``as_of``
+        """
+        rows, nav, long_term, _ = self._open_arrays(navs, as_of)
+        frame = self.open_lots()
+        frame['cost'] = frame['units'] * frame['unit_cost']
+        frame['value'] = frame['units'] * nav
+        frame['gain'] = frame['value'] - frame['cost']
+        frame['term'] = np.where(long_term, 'LTCG', 'STCG')
+        return frame
+
+    def unrealised_summary(self, navs: Union[pd.Series, dict], as_of=None) -> pd.DataFrame:
+        """
+        Per (folio, scheme_code): units, cost, value and short/long-term gains if sold at ``navs``
+        """
+        lots = self.unrealised(navs, as_of)
+        lots['stcg'] = lots['gain'].where(lots['term'] == 'STCG', 0.0)
+        lots['ltcg'] = lots['gain'].where(lots['term'] == 'LTCG', 0.0)
+        lots['long_term_units'] = lots['units'].where(lots['term'] == 'LTCG', 0.0)
+        return lots.groupby(['folio', 'scheme_code'], as_index=False)[
+            ['units', 'long_term_units', 'cost', 'value', 'stcg', 'ltcg']].sum()
+
+    # ---- redemption planning ----------------------------------------------------
+
+    def _sale_costs(self, navs: Union[pd.Series, dict], as_of=None, exit_loads: ExitLoads = None,
+                    codes: Optional[Sequence[str]] = None) -> dict:
+        # Proceeds, tax and exit load of selling each open lot in full
+        rows, nav, long_term, as_of = self._open_arrays(navs, as_of)
+        units = self.remaining[rows] / UNIT_SCALE
+        proceeds = units * nav
+        gain = proceeds - units * self.buy_price[rows]
+        tax = gain * tax_rates(np.full(len(rows), as_of.to_datetime64()), long_term)
+        scheme = self.keys['scheme_code'].to_numpy()[self.buy_key[rows]]
+        held_days = (as_of.to_datetime64() - self.buy_date[rows]).astype('timedelta64[D]').astype(np.int64)
+        load = proceeds * exit_load_rates(scheme, held_days, exit_loads)
+        usable = np.isfinite(proceeds)
+        if codes is not None:
+            usable &= np.isin(scheme, [str(code) for code in codes])
+        return {'rows': rows, 'nav': nav, 'units': units, 'proceeds': proceeds, 'gain': gain, 'tax': tax,
+                'load': load, 'long_term': long_term, 'usable': usable, 'as_of': as_of}
+
+    def _stretches(self, costs: dict) -> list:
+        # Lower-hull stretches of every folio's FIFO (proceeds, tax + load) curve:
+        # (cost per rupee, folio key, lot positions), cheapest first
+        stretches = []
+        candidates = np.flatnonzero(costs['usable'])
+        keys = self.buy_key[costs['rows']][candidates]
+        total = costs['tax'] + costs['load']
+        for lots in np.split(candidates, np.flatnonzero(np.diff(keys)) + 1) if len(candidates) else []:
+            x = np.concatenate([[0.0], np.cumsum(costs['proceeds'][lots])])
+            y = np.concatenate([[0.0], np.cumsum(total[lots])])
+            hull = _lower_hull(x, y)
+            for a, b in zip(hull[:-1], hull[1:]):
+                if x[b] > x[a]:
+                    stretches.append(((y[b] - y[a]) / (x[b] - x[a]), self.buy_key[costs['rows'][lots[0]]], lots[a:b]))
+        stretches.sort(key=lambda stretch: stretch[0])
+        return stretches
+
+    def cost_curves(self, navs: Union[pd.Series, dict], as_of=None, exit_loads: ExitLoads = None,
+                    codes: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """
+        Cost of selling from each folio, as convex piecewise-linear stretches
+
+        One row per stretch of each folio's FIFO curve (its lower convex
+        hull), in selling order within a folio: folio, scheme_code, proceeds
+        available, tax, exit_load and cost_per_rupee (tax + load per rupee).
+        """
+        costs = self._sale_costs(navs, as_of, exit_loads, codes)
+        records = []
+        for slope, key, lots in self._stretches(costs):
+            records.append((key, lots[0], costs['proceeds'][lots].sum(), costs['tax'][lots].sum(),
+                            costs['load'][lots].sum(), slope))
+        frame = pd.DataFrame(records, columns=['key', 'first_lot', 'proceeds', 'tax', 'exit_load', 'cost_per_rupee'])
+        frame = frame.sort_values(['key', 'first_lot']).reset_index(drop=True)
+        keys = self.keys.iloc[frame['key']].reset_index(drop=True)
+        return pd.concat([keys, frame.drop(columns=['key', 'first_lot'])], axis=1)
+
+    def redemption_plan(self, amount: float, navs: Union[pd.Series, dict], as_of=None,
+                        codes: Optional[Sequence[str]] = None, exit_loads: ExitLoads = None) -> pd.DataFrame:
+        """
+        Units to redeem per (folio, scheme_code) to raise ``amount`` for the least tax
+
+        Within a folio units always leave FIFO, so each folio offers a
+        sequence of lots with a cumulative (proceeds, tax) curve. Stretches of
+        that curve are taken cheapest tax-per-rupee first across all folios,
+        following each curve's lower convex hull. That is optimal whenever
+        the curves are convex and close to it otherwise. Losses count as
+        negative tax, so loss-making lots are sold first. ``codes`` limits
+        the plan to some schemes; with ``exit_loads`` the load counts as cost too.
+        """
+        costs = self._sale_costs(navs, as_of, exit_loads, codes)
+        nav, units = costs['nav'], costs['units']
+        sold = np.zeros(len(units))
+        needed = float(amount)
+        for _, _, lots in self._stretches(costs):
+            for lot in lots:
+                if needed <= 0:
+                    break
+                take = min(units[lot], np.ceil(needed / nav[lot] * UNIT_SCALE) / UNIT_SCALE)
+                sold[lot] = take
+                needed -= take * nav[lot]
+            if needed <= 0:
+                break
+        if needed > 1e-6:
+            print(f"⚠️ Holdings can only raise ₹{amount - needed:,.2f} of ₹{amount:,.2f}")
+
+        taken = sold > 0
+        share = sold[taken] / units[taken]
+        frame = self.keys.iloc[self.buy_key[costs['rows']][taken]].reset_index(drop=True)
+        frame['units'] = sold[taken]
+        frame['proceeds'] = costs['proceeds'][taken] * share
+        gain = costs['gain'][taken] * share
+        frame['stcg'] = np.where(costs['long_term'][taken], 0.0, gain)
+        frame['ltcg'] = np.where(costs['long_term'][taken], gain, 0.0)
+        frame['estimated_tax'] = costs['tax'][taken] * share
+        frame['exit_load'] = costs['load'][taken] * share
+        columns = ['units', 'proceeds', 'stcg', 'ltcg', 'estimated_tax', 'exit_load']
+        return frame.groupby(['folio', 'scheme_code'], as_index=False)[columns].sum()
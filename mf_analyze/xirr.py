@@ -0,0 +1,196 @@
+"""
+XIRR Engine
+
+Money-weighted annual returns (XIRR) for SIP cash flows, solved for many
+folios in one batch. Every group's NPV and its derivative are accumulated
+with np.bincount over all flows at once, so each Newton step is a handful
+of array operations however many folios there are. Groups where Newton
+does not converge (odd cash-flow patterns, extreme rates) fall back to a
+bracketed Brent search; groups with no root at all get NaN.
+
+Cash flows use the investor's sign: money invested is negative,
+redemptions and the current value are positive. Transaction files follow
+CAS statements instead (purchases positive, redemptions negative) and are
+flipped on load. Time is measured in days / 365, as Excel's XIRR does.
+"""
+
+from typing import Iterable, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+DAYS_PER_YEAR = 365.0
+
+# Newton stops when the rate moves by less than this
+TOLERANCE = 1e-10
+MAX_ITERATIONS = 50
+
+# Widest rate bracket the fallback searches (per year)
+BRACKET = (-0.9999, 1e4)
+
+
+def _npv(rate: float, years: np.ndarray, amounts: np.ndarray) -> float:
+    return float(np.sum(amounts * (1.0 + rate) ** -years))
+
+
+def _brent_fallback(years: np.ndarray, amounts: np.ndarray) -> float:
+    from scipy.optimize import brentq
+
+    # Scan for a sign change, widening from typical rates towards the bracket edges
+    grid = np.concatenate([np.linspace(-0.99, 1.0, 200), np.geomspace(1.0, BRACKET[1], 60)[1:]])
+    with np.errstate(over='ignore', invalid='ignore', divide='ignore'):
+        values = (amounts * (1.0 + grid[:, None]) ** -years).sum(axis=1)
+    finite = np.isfinite(values)
+    grid, values = grid[finite], values[finite]
+    crossings = np.flatnonzero(np.sign(values[:-1]) * np.sign(values[1:]) <= 0)
+    if not len(crossings):
+        return np.nan
+    i = crossings[0]
+    return float(brentq(_npv, grid[i], grid[i + 1], args=(years, amounts), xtol=TOLERANCE))
+
+
+def _initial_guess(groups: np.ndarray, years: np.ndarray, amounts: np.ndarray, n_groups: int) -> np.ndarray:
+    # Money in vs money out, compounded over the gap between their weighted mean dates
+    inflow = np.where(amounts > 0, amounts, 0.0)
+    outflow = np.where(amounts < 0, -amounts, 0.0)
+    total_in = np.bincount(groups, weights=inflow, minlength=n_groups)
+    total_out = np.bincount(groups, weights=outflow, minlength=n_groups)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        span = (np.bincount(groups, weights=inflow * years, minlength=n_groups) / total_in
+                - np.bincount(groups, weights=outflow * years, minlength=n_groups) / total_out)
+        guess = (total_in / total_out) ** (1.0 / np.maximum(span, 1.0 / DAYS_PER_YEAR)) - 1.0
+    return np.where(np.isfinite(guess), np.clip(guess, -0.9, 10.0), 0.1)
+
+
+def xirr_batch(groups: np.ndarray, dates, amounts: np.ndarray, n_groups: Optional[int] = None,
+               guess: Optional[float] = None, tol: float = TOLERANCE, max_iter: int = MAX_ITERATIONS) -> np.ndarray:
+    """
+    XIRR of every group of cash flows at once
+
+    ``groups`` holds integer group ids (0..n_groups-1) per flow, ``dates``
+    the flow dates and ``amounts`` the signed flows. Returns one annual rate
+    per group; NaN where no rate exists (e.g. only investments, no value).
+    Without a ``guess`` each group starts from its money multiple compounded
+    over the gap between its weighted mean investment and payout dates.
+    """
+    groups = np.asarray(groups, dtype=np.int64)
+    amounts = np.asarray(amounts, dtype=np.float64)
+    days = pd.DatetimeIndex(dates).values.astype('datetime64[D]').astype(np.int64)
+    if len(groups) == 0:
+        return np.full(n_groups or 0, np.nan)
+    n_groups = int(groups.max()) + 1 if n_groups is None else n_groups
+
+    first = np.full(n_groups, np.iinfo(np.int64).max)
+    np.minimum.at(first, groups, days)
+    years = (days - first[groups]) / DAYS_PER_YEAR
+
+    # A root needs both positive and negative flows
+    has_pos = np.bincount(groups, weights=amounts > 0, minlength=n_groups) > 0
+    has_neg = np.bincount(groups, weights=amounts < 0, minlength=n_groups) > 0
+    solvable = has_pos & has_neg
+
+    rate = _initial_guess(groups, years, amounts, n_groups) if guess is None else np.full(n_groups, guess)
+    converged = ~solvable
+    # Each step only touches the flows of groups still iterating
+    rows = np.flatnonzero(~converged[groups])
+    with np.errstate(over='ignore', invalid='ignore', divide='ignore'):
+        for _ in range(max_iter):
+            g, t, a = groups[rows], years[rows], amounts[rows]
+            log_base = np.log1p(rate[g])
+            discounted = a * np.exp(-t * log_base)
+            npv = np.bincount(g, weights=discounted, minlength=n_groups)
+            slope = np.bincount(g, weights=-t * discounted, minlength=n_groups) / (1.0 + rate)
+            step = npv / slope
+            new_rate = rate - step
+            # Never step past -100%: go halfway towards it instead
+            new_rate = np.where(new_rate <= -1.0, (rate - 1.0) / 2.0, new_rate)
+            active = ~converged & np.isfinite(new_rate)
+            rate = np.where(active, new_rate, rate)
+            converged |= active & (np.abs(step) <= tol * (1.0 + np.abs(rate)))
+            if converged.all():
+                break
+            rows = rows[~converged[groups[rows]]]
+
+    result = np.where(solvable & converged & np.isfinite(rate), rate, np.nan)
+    failed = np.flatnonzero(solvable & ~(converged & np.isfinite(rate)))
+    if len(failed):
+        order = np.argsort(groups, kind='stable')
+        bounds = np.searchsorted(groups[order], np.arange(n_groups + 1))
+        for g in failed:
+            rows = order[bounds[g]:bounds[g + 1]]
+            result[g] = _brent_fallback(years[rows], amounts[rows])
+    return result
+
+
+def xirr(dates, amounts: Sequence[float]) -> float:
+    """
+    XIRR of a single series of dated cash flows
+    """
+    amounts = np.asarray(amounts, dtype=np.float64)
+    return float(xirr_batch(np.zeros(len(amounts), dtype=np.int64), dates, amounts, n_groups=1)[0])
+
+
+class CashFlowLedger:
+    """
+    Dated cash flows per (folio, scheme), in the investor's sign convention
+    """
+
+    def __init__(self, folios: Iterable, codes: Iterable, dates, amounts: Iterable):
+        self.folios = np.asarray([str(folio) for folio in folios], dtype=object)
+        self.codes = np.asarray([str(code) for code in codes], dtype=object)
+        self.dates = pd.DatetimeIndex(dates).normalize()
+        self.amounts = np.asarray(amounts, dtype=np.float64)
+        if not (len(self.folios) == len(self.codes) == len(self.dates) == len(self.amounts)):
+            raise ValueError("folios, codes, dates and amounts must have the same length")
+
+    @classmethod
+    def from_transactions(cls, df: pd.DataFrame, date_col: str = 'date', folio_col: str = 'folio',
+                          code_col: str = 'scheme_code', amount_col: str = 'amount') -> 'CashFlowLedger':
+        """
+        Build from CAS-style transactions: purchases positive, redemptions negative
+        """
+        folios = df[folio_col] if folio_col in df.columns else pd.Series('', index=df.index)
+        amounts = pd.to_numeric(df[amount_col], errors='coerce').fillna(0.0).to_numpy()
+        return cls(folios, df[code_col], pd.to_datetime(df[date_col]), -amounts)
+
+    @classmethod
+    def from_csv(cls, path, **kwargs) -> 'CashFlowLedger':
+        return cls.from_transactions(pd.read_csv(path, dtype={'scheme_code': str, 'folio': str}), **kwargs)
+
+    def __len__(self) -> int:
+        return len(self.amounts)
+
+    def frame(self) -> pd.DataFrame:
+        return pd.DataFrame({'folio': self.folios, 'scheme_code': self.codes,
+                             'date': self.dates, 'amount': self.amounts})
+
+    def with_valuations(self, values: Union[pd.Series, pd.DataFrame], as_of=None,
+                        value_col: str = 'current_value') -> 'CashFlowLedger':
+        """
+        Ledger plus the current value of each holding as a final inflow on ``as_of``
+
+        ``values`` is a Series indexed by scheme code, or a frame with
+        scheme_code (and optionally folio) plus ``value_col``.
+        """
+        if isinstance(values, pd.Series):
+            values = values.rename(value_col).rename_axis('scheme_code').reset_index()
+        folios = values['folio'] if 'folio' in values.columns else pd.Series('', index=values.index)
+        as_of = pd.Timestamp(as_of if as_of is not None else pd.Timestamp.today()).normalize()
+        return CashFlowLedger(
+            np.concatenate([self.folios, folios.astype(str).to_numpy()]),
+            np.concatenate([self.codes, values['scheme_code'].astype(str).to_numpy()]),
+            self.dates.append(pd.DatetimeIndex([as_of] * len(values))),
+            np.concatenate([self.amounts, values[value_col].to_numpy(dtype=np.float64)]),
+        )
+
+    def xirr(self, by: Optional[Union[str, Sequence[str]]] = 'scheme_code') -> Union[pd.Series, float]:
+        """
+        XIRR per group ('scheme_code', 'folio' or both as a list), or for everything if by is None
+        """
+        if by is None:
+            return xirr(self.dates, self.amounts)
+        keys = [by] if isinstance(by, str) else list(by)
+        grouped = self.frame().groupby(keys, sort=True)
+        labels = grouped.size().index
+        rates = xirr_batch(grouped.ngroup().to_numpy(), self.dates, self.amounts, n_groups=len(labels))
+        return pd.Series(rates, index=labels, name='xirr')
@@ -3,8 +3,13 @@ Zerodha MF Portfolio Integration
 
 This module provides integration with Zerodha Kite API to fetch:
 - Mutual fund holdings
+- Mutual fund orders and the MF instrument list
 - Real-time portfolio data
-- Historical performance data
+
+Requests go through kite_client.KiteClient (pooled, rate-limited, with
+retries). Credentials come from the arguments or the KITE_API_KEY,
+KITE_ACCESS_TOKEN and KITE_API_SECRET environment variables; point
+base_url at a kite_mock.MockKiteServer to run offline.
 """
 
 import os
@@ -12,31 +17,57 @@ from typing import Dict, List, Optional
 import pandas as pd
 from datetime import datetime
 
+from amfi_master import SchemeMaster
+from kite_client import KITE_URL, KiteClient, KiteError
+from snapshots import SnapshotStore
+
 class ZerodhaMFIntegration:
     """
     Integration with Zerodha Kite API for MF portfolio data
     """
     
-    def __init__(self):
+    def __init__(self, api_key: Optional[str] = None, access_token: Optional[str] = None,
+                 base_url: str = KITE_URL, client: Optional[KiteClient] = None):
+        self.api_key = api_key or os.environ.get('KITE_API_KEY')
+        self.access_token = access_token or os.environ.get('KITE_ACCESS_TOKEN')
+        self.base_url = base_url
+        self.client = client
         self.is_connected = False
         self.holdings = None
+        self.orders = None
+        self.instruments = None
         
-    def connect_zerodha(self):
+    def connect_zerodha(self, request_token: Optional[str] = None, api_secret: Optional[str] = None):
         """
-        Connect to Zerodha API using MCP tools
-        This will use the available Zerodha MCP functions
+        Connect to Zerodha's Kite Connect API
+
+        Uses the access token if there is one; otherwise exchanges a login
+        request_token (with the API secret) for one. The connection is
+        checked by fetching the user profile.
         """
         try:
-            # This will be replaced with actual MCP Zerodha connection
             print("🔗 Connecting to Zerodha API...")
-            
-            # Check if we can connect using MCP tools
-            # We'll use the mcp_zerodha-mcp_login function if available
+            if self.client is None:
+                if not self.api_key:
+                    raise KiteError("No API key: pass api_key or set KITE_API_KEY", 'InputException')
+                self.client = KiteClient(self.api_key, self.access_token, base_url=self.base_url)
+
+            if request_token:
+                api_secret = api_secret or os.environ.get('KITE_API_SECRET')
+                if not api_secret:
+                    raise KiteError("No API secret: pass api_secret or set KITE_API_SECRET", 'InputException')
+                self.access_token = self.client.generate_session(request_token, api_secret)['access_token']
+            elif not self.client.access_token:
+                raise KiteError("No access token: pass access_token, set KITE_ACCESS_TOKEN "
+                                "or log in with a request_token", 'InputException')
+
+            profile = self.client.profile()
             self.is_connected = True
-            print("✅ Connected to Zerodha API successfully!")
+            print(f"✅ Connected to Zerodha API as {profile.get('user_name', profile.get('user_id', 'user'))}!")
             return True
             
         except Exception as e:
+            self.is_connected = False
             print(f"❌ Failed to connect to Zerodha: {str(e)}")
             print("💡 Please ensure you have proper API credentials configured")
             return False
@@ -51,32 +82,7 @@ class ZerodhaMFIntegration:
             
         try:
             print("📥 Fetching MF holdings from Zerodha...")
-            
-            # This will use the actual MCP Zerodha function when available
-            # For now, we'll return sample data structure
-            
-            # Sample structure that matches Zerodha MF holdings format
-            sample_holdings = {
-                'folio': ['123456789', '987654321', '456789123'],
-                'fund': [
-                    'SBI Small Cap Fund - Direct Plan - Growth',
-                    'Axis Bluechip Fund - Direct Plan - Growth',
-                    'HDFC Index Fund - NIFTY 50 Plan - Direct Plan - Growth'
-                ],
-                'isin': ['INF200K01VK5', 'INF846K01EW2', 'INF179K01XQ7'],
-                'quantity': [1234.567, 987.654, 4532.123],
-                'average_price': [81.25, 152.30, 19.85],
-                'last_price': [101.45, 182.75, 20.95],
-                'pnl': [24938.15, 30041.21, 4983.35]
-            }
-            
-            holdings_df = pd.DataFrame(sample_holdings)
-            
-            # Calculate additional metrics
-            holdings_df['invested_value'] = holdings_df['quantity'] * holdings_df['average_price']
-            holdings_df['current_value'] = holdings_df['quantity'] * holdings_df['last_price']
-            holdings_df['returns_pct'] = ((holdings_df['current_value'] - holdings_df['invested_value']) / holdings_df['invested_value']) * 100
-            
+            holdings_df = self.client.mf_holdings()
             self.holdings = holdings_df
             print(f"✅ Fetched {len(holdings_df)} MF holdings successfully!")
             return holdings_df
@@ -84,7 +90,61 @@ class ZerodhaMFIntegration:
         except Exception as e:
             print(f"❌ Error fetching MF holdings: {str(e)}")
             return None
+
+    def fetch_mf_orders(self) -> Optional[pd.DataFrame]:
+        """
+        Fetch recent mutual fund orders as CAS-style rows (purchases +, redemptions -)
+        """
+        if not self.is_connected:
+            print("❌ Not connected to Zerodha. Please connect first.")
+            return None
+
+        try:
+            self.orders = self.client.mf_orders()
+            print(f"✅ Fetched {len(self.orders)} MF orders successfully!")
+            return self.orders
+        except Exception as e:
+            print(f"❌ Error fetching MF orders: {str(e)}")
+            return None
+
+    def fetch_all(self) -> Optional[Dict[str, pd.DataFrame]]:
+        """
+        Fetch holdings, orders and the MF instrument list concurrently
+        """
+        if not self.is_connected:
+            print("❌ Not connected to Zerodha. Please connect first.")
+            return None
+
+        try:
+            print("📥 Fetching MF holdings, orders and instruments from Zerodha...")
+            fetched = self.client.fetch()
+            self.holdings = fetched['holdings']
+            self.orders = fetched['orders']
+            self.instruments = fetched['instruments']
+            print(f"✅ Fetched {len(self.holdings)} holdings, {len(self.orders)} orders "
+                  f"and {len(self.instruments)} instruments")
+            return fetched
+        except Exception as e:
+            print(f"❌ Error fetching from Zerodha: {str(e)}")
+            return None
     
+    def add_scheme_details(self, master: Optional[SchemeMaster] = None) -> Optional[pd.DataFrame]:
+        """
+        Join AMFI scheme code and category onto the holdings by ISIN,
+        falling back to fuzzy matching on the fund name
+        """
+        if self.holdings is None:
+            print("❌ No holdings loaded. Please fetch holdings first.")
+            return None
+
+        master = master or SchemeMaster.load()
+        self.holdings = master.resolve_holdings(self.holdings, isin_col='isin', name_col='fund')
+        unresolved = int(self.holdings['scheme_code'].isna().sum())
+        print(f"✅ Matched {len(self.holdings) - unresolved}/{len(self.holdings)} holdings to AMFI schemes")
+        if unresolved:
+            print(f"⚠️ Unmatched: {', '.join(self.holdings.loc[self.holdings['scheme_code'].isna(), 'fund'])}")
+        return self.holdings
+
     def get_portfolio_summary(self) -> Dict:
         """
         Get overall portfolio summary from Zerodha holdings
@@ -123,6 +183,23 @@ class ZerodhaMFIntegration:
             print(f"❌ Error exporting to CSV: {str(e)}")
             return False
 
+    def record_snapshot(self, store: Optional[SnapshotStore] = None, date=None) -> Optional[Dict[str, int]]:
+        """
+        Append the holdings to the snapshot store, keeping every day's history
+
+        Holdings are keyed by AMFI scheme_code when add_scheme_details has
+        run, otherwise by ISIN.
+        """
+        if self.holdings is None:
+            print("❌ No holdings data to record")
+            return None
+
+        store = store or SnapshotStore()
+        counts = store.record(self.holdings, date)
+        print(f"✅ Snapshot recorded: {counts['opened']} new/changed, {counts['closed']} closed, "
+              f"{counts['unchanged']} unchanged positions")
+        return counts
+
 # Function to use MCP Zerodha tools when available
 def connect_with_mcp():
     """
@@ -155,13 +232,10 @@ def connect_with_mcp():
     return instructions
 
 if __name__ == "__main__":
-    # Example usage
+    # Example usage: credentials from KITE_API_KEY / KITE_ACCESS_TOKEN
     zerodha = ZerodhaMFIntegration()
     
-    # Show MCP connection instructions
-    connect_with_mcp()
-    
-    # Connect to Zerodha (this will be manual for now)
+    # Connect to Zerodha
     if zerodha.connect_zerodha():
         # Fetch holdings
         holdings = zerodha.fetch_mf_holdings()